@@ -216,22 +216,31 @@ class BaseCommand(object):
                 # raise the error and quit.
                 sys.stderr.write(self.style.ERROR(str('Error: %s\n' % e)))
                 sys.exit(1)
+        context = None
+        if self.can_import_settings:
+            # Name the command in the comments of the queries it runs.
+            from django.db.backends import sqlcomments
+            context = sqlcomments.set_context(command=self.__class__.__module__.split('.')[-1])
         try:
-            if self.requires_model_validation:
-                self.validate()
-            output = self.handle(*args, **options)
-            if output:
-                if self.output_transaction:
-                    # This needs to be imported here, because it relies on settings.
-                    from django.db import connection
-                    if connection.ops.start_transaction_sql():
-                        print self.style.SQL_KEYWORD(connection.ops.start_transaction_sql())
-                print output
-                if self.output_transaction:
-                    print self.style.SQL_KEYWORD("COMMIT;")
-        except CommandError, e:
-            sys.stderr.write(self.style.ERROR(str('Error: %s\n' % e)))
-            sys.exit(1)
+            try:
+                if self.requires_model_validation:
+                    self.validate()
+                output = self.handle(*args, **options)
+                if output:
+                    if self.output_transaction:
+                        # This needs to be imported here, because it relies on settings.
+                        from django.db import connection
+                        if connection.ops.start_transaction_sql():
+                            print self.style.SQL_KEYWORD(connection.ops.start_transaction_sql())
+                    print output
+                    if self.output_transaction:
+                        print self.style.SQL_KEYWORD("COMMIT;")
+            except CommandError, e:
+                sys.stderr.write(self.style.ERROR(str('Error: %s\n' % e)))
+                sys.exit(1)
+        finally:
+            if context is not None:
+                sqlcomments.restore_context(context)
 
     def validate(self, app=None, display_num_errors=False):
         """
@@ -0,0 +1,115 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--database', action='store', dest='database',
+            default='default', help='Nominates the database whose queries '
+                'and indexes are considered. Defaults to the "default" database.'),
+        make_option('--min-hits', action='store', dest='min_hits', type='int',
+            default=1, help='Leaves out indexes that would serve fewer '
+                'recorded queries than this. Defaults to 1.'),
+    )
+    help = ('Prints the CREATE INDEX statements for the indexes that would serve '
+            'the most queries of a recorded workload, best first.')
+    args = '<workload file> [workload file ...]'
+
+    requires_model_validation = True
+
+    def handle(self, *paths, **options):
+        from django.db import connections
+        from django.db.backends.util import truncate_name
+        from django.db.models.sql import workload
+
+        if not paths:
+            raise CommandError("Give at least one file written by WorkloadRecorder.dump().")
+        using = options.get('database', 'default')
+        connection = connections[using]
+        accesses = []
+        for path in paths:
+            try:
+                fileobj = open(path)
+            except IOError, e:
+                raise CommandError("Can't read %s: %s" % (path, e))
+            try:
+                try:
+                    accesses.extend([a for a in workload.load(fileobj) if a[0] == using])
+                except ValueError, e:
+                    raise CommandError("%s: %s" % (path, e))
+            finally:
+                fileobj.close()
+
+        suggestions = workload.suggest_indexes([a[1:] for a in accesses],
+                workload.existing_indexes(connection), options.get('min_hits', 1))
+        if not suggestions:
+            return '-- The existing indexes serve every recorded query.'
+
+        qn = connection.ops.quote_name
+        models = self.models_by_table()
+        output = []
+        for suggestion in suggestions:
+            columns = suggestion.columns()
+            descending = self.descending_columns(suggestion)
+            parts = []
+            for column in columns:
+                part = qn(column)
+                if column in descending:
+                    part += ' DESC'
+                parts.append(part)
+            name = truncate_name('%s_%s' % (suggestion.table, '_'.join(columns)),
+                                 connection.ops.max_name_length())
+            output.append('-- %s' % self.describe(suggestion, models.get(suggestion.table)))
+            output.append('CREATE INDEX %s ON %s (%s);' % (
+                qn(name), qn(suggestion.table), ', '.join(parts)))
+        return '\n'.join(output)
+
+    def models_by_table(self):
+        from django.db import models
+        result = {}
+        for model in models.get_models(include_auto_created=True):
+            opts = model._meta
+            if not opts.proxy:
+                result.setdefault(opts.db_table, model)
+        return result
+
+    def descending_columns(self, suggestion):
+        """
+        Returns the columns the suggested index should sort in descending
+        order. A B-tree can be read backwards, so directions only matter when
+        they're mixed.
+        """
+        directions = set([descending for column, descending in suggestion.rest])
+        if len(directions) < 2:
+            return ()
+        return [column for column, descending in suggestion.rest if descending]
+
+    def describe(self, suggestion, model):
+        """
+        Returns a line on the queries the suggested index would serve, and
+        the Meta.indexes entry that declares it.
+        """
+        words = ['%d hits' % suggestion.hits]
+        if suggestion.equal:
+            words.append('equal to %s' % ', '.join(suggestion.equal))
+        if suggestion.kind == 'range':
+            words.append('range on %s' % suggestion.rest[0][0])
+        elif suggestion.kind == 'order':
+            words.append('ordered by %s' % ', '.join(
+                [(d and '-' or '') + c for c, d in suggestion.rest]))
+        line = '; '.join(words)
+        if model is not None and not model._meta.auto_created:
+            fields = dict([(f.column, f.name) for f in model._meta.local_fields])
+            descending = self.descending_columns(suggestion)
+            names = []
+            for column in suggestion.columns():
+                if column not in fields:
+                    names.append(None)
+                elif column in descending:
+                    names.append('-' + fields[column])
+                else:
+                    names.append(fields[column])
+            if None not in names:
+                line += " (%s.%s: Index(%s))" % (model._meta.app_label,
+                        model._meta.object_name, ', '.join(["'%s'" % n for n in names]))
+        return line
@@ -0,0 +1,104 @@
+from optparse import make_option
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--add', action='append', dest='add', default=[],
+            help='Shows what a rebalance would move if the given database '
+                'were added as a shard. Use multiple --add to add several.'),
+        make_option('--remove', action='append', dest='remove', default=[],
+            help='Shows what a rebalance would move if the given shard '
+                'were removed. Use multiple --remove to remove several.'),
+    )
+    help = ('Reports how the rows of sharded models are spread over the shards, '
+            'and what a rebalance would move. Nothing is changed.')
+    args = '[appname.ModelName ...]'
+
+    requires_model_validation = True
+
+    def handle(self, *labels, **options):
+        from django.db.models import get_model
+        from django.db.routers import HashRing, get_shard_router
+
+        try:
+            shard_router = get_shard_router()
+        except ImproperlyConfigured, e:
+            raise CommandError(str(e))
+        add, remove = options.get('add', []), options.get('remove', [])
+        for alias in remove:
+            if alias not in shard_router.shards:
+                raise CommandError("'%s' isn't a shard." % alias)
+
+        new_ring = None
+        if add or remove:
+            shards = dict(shard_router.shards)
+            for alias in add:
+                shards[alias] = shard_router.shards.get(alias, 1)
+            for alias in remove:
+                del shards[alias]
+            if not shards:
+                raise CommandError("A rebalance must leave at least one shard.")
+            new_ring = HashRing(shards, shard_router.vnodes)
+
+        if not labels:
+            labels = sorted(shard_router.shard_keys.keys())
+        models = []
+        for label in labels:
+            try:
+                app_label, model_name = label.split('.')
+            except ValueError:
+                raise CommandError("Models must be given as appname.ModelName, not '%s'." % label)
+            model = get_model(app_label, model_name)
+            if model is None:
+                raise CommandError("Unknown model: %s" % label)
+            if shard_router.shard_key_field(model) is None:
+                raise CommandError("%s isn't sharded." % label)
+            models.append(model)
+
+        output = []
+        for model in models:
+            output.extend(self.report(model, shard_router, new_ring))
+        return '\n'.join(output)
+
+    def report(self, model, shard_router, new_ring):
+        opts = model._meta
+        field = shard_router.shard_key_field(model)
+        lines = ['%s.%s (shard key: %s)' % (opts.app_label, opts.object_name, field.name)]
+        total = misplaced = moved = 0
+        moves = {}
+        counts = []
+        for alias in sorted(shard_router.shards):
+            count = 0
+            wrong = 0
+            keys = model._default_manager.using(alias).values_list(field.attname, flat=True)
+            for key in keys.iterator():
+                count += 1
+                if shard_router.shard_for(key) != alias:
+                    wrong += 1
+                if new_ring is not None:
+                    target = new_ring.get_node(key)
+                    if target != alias:
+                        moved += 1
+                        moves[(alias, target)] = moves.get((alias, target), 0) + 1
+            counts.append((alias, count, wrong))
+            total += count
+            misplaced += wrong
+
+        for alias, count, wrong in counts:
+            line = '  %s: %d rows (%s)' % (alias, count, _percent(count, total))
+            if wrong:
+                line += ', %d on the wrong shard' % wrong
+            lines.append(line)
+        if new_ring is not None:
+            lines.append('  Rebalancing onto %s would move %d of %d rows (%s):'
+                    % (', '.join(sorted(new_ring.nodes)), moved, total, _percent(moved, total)))
+            for (source, target), count in sorted(moves.items()):
+                lines.append('    %s -> %s: %d' % (source, target, count))
+        return lines
+
+def _percent(part, total):
+    if not total:
+        return '0.0%'
+    return '%.1f%%' % (100.0 * part / total)
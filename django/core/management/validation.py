@@ -257,4 +257,18 @@ def get_validation_errors(outfile, app=None):
                     if f not in opts.local_fields:
                         e.add(opts, '"unique_together" refers to %s. This is not in the same model as the unique_together statement.' % f.name)
 
+        # Check indexes.
+        for index in opts.indexes:
+            connection.validation.validate_index(e, opts, index)
+            for field_name in index.field_names():
+                try:
+                    f = opts.get_field(field_name, many_to_many=True)
+                except models.FieldDoesNotExist:
+                    e.add(opts, '"indexes" refers to %s, a field that doesn\'t exist.' % field_name)
+                else:
+                    if isinstance(f.rel, models.ManyToManyRel):
+                        e.add(opts, '"indexes" refers to %s. ManyToManyFields can\'t be indexed.' % f.name)
+                    elif f not in opts.local_fields:
+                        e.add(opts, '"indexes" refers to %s. This is not in the same model as the index.' % f.name)
+
     return len(e.errors)
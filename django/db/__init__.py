@@ -2,11 +2,11 @@ from django.conf import settings
 from django.core import signals
 from django.core.exceptions import ImproperlyConfigured
 from django.db.utils import ConnectionHandler, ConnectionRouter, load_backend, DEFAULT_DB_ALIAS, \
-                            DatabaseError, IntegrityError
+                            DatabaseError, IntegrityError, QueryTimeout
 from django.utils.functional import curry
 
 __all__ = ('backend', 'connection', 'connections', 'router', 'DatabaseError',
-    'IntegrityError', 'DEFAULT_DB_ALIAS')
+    'IntegrityError', 'QueryTimeout', 'DEFAULT_DB_ALIAS')
 
 
 # For backwards compatibility - Port any old database settings over to
@@ -1,8 +1,12 @@
 import decimal
+import sys
 from threading import local
 
 from django.db import DEFAULT_DB_ALIAS
 from django.db.backends import util
+from django.db.backends.metrics import get_metrics
+from django.db.backends.pool import get_pool
+from django.db.backends.sqlcomments import SQLComments
 from django.utils import datetime_safe
 from django.utils.importlib import import_module
 
@@ -11,6 +15,9 @@ class BaseDatabaseWrapper(local):
     Represents a database connection.
     """
     ops = None
+    # The PreparedStatements subclass of the backend, if it supports
+    # server-side prepared statements.
+    prepared_statements_class = None
 
     def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
         # `settings_dict` should be a dictionary containing keys such as
@@ -20,6 +27,35 @@ class BaseDatabaseWrapper(local):
         self.queries = []
         self.settings_dict = settings_dict
         self.alias = alias
+        # Counts the rollbacks (including rollbacks to a savepoint and
+        # closing the connection with uncommitted changes) done through this
+        # wrapper, so that callers can tell whether something they wrote
+        # earlier in the transaction may have been undone.
+        self.rollback_count = 0
+        # The pool shared by the connections to this database, if pooling
+        # is enabled, and the time the current connection was opened if it
+        # was checked out of the pool.
+        self.pool = get_pool(alias, settings_dict)
+        self.pool_connection_opened = None
+        # The statements prepared on the current connection, if enabled by
+        # the PREPARED_STATEMENTS setting.
+        self.prepared_statements = None
+        options = settings_dict.get('PREPARED_STATEMENTS')
+        if options is not None and self.prepared_statements_class is not None:
+            self.prepared_statements = self.prepared_statements_class(options)
+        # Builds the comments added to ORM queries, if enabled by the
+        # SQL_COMMENTS setting.
+        self.sql_comments = None
+        options = settings_dict.get('SQL_COMMENTS')
+        if options is not None:
+            self.sql_comments = SQLComments(options)
+        # How many seconds ORM queries may run for when they don't set a
+        # timeout of their own (see QuerySet.timeout()), from the
+        # 'query_timeout' option; None for no limit.
+        self.query_timeout = settings_dict.get('OPTIONS', {}).get('query_timeout')
+        # The counters of queries, transactions and connections of this
+        # database, shared by all threads (see django.db.backends.metrics).
+        self.metrics = get_metrics(alias)
 
     def __eq__(self, other):
         return self.settings_dict == other.settings_dict
@@ -29,10 +65,13 @@ class BaseDatabaseWrapper(local):
 
     def _commit(self):
         if self.connection is not None:
+            self.metrics.count('commits')
             return self.connection.commit()
 
     def _rollback(self):
         if self.connection is not None:
+            self.rollback_count += 1
+            self.metrics.count('rollbacks')
             return self.connection.rollback()
 
     def _enter_transaction_management(self, managed):
@@ -53,26 +92,94 @@ class BaseDatabaseWrapper(local):
     def _savepoint(self, sid):
         if not self.features.uses_savepoints:
             return
+        self.metrics.count('savepoints')
         self.cursor().execute(self.ops.savepoint_create_sql(sid))
 
     def _savepoint_rollback(self, sid):
         if not self.features.uses_savepoints:
             return
+        self.rollback_count += 1
+        self.metrics.count('savepoint_rollbacks')
         self.cursor().execute(self.ops.savepoint_rollback_sql(sid))
 
     def _savepoint_commit(self, sid):
         if not self.features.uses_savepoints:
             return
+        self.metrics.count('savepoint_commits')
         self.cursor().execute(self.ops.savepoint_commit_sql(sid))
 
     def close(self):
         if self.connection is not None:
-            self.connection.close()
-            self.connection = None
+            from django.db import transaction
+            if transaction.is_dirty(using=self.alias):
+                # Closing the connection rolls back the uncommitted changes.
+                self.rollback_count += 1
+            if self.pool_connection_opened is not None:
+                if self.prepared_statements is not None:
+                    self._deallocate_prepared_statements()
+                # Hand the connection back to the pool instead.
+                self.pool.checkin(self)
+            else:
+                self.connection.close()
+                self.connection = None
+
+    def _deallocate_prepared_statements(self):
+        """
+        Deallocates the prepared statements of a connection that stays open
+        in the pool.
+        """
+        try:
+            self.connection.rollback()
+            self.prepared_statements.deallocate_all(self.connection.cursor())
+        except Exception:
+            # The pool checks whether the connection still works.
+            self.prepared_statements.reset()
+
+    def uses_pool(self):
+        """
+        Returns True if connections are taken from and returned to a pool.
+        """
+        return self.pool is not None
+
+    def can_connect_from_threads(self):
+        """
+        Returns True if a connection opened by another thread reaches the
+        same database as this one.
+        """
+        return True
+
+    def is_usable(self):
+        """
+        Returns True if the current connection still works. Used to check
+        pooled connections that have been idle for a while before they are
+        reused, so it should be as cheap as possible.
+        """
+        try:
+            self.connection.cursor().execute('SELECT 1')
+        except Exception:
+            return False
+        return True
 
     def cursor(self):
         from django.conf import settings
-        cursor = self._cursor()
+        if self.connection is None and self.uses_pool():
+            self.pool.checkout(self)
+        opening = self.connection is None
+        try:
+            cursor = self._cursor()
+        except Exception:
+            exc_info = sys.exc_info()
+            if self.connection is None:
+                if self.pool_connection_opened is not None:
+                    # The connection couldn't be opened; free its pool slot.
+                    self.pool_connection_opened = None
+                    self.pool.discard()
+                from django.db.backends.signals import connection_failed
+                connection_failed.send(sender=self.__class__, alias=self.alias,
+                        exception=exc_info[1])
+            raise exc_info[0], exc_info[1], exc_info[2]
+        if opening:
+            self.metrics.count('connections_opened')
         if settings.DEBUG:
             return self.make_debug_cursor(cursor)
         return cursor
@@ -92,9 +199,32 @@ class BaseDatabaseFeatures(object):
     can_return_id_from_insert = False
     uses_autocommit = False
     uses_savepoints = False
+    # True if an INSERT can write several rows with a single
+    # "VALUES (...), (...)" statement.
+    has_bulk_insert = False
+    # True if blocks of primary key values are reserved from a native
+    # sequence, which isn't affected by transaction rollbacks, rather than
+    # from a table (see BaseDatabaseOperations.reserve_key_block()).
+    has_native_key_sequences = False
     # If True, don't use integer foreign keys referring to, e.g., positive
     # integer primary keys.
     related_fields_match_type = False
+    # The most parameters a single query can have, or None if there's no
+    # limit.
+    max_query_params = None
+    # How many primary key values the batched delete and update helpers put
+    # in a single query.
+    preferred_batch_size = 100
+    # True if the DB-API cursor has a copy_expert() method that runs COPY
+    # (see django.db.models.transfer).
+    has_copy = False
+    # True if CREATE INDEX takes a WHERE clause, and expressions rather than
+    # just columns (see Meta.indexes).
+    supports_partial_indexes = False
+    supports_expression_indexes = False
+    # True if queries can be cancelled once they run past a timeout (see
+    # BaseDatabaseOperations.start_query_timeout()).
+    supports_query_timeouts = False
 
 class BaseDatabaseOperations(object):
     """
@@ -103,6 +233,9 @@ class BaseDatabaseOperations(object):
     row.
     """
     compiler_module = "django.db.models.sql.compiler"
+    # "in" lookups with more values than this are compiled by
+    # large_in_lookup_sql(), if the backend provides it.
+    large_in_list_threshold = 100
 
     def __init__(self):
         self._cache = {}
@@ -193,6 +326,45 @@ class BaseDatabaseOperations(object):
         """
         raise NotImplementedError('Full-text search is not implemented for this database backend')
 
+    def search_lookup_sql(self, field_sql, params, field=None, table_alias=None):
+        """
+        Returns the SQL and params of a "search" lookup of field_sql, the
+        column of field in the table aliased as table_alias (both None for
+        lookups on something other than a model field). By default, uses
+        fulltext_search_sql().
+        """
+        return self.fulltext_search_sql(field_sql), params
+
+    def search_rank_sql(self, field_sql, query, field, table_alias):
+        """
+        Returns the SQL and params of an expression giving the relevance of
+        a row matched by a "search" lookup of field_sql for query; the
+        higher, the better.
+        """
+        raise NotImplementedError('Full-text search ranking is not implemented for this database backend')
+
+    def start_query_timeout(self, connection, sql, timeout):
+        """
+        Arranges for the query sql, about to run on connection, to be
+        cancelled if it runs for longer than timeout seconds, and returns the
+        SQL to run. By default, queries run without a limit.
+        """
+        return sql
+
+    def end_query_timeout(self, connection, failed):
+        """
+        Lifts the limit set by start_query_timeout() once the query has run,
+        or failed if failed is True.
+        """
+        pass
+
+    def is_query_timeout(self, exception):
+        """
+        Returns True if the DatabaseError exception was raised because a
+        query ran past the limit set by start_query_timeout().
+        """
+        return False
+
     def last_executed_query(self, cursor, sql, params):
         """
         Returns a string of the query last executed by the given cursor, with
@@ -269,6 +441,107 @@ class BaseDatabaseOperations(object):
         """
         pass
 
+    def max_in_list_size(self):
+        """
+        Returns the maximum number of values in a single "IN (...)" list, or
+        None if there is no limit.
+        """
+        return None
+
+    def in_lookup_sql(self, field_sql, params, db_type=None):
+        """
+        Returns the SQL and params of an "in" lookup of field_sql, a column
+        of the given db_type (None if it isn't known), against the given
+        values. Lists of more than large_in_list_threshold values are
+        passed to large_in_lookup_sql() first; otherwise (or if it returns
+        None) the values get a placeholder each, split into OR-ed IN lists if
+        there are more than max_in_list_size().
+        """
+        if len(params) > self.large_in_list_threshold:
+            result = self.large_in_lookup_sql(field_sql, params, db_type)
+            if result is not None:
+                return result
+        max_size = self.max_in_list_size()
+        if max_size is None or len(params) <= max_size:
+            return ('%s IN (%s)' % (field_sql, ', '.join(['%s'] * len(params))),
+                    params)
+        clauses = []
+        for offset in range(0, len(params), max_size):
+            size = len(params[offset:offset + max_size])
+            clauses.append('%s IN (%s)' % (field_sql, ', '.join(['%s'] * size)))
+        return '(%s)' % ' OR '.join(clauses), params
+
+    def large_in_lookup_sql(self, field_sql, params, db_type=None):
+        """
+        Returns the SQL and params of an "in" lookup with a long list of
+        values, which doesn't need a placeholder per value, or None if the
+        backend has no such form for these values.
+        """
+        return None
+
+    def key_block_sql(self, style, sequence_name, block_size):
+        """
+        Returns a list of the SQL statements that create whatever is needed
+        to reserve blocks of block_size primary key values for the named
+        sequence.
+
+        This SQL is executed when a table with a HiLoField is created. The
+        default implementation keeps the next free value of every sequence in
+        a shared table.
+        """
+        qn = self.quote_name
+        return ['%s %s (%s %s %s, %s %s %s);' % (
+            style.SQL_KEYWORD('CREATE TABLE IF NOT EXISTS'),
+            style.SQL_TABLE(qn('django_key_blocks')),
+            style.SQL_FIELD(qn('name')),
+            style.SQL_COLTYPE('varchar(100)'),
+            style.SQL_KEYWORD('NOT NULL PRIMARY KEY'),
+            style.SQL_FIELD(qn('next_value')),
+            style.SQL_COLTYPE('bigint'),
+            style.SQL_KEYWORD('NOT NULL'),
+        )]
+
+    def drop_key_block_sql(self, style, sequence_name):
+        """
+        Returns a list of the SQL statements that remove the named sequence
+        created by key_block_sql().
+        """
+        return ['%s %s %s %s = \'%s\';' % (
+            style.SQL_KEYWORD('DELETE FROM'),
+            style.SQL_TABLE(self.quote_name('django_key_blocks')),
+            style.SQL_KEYWORD('WHERE'),
+            style.SQL_FIELD(self.quote_name('name')),
+            util.truncate_name(sequence_name, 100),
+        )]
+
+    def reserve_key_block(self, cursor, sequence_name, block_size):
+        """
+        Reserves the next block of block_size primary key values of the named
+        sequence, using the given cursor, and returns the first value of the
+        block.
+
+        Unless the backend has native key sequences, the reservation is part
+        of the current transaction.
+        """
+        from django.db.utils import IntegrityError
+        table = self.quote_name('django_key_blocks')
+        name = util.truncate_name(sequence_name, 100)
+        cursor.execute('UPDATE %s SET %s = %s + %%s WHERE %s = %%s' % (
+                table, self.quote_name('next_value'), self.quote_name('next_value'),
+                self.quote_name('name')), [block_size, name])
+        if not cursor.rowcount:
+            try:
+                cursor.execute('INSERT INTO %s (%s, %s) VALUES (%%s, %%s)' % (
+                        table, self.quote_name('name'), self.quote_name('next_value')),
+                        [name, 1 + block_size])
+                return 1
+            except IntegrityError:
+                # Another connection started the sequence first.
+                return self.reserve_key_block(cursor, sequence_name, block_size)
+        cursor.execute('SELECT %s FROM %s WHERE %s = %%s' % (
+                self.quote_name('next_value'), table, self.quote_name('name')), [name])
+        return cursor.fetchone()[0] - block_size
+
     def compiler(self, compiler_name):
         """
         Returns the SQLCompiler class corresponding to the given name,
@@ -486,6 +759,14 @@ class BaseDatabaseIntrospection(object):
         """
         return name
 
+    def get_index_columns(self, cursor, table_name):
+        """
+        Returns a list with the columns, in order, of each index on the given
+        table, the primary key included. The columns of an index stop at its
+        first expression, and partial indexes are left out.
+        """
+        raise NotImplementedError
+
     def table_names(self):
         "Returns a list of names of all tables that exist in the database."
         cursor = self.connection.cursor()
@@ -572,3 +853,16 @@ class BaseDatabaseValidation(object):
     def validate_field(self, errors, opts, f):
         "By default, there is no backend-specific validation"
         pass
+
+    def validate_index(self, errors, opts, index):
+        """
+        Rejects unique indexes in Meta.indexes that the database can't
+        create, since leaving them out would drop the constraint.
+        """
+        if not index.unique:
+            return
+        features = self.connection.features
+        if index.where and not features.supports_partial_indexes:
+            errors.add(opts, '"indexes" has a unique partial index on %s, which this database can\'t create.' % ', '.join(index.fields))
+        elif index.has_expressions() and not features.supports_expression_indexes:
+            errors.add(opts, '"indexes" has a unique expression index on %s, which this database can\'t create.' % ', '.join(index.fields))
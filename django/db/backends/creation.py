@@ -97,6 +97,12 @@ class BaseDatabaseCreation(object):
                 for stmt in autoinc_sql:
                     final_output.append(stmt)
 
+        key_allocator = getattr(opts.pk, 'key_allocator', None)
+        if key_allocator is not None:
+            # Add the SQL needed to reserve blocks of primary key values.
+            final_output.extend(self.connection.ops.key_block_sql(style,
+                    key_allocator.sequence_name, key_allocator.block_size))
+
         return final_output, pending_references
 
     def sql_for_inline_foreign_key_references(self, field, known_models, style):
@@ -259,6 +265,8 @@ class BaseDatabaseCreation(object):
         output = []
         for f in model._meta.local_fields:
             output.extend(self.sql_indexes_for_field(model, f, style))
+        for index in model._meta.indexes:
+            output.extend(self.sql_indexes_for_index(model, index, style))
         return output
 
     def sql_indexes_for_field(self, model, f, style):
@@ -284,6 +292,93 @@ class BaseDatabaseCreation(object):
             output = []
         return output
 
+    def sql_indexes_for_index(self, model, index, style):
+        """
+        Return the CREATE INDEX SQL statements for an Index in Meta.indexes.
+        Partial and expression indexes are left out, with a warning, on
+        databases that don't support them.
+        """
+        from django.db.models.indexes import ColumnReferences, SearchIndex
+        if isinstance(index, SearchIndex):
+            return self.sql_search_index(model, index, style)
+        features = self.connection.features
+        if index.where and not features.supports_partial_indexes:
+            unsupported = 'partial'
+        elif index.has_expressions() and not features.supports_expression_indexes:
+            unsupported = 'expression'
+        else:
+            unsupported = None
+        if unsupported:
+            import warnings
+            warnings.warn("%s.%s: the %s index %s isn't created, since the "
+                "'%s' database doesn't support %s indexes." % (
+                model._meta.app_label, model._meta.object_name, unsupported,
+                self.index_name(model, index), self.connection.alias, unsupported),
+                RuntimeWarning)
+            return []
+        qn = self.connection.ops.quote_name
+        opts = model._meta
+        references = ColumnReferences(model, qn)
+        columns = []
+        for part, is_expression, descending in index.parts():
+            if is_expression:
+                column = '(%s)' % (part % references)
+            else:
+                column = style.SQL_FIELD(qn(opts.get_field(part).column))
+            if descending:
+                column += ' DESC'
+            columns.append(column)
+        if opts.db_tablespace:
+            sql = self.connection.ops.tablespace_sql(opts.db_tablespace)
+            if sql:
+                tablespace_sql = ' ' + sql
+            else:
+                tablespace_sql = ''
+        else:
+            tablespace_sql = ''
+        if index.where:
+            where_sql = ' %s %s' % (style.SQL_KEYWORD('WHERE'), index.where % references)
+        else:
+            where_sql = ''
+        if index.unique:
+            keyword = 'CREATE UNIQUE INDEX'
+        else:
+            keyword = 'CREATE INDEX'
+        return [style.SQL_KEYWORD(keyword) + ' ' +
+            style.SQL_TABLE(qn(self.index_name(model, index))) + ' ' +
+            style.SQL_KEYWORD('ON') + ' ' +
+            style.SQL_TABLE(qn(opts.db_table)) + ' ' +
+            "(%s)" % ', '.join(columns) +
+            "%s%s;" % (tablespace_sql, where_sql)]
+
+    def index_name(self, model, index):
+        "Returns the name of an Index in Meta.indexes (see Index.get_name())"
+        return index.get_name(model, self.connection.ops.max_name_length())
+
+    def sql_search_index(self, model, index, style):
+        """
+        Returns the SQL statements that create a SearchIndex in Meta.indexes,
+        for databases that have full-text indexes. By default, there are
+        none.
+        """
+        return []
+
+    def search_index_names(self, model, index):
+        """
+        Returns a (field, index name) pair for each field of a SearchIndex,
+        for backends that index the fields separately.
+        """
+        from django.db.backends.util import truncate_name
+        name = self.index_name(model, index)
+        if len(index.fields) == 1:
+            return [(model._meta.get_field(index.fields[0]), name)]
+        result = []
+        for field_name in index.fields:
+            field = model._meta.get_field(field_name)
+            result.append((field, truncate_name('%s_%s' % (name, field.column),
+                                                self.connection.ops.max_name_length())))
+        return result
+
     def sql_destroy_model(self, model, references_to_delete, style):
         "Return the DROP TABLE and restraint dropping statements for a single model"
         if not model._meta.managed or model._meta.proxy:
@@ -299,6 +394,10 @@ class BaseDatabaseCreation(object):
             ds = self.connection.ops.drop_sequence_sql(model._meta.db_table)
             if ds:
                 output.append(ds)
+        key_allocator = getattr(model._meta.pk, 'key_allocator', None)
+        if key_allocator is not None:
+            output.extend(self.connection.ops.drop_key_block_sql(style,
+                    key_allocator.sequence_name))
         return output
 
     def sql_remove_table_constraints(self, model, references_to_delete, style):
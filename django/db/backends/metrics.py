@@ -0,0 +1,233 @@
+"""
+Counters of the work done on each database, shared by all the threads of a
+process, for monitoring without DEBUG:
+
+    >>> from django.db import connections
+    >>> connections.metrics()['default']['queries']
+    {'select': 1520, 'insert': 31, 'update': 12, 'delete': 2}
+
+Queries are counted, and their latency recorded, by statement type in a
+histogram with fixed buckets, so the storage used doesn't grow with the
+number of queries. Only queries run by the ORM's compilers are timed; SQL run
+directly on a cursor isn't. The latency of a query that returns several rows
+is the time taken to run it, not to fetch its rows.
+
+format_prometheus() returns the metrics of all databases in the Prometheus
+text exposition format, and write_prometheus() writes them to a file for the
+node exporter's textfile collector.
+"""
+
+import bisect
+import os
+import tempfile
+import threading
+
+STATEMENT_TYPES = ('select', 'insert', 'update', 'delete')
+
+# The upper bounds, in seconds, of the buckets of the latency histograms.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+COUNTERS = (
+    # Rows fetched by ORM queries.
+    'rows_fetched',
+    # Transactions committed and rolled back.
+    'commits',
+    'rollbacks',
+    # Savepoints created, rolled back to and released.
+    'savepoints',
+    'savepoint_rollbacks',
+    'savepoint_commits',
+    # Connections opened to the database, by a thread or by the pool.
+    'connections_opened',
+)
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def get_metrics(alias):
+    """
+    Returns the ConnectionMetrics of the database with the given alias.
+    """
+    _metrics_lock.acquire()
+    try:
+        metrics = _metrics.get(alias)
+        if metrics is None:
+            metrics = _metrics[alias] = ConnectionMetrics(alias)
+        return metrics
+    finally:
+        _metrics_lock.release()
+
+def all_metrics():
+    """
+    Returns a dictionary mapping database aliases to their ConnectionMetrics.
+    """
+    _metrics_lock.acquire()
+    try:
+        return dict(_metrics)
+    finally:
+        _metrics_lock.release()
+
+class ConnectionMetrics(object):
+    """
+    The counters of one database, updated by all the DatabaseWrapper
+    instances for its alias.
+    """
+    def __init__(self, alias):
+        self.alias = alias
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Sets all the counters back to zero.
+        """
+        self.lock.acquire()
+        try:
+            self.counters = dict.fromkeys(COUNTERS, 0)
+            self.queries = dict.fromkeys(STATEMENT_TYPES, 0)
+            self.errors = dict.fromkeys(STATEMENT_TYPES, 0)
+            self.seconds = dict.fromkeys(STATEMENT_TYPES, 0.0)
+            # The number of queries in each bucket, the last one being for
+            # queries slower than the largest bound.
+            self.buckets = dict([(t, [0] * (len(LATENCY_BUCKETS) + 1))
+                                 for t in STATEMENT_TYPES])
+        finally:
+            self.lock.release()
+
+    def count(self, counter, value=1):
+        self.lock.acquire()
+        try:
+            self.counters[counter] += value
+        finally:
+            self.lock.release()
+
+    def query(self, statement_type, seconds, failed=False):
+        """
+        Records a query of the given type that ran for the given number of
+        seconds, and raised an error if failed is True.
+        """
+        self.lock.acquire()
+        try:
+            self.queries[statement_type] += 1
+            if failed:
+                self.errors[statement_type] += 1
+            self.seconds[statement_type] += seconds
+            self.buckets[statement_type][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        finally:
+            self.lock.release()
+
+    def snapshot(self):
+        """
+        Returns a dictionary of the current values of the counters, plus:
+
+            * 'queries' and 'errors': dictionaries mapping each statement
+              type to the number of queries run and of those that failed.
+            * 'latency': a dictionary mapping each statement type to a
+              dictionary with the total 'seconds' its queries ran for, and
+              'buckets', a list of (upper bound, number of queries that ran
+              for at most that long) pairs, the last bound being None.
+        """
+        self.lock.acquire()
+        try:
+            snapshot = dict(self.counters)
+            snapshot['queries'] = dict(self.queries)
+            snapshot['errors'] = dict(self.errors)
+            latency = {}
+            for statement_type in STATEMENT_TYPES:
+                buckets, total = [], 0
+                for bound, count in zip(LATENCY_BUCKETS + (None,), self.buckets[statement_type]):
+                    total += count
+                    buckets.append((bound, total))
+                latency[statement_type] = {
+                    'seconds': self.seconds[statement_type],
+                    'buckets': buckets,
+                }
+            snapshot['latency'] = latency
+            return snapshot
+        finally:
+            self.lock.release()
+
+def _labels(**labels):
+    items = labels.items()
+    items.sort()
+    return '{%s}' % ','.join(['%s="%s"' % (name, str(value).replace('\\', '\\\\')
+                                           .replace('"', '\\"').replace('\n', '\\n'))
+                              for name, value in items])
+
+def _format_bound(bound):
+    if bound is None:
+        return '+Inf'
+    return repr(bound)
+
+def format_prometheus(snapshots=None):
+    """
+    Returns the metrics in snapshots, a dictionary mapping database aliases
+    to ConnectionMetrics.snapshot() results (by default, those of all the
+    databases used so far), in the Prometheus text exposition format.
+    """
+    if snapshots is None:
+        snapshots = dict([(alias, metrics.snapshot())
+                          for alias, metrics in all_metrics().items()])
+    aliases = snapshots.keys()
+    aliases.sort()
+    lines = []
+    def family(name, kind, help):
+        lines.append('# HELP %s %s' % (name, help))
+        lines.append('# TYPE %s %s' % (name, kind))
+
+    family('django_db_queries_total', 'counter', 'Queries run by the ORM.')
+    for alias in aliases:
+        for statement_type in STATEMENT_TYPES:
+            lines.append('django_db_queries_total%s %d' % (
+                _labels(database=alias, type=statement_type),
+                snapshots[alias]['queries'][statement_type]))
+    family('django_db_query_errors_total', 'counter', 'Queries run by the ORM that raised an error.')
+    for alias in aliases:
+        for statement_type in STATEMENT_TYPES:
+            lines.append('django_db_query_errors_total%s %d' % (
+                _labels(database=alias, type=statement_type),
+                snapshots[alias]['errors'][statement_type]))
+    family('django_db_query_duration_seconds', 'histogram', 'Time taken to run queries.')
+    for alias in aliases:
+        for statement_type in STATEMENT_TYPES:
+            latency = snapshots[alias]['latency'][statement_type]
+            for bound, count in latency['buckets']:
+                lines.append('django_db_query_duration_seconds_bucket%s %d' % (
+                    _labels(database=alias, type=statement_type, le=_format_bound(bound)), count))
+            labels = _labels(database=alias, type=statement_type)
+            lines.append('django_db_query_duration_seconds_sum%s %r' % (labels, latency['seconds']))
+            lines.append('django_db_query_duration_seconds_count%s %d' % (
+                labels, latency['buckets'][-1][1]))
+    for counter, help in (
+            ('rows_fetched', 'Rows fetched by ORM queries.'),
+            ('commits', 'Transactions committed.'),
+            ('rollbacks', 'Transactions rolled back.'),
+            ('savepoints', 'Savepoints created.'),
+            ('savepoint_rollbacks', 'Rollbacks to a savepoint.'),
+            ('savepoint_commits', 'Savepoints released.'),
+            ('connections_opened', 'Connections opened to the database.')):
+        name = 'django_db_%s_total' % counter
+        family(name, 'counter', help)
+        for alias in aliases:
+            lines.append('%s%s %d' % (name, _labels(database=alias), snapshots[alias][counter]))
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path, snapshots=None):
+    """
+    Writes format_prometheus(snapshots) to the file at path. The file is
+    replaced at once, so that a collector never reads it half-written.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics')
+    try:
+        fileobj = os.fdopen(fd, 'w')
+        try:
+            fileobj.write(format_prometheus(snapshots))
+        finally:
+            fileobj.close()
+        os.chmod(temp_path, 0644)
+        os.rename(temp_path, path)
+    except:
+        os.remove(temp_path)
+        raise
@@ -6,6 +6,8 @@ Requires MySQLdb: http://sourceforge.net/projects/mysql-python
 
 import re
 import sys
+import threading
+import time
 
 try:
     import MySQLdb as Database
@@ -68,6 +70,24 @@ server_version_re = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{1,2})')
 # standard util.CursorDebugWrapper can be used. Also, using sql_mode
 # TRADITIONAL will automatically cause most warnings to be treated as errors.
 
+# Error codes meaning that the connection to the server was lost
+# (CR_SERVER_GONE_ERROR and CR_SERVER_LOST).
+codes_for_lost_connection = (2006, 2013)
+
+# Counters of the connection checks, per database alias, shared by all
+# threads; see DatabaseWrapper.liveness_stats().
+_liveness_counters = {}
+_liveness_lock = threading.Lock()
+
+def _count(alias, counter):
+    _liveness_lock.acquire()
+    try:
+        counters = _liveness_counters.setdefault(alias,
+                {'pings': 0, 'failed_pings': 0, 'reconnects': 0, 'retries': 0})
+        counters[counter] += 1
+    finally:
+        _liveness_lock.release()
+
 class CursorWrapper(object):
     """
     A thin wrapper around MySQLdb's normal cursor class so that we can catch
@@ -75,15 +95,27 @@ class CursorWrapper(object):
 
     Implemented as a wrapper, rather than a subclass, so that we aren't stuck
     to the particular underlying representation returned by Connection.cursor().
+
+    If the connection turns out to be lost when a read-only query is run
+    outside of a transaction with pending changes, the wrapper reconnects and
+    runs the query once more.
     """
     codes_for_integrityerror = (1048,)
 
-    def __init__(self, cursor):
+    def __init__(self, cursor, db=None):
         self.cursor = cursor
+        self.db = db
 
     def execute(self, query, args=None):
         try:
-            return self.cursor.execute(query, args)
+            try:
+                return self.cursor.execute(query, args)
+            except Database.OperationalError, e:
+                if e[0] not in codes_for_lost_connection or not self._can_retry(query):
+                    raise
+                self.cursor = self.db._reconnect()
+                _count(self.db.alias, 'retries')
+                return self.cursor.execute(query, args)
         except Database.IntegrityError, e:
             raise utils.IntegrityError, utils.IntegrityError(*tuple(e)), sys.exc_info()[2]
         except Database.OperationalError, e:
@@ -109,6 +141,18 @@ class CursorWrapper(object):
         except Database.DatabaseError, e:
             raise utils.DatabaseError, utils.DatabaseError(*tuple(e)), sys.exc_info()[2]
 
+    def _can_retry(self, query):
+        """
+        Returns True if query can safely be run again on a new connection:
+        it only reads, and no changes of the current transaction would be
+        lost with the old connection.
+        """
+        from django.db import transaction
+        if self.db is None or transaction.is_dirty(using=self.db.alias):
+            return False
+        query = query.lstrip().upper()
+        return query.startswith('SELECT') and 'FOR UPDATE' not in query
+
     def __getattr__(self, attr):
         if attr in self.__dict__:
             return self.__dict__[attr]
@@ -123,8 +167,13 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     update_can_self_select = False
     allows_group_by_pk = True
     related_fields_match_type = True
+    has_bulk_insert = True
+    preferred_batch_size = 1000
+    supports_query_timeouts = True
 
 class DatabaseOperations(BaseDatabaseOperations):
+    select_re = re.compile(r'^\s*SELECT\b', re.IGNORECASE)
+
     def date_extract_sql(self, lookup_type, field_name):
         # http://dev.mysql.com/doc/mysql/en/date-and-time-functions.html
         if lookup_type == 'week_day':
@@ -161,6 +210,22 @@ class DatabaseOperations(BaseDatabaseOperations):
     def fulltext_search_sql(self, field_name):
         return 'MATCH (%s) AGAINST (%%s IN BOOLEAN MODE)' % field_name
 
+    def search_rank_sql(self, field_sql, query, field, table_alias):
+        return self.fulltext_search_sql(field_sql), [query]
+
+    def start_query_timeout(self, connection, sql, timeout):
+        # An optimizer hint, which MySQL 5.7.8 and later honour for SELECT
+        # statements only.
+        match = self.select_re.match(sql)
+        if match is None:
+            return sql
+        return '%s /*+ MAX_EXECUTION_TIME(%d) */%s' % (
+            sql[:match.end()], max(1, int(timeout * 1000)), sql[match.end():])
+
+    def is_query_timeout(self, exception):
+        # ER_QUERY_TIMEOUT
+        return bool(exception.args) and exception.args[0] == 3024
+
     def no_limit_value(self):
         # 2**64 - 1, as recommended by the MySQL documentation
         return 18446744073709551615L
@@ -253,17 +318,65 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.creation = DatabaseCreation(self)
         self.introspection = DatabaseIntrospection(self)
         self.validation = DatabaseValidation(self)
+        # When the connection was last known to work.
+        self.last_used = None
 
     def _valid_connection(self):
+        """
+        Returns True if the connection can be used. A connection that was
+        used less than 'ping_interval' seconds ago (see the OPTIONS setting;
+        30 by default) is assumed to still work; otherwise the server is
+        pinged first.
+        """
         if self.connection is not None:
+            if (self.last_used is not None and
+                    time.time() - self.last_used < self.settings_dict['OPTIONS'].get('ping_interval', 30)):
+                return True
+            _count(self.alias, 'pings')
             try:
                 self.connection.ping()
                 return True
             except DatabaseError:
+                _count(self.alias, 'failed_pings')
                 self.connection.close()
                 self.connection = None
         return False
 
+    def _reconnect(self):
+        """
+        Replaces a connection that was found to be lost, and returns a raw
+        cursor on the new one.
+        """
+        try:
+            self.connection.close()
+        except Database.Error:
+            pass
+        self.connection = None
+        _count(self.alias, 'reconnects')
+        return self._cursor().cursor
+
+    def liveness_stats(self):
+        """
+        Returns the counters of pings, failed pings, reconnections and
+        queries retried after a reconnection for this database, across all
+        threads.
+        """
+        _liveness_lock.acquire()
+        try:
+            return dict(_liveness_counters.get(self.alias,
+                    {'pings': 0, 'failed_pings': 0, 'reconnects': 0, 'retries': 0}))
+        finally:
+            _liveness_lock.release()
+
+    def is_usable(self):
+        _count(self.alias, 'pings')
+        try:
+            self.connection.ping()
+        except Database.Error:
+            _count(self.alias, 'failed_pings')
+            return False
+        return True
+
     def _cursor(self):
         if not self._valid_connection():
             kwargs = {
@@ -288,11 +401,16 @@ class DatabaseWrapper(BaseDatabaseWrapper):
             # "UPDATE", not the number of changed rows.
             kwargs['client_flag'] = CLIENT.FOUND_ROWS
             kwargs.update(settings_dict['OPTIONS'])
+            # Not options of MySQLdb; see _valid_connection() and
+            # QuerySet.timeout().
+            kwargs.pop('ping_interval', None)
+            kwargs.pop('query_timeout', None)
             self.connection = Database.connect(**kwargs)
             self.connection.encoders[SafeUnicode] = self.connection.encoders[unicode]
             self.connection.encoders[SafeString] = self.connection.encoders[str]
             connection_created.send(sender=self.__class__)
-        cursor = CursorWrapper(self.connection.cursor())
+        self.last_used = time.time()
+        cursor = CursorWrapper(self.connection.cursor(), self)
         return cursor
 
     def _rollback(self):
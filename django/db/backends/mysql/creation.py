@@ -63,3 +63,15 @@ class DatabaseCreation(BaseDatabaseCreation):
                 field.rel.to._meta.db_table, field.rel.to._meta.pk.column)
             ]
         return table_output, deferred
+
+    def sql_search_index(self, model, index, style):
+        "Returns a FULLTEXT index on each field of a SearchIndex"
+        qn = self.connection.ops.quote_name
+        output = []
+        for field, name in self.search_index_names(model, index):
+            output.append(style.SQL_KEYWORD('CREATE FULLTEXT INDEX') + ' ' +
+                style.SQL_TABLE(qn(name)) + ' ' +
+                style.SQL_KEYWORD('ON') + ' ' +
+                style.SQL_TABLE(qn(model._meta.db_table)) + ' ' +
+                "(%s);" % style.SQL_FIELD(qn(field.column)))
+        return output
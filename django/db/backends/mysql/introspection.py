@@ -96,3 +96,22 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
             indexes[row[4]] = {'primary_key': (row[2] == 'PRIMARY'), 'unique': not bool(row[1])}
         return indexes
 
+    def get_index_columns(self, cursor, table_name):
+        cursor.execute("SHOW INDEX FROM %s" % self.connection.ops.quote_name(table_name))
+        # Table, Non_unique, Key_name, Seq_in_index, Column_name (None for an
+        # expression), ...
+        indexes = {}
+        for row in cursor.fetchall():
+            indexes.setdefault(row[2], []).append((row[3], row[4]))
+        result = []
+        for parts in indexes.values():
+            parts.sort()
+            columns = []
+            for seq, name in parts:
+                if name is None:
+                    break
+                columns.append(name)
+            if columns:
+                result.append(columns)
+        return result
+
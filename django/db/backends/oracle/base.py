@@ -29,6 +29,7 @@ except ImportError, e:
 from django.db import utils
 from django.db.backends import *
 from django.db.backends.signals import connection_created
+from django.db.backends.sqlcomments import split_comment
 from django.db.backends.oracle.client import DatabaseClient
 from django.db.backends.oracle.creation import DatabaseCreation
 from django.db.backends.oracle.introspection import DatabaseIntrospection
@@ -52,6 +53,11 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     interprets_empty_strings_as_nulls = True
     uses_savepoints = True
     can_return_id_from_insert = True
+    has_native_key_sequences = True
+    # As many values as fit in a single IN list.
+    preferred_batch_size = 1000
+    # Function-based indexes.
+    supports_expression_indexes = True
 
 
 class DatabaseOperations(BaseDatabaseOperations):
@@ -161,6 +167,22 @@ WHEN (new.%(col_name)s IS NULL)
     def drop_sequence_sql(self, table):
         return "DROP SEQUENCE %s;" % self.quote_name(get_sequence_name(table))
 
+    def key_block_sql(self, style, sequence_name, block_size):
+        return ['%s %s %s %s;' % (
+            style.SQL_KEYWORD('CREATE SEQUENCE'),
+            style.SQL_TABLE(self.quote_name(sequence_name)),
+            style.SQL_KEYWORD('INCREMENT BY'),
+            style.SQL_FIELD(str(block_size)),
+        )]
+
+    def drop_key_block_sql(self, style, sequence_name):
+        return ['%s %s;' % (style.SQL_KEYWORD('DROP SEQUENCE'),
+                style.SQL_TABLE(self.quote_name(sequence_name)))]
+
+    def reserve_key_block(self, cursor, sequence_name, block_size):
+        cursor.execute('SELECT %s.nextval FROM dual' % self.quote_name(sequence_name))
+        return cursor.fetchone()[0]
+
     def fetch_returned_insert_id(self, cursor):
         return long(cursor._insert_id_var.getvalue())
 
@@ -183,6 +205,10 @@ WHEN (new.%(col_name)s IS NULL)
     def max_name_length(self):
         return 30
 
+    def max_in_list_size(self):
+        # ORA-01795: maximum number of expressions in a list is 1000.
+        return 1000
+
     def prep_for_iexact_query(self, x):
         return x
 
@@ -339,10 +365,19 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.creation = DatabaseCreation(self)
         self.introspection = DatabaseIntrospection(self)
         self.validation = BaseDatabaseValidation(self)
+        # Queries converted to ":arg" placeholders, shared by the cursors.
+        self.converted_queries = util.StatementCache()
 
     def _valid_connection(self):
         return self.connection is not None
 
+    def is_usable(self):
+        try:
+            self.connection.cursor().execute('SELECT 1 FROM DUAL')
+        except Database.Error:
+            return False
+        return True
+
     def _connect_string(self):
         settings_dict = self.settings_dict
         if len(settings_dict['HOST'].strip()) == 0:
@@ -360,8 +395,11 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         cursor = None
         if not self._valid_connection():
             conn_string = convert_unicode(self._connect_string())
-            self.connection = Database.connect(conn_string, **self.settings_dict['OPTIONS'])
-            cursor = FormatStylePlaceholderCursor(self.connection)
+            options = dict(self.settings_dict['OPTIONS'])
+            # Not an option of cx_Oracle; see QuerySet.timeout().
+            options.pop('query_timeout', None)
+            self.connection = Database.connect(conn_string, **options)
+            cursor = FormatStylePlaceholderCursor(self.connection, self.converted_queries)
             # Set oracle date to ansi date format.  This only needs to execute
             # once when we create a new connection. We also set the Territory
             # to 'AMERICA' which forces Sunday to evaluate to a '1' in TO_CHAR().
@@ -388,7 +426,7 @@ class DatabaseWrapper(BaseDatabaseWrapper):
                 pass
             connection_created.send(sender=self.__class__)
         if not cursor:
-            cursor = FormatStylePlaceholderCursor(self.connection)
+            cursor = FormatStylePlaceholderCursor(self.connection, self.converted_queries)
         return cursor
 
     # Oracle doesn't support savepoint commits.  Ignore them.
@@ -443,11 +481,14 @@ class FormatStylePlaceholderCursor(object):
 
     We also do automatic conversion between Unicode on the Python side and
     UTF-8 -- for talking to Oracle -- in here.
+
+    Converted queries are cached in converted_queries, if given.
     """
     charset = 'utf-8'
 
-    def __init__(self, connection):
+    def __init__(self, connection, converted_queries=None):
         self.cursor = connection.cursor()
+        self.converted_queries = converted_queries
         # Necessary to retrieve decimal values without rounding error.
         self.cursor.numbersAsStrings = True
         # Default arraysize of 1 is highly sub-optimal.
@@ -467,19 +508,37 @@ class FormatStylePlaceholderCursor(object):
     def _param_generator(self, params):
         return [p.smart_str for p in params]
 
+    def _convert_query(self, query, num_params):
+        # Queries are cached without their SQL_COMMENTS comment, which
+        # would make most of them unique.
+        query, comment = split_comment(query)
+        if comment:
+            # Undouble its percent signs.
+            comment = convert_unicode(comment % (), self.charset)
+        if self.converted_queries is not None:
+            key = (query, num_params)
+            converted = self.converted_queries.get(key)
+            if converted is not None:
+                return converted + comment
+        args = [(':arg%d' % i) for i in range(num_params)]
+        # cx_Oracle wants no trailing ';' for SQL statements.  For PL/SQL, it
+        # it does want a trailing ';' but not a trailing '/'.  However, these
+        # characters must be included in the original query in case the query
+        # is being passed to SQL*Plus.
+        converted = query
+        if converted.endswith(';') or converted.endswith('/'):
+            converted = converted[:-1]
+        converted = convert_unicode(converted % tuple(args), self.charset)
+        if self.converted_queries is not None:
+            self.converted_queries.set(key, converted)
+        return converted + comment
+
     def execute(self, query, params=None):
         if params is None:
             params = []
         else:
             params = self._format_params(params)
-        args = [(':arg%d' % i) for i in range(len(params))]
-        # cx_Oracle wants no trailing ';' for SQL statements.  For PL/SQL, it
-        # it does want a trailing ';' but not a trailing '/'.  However, these
-        # characters must be included in the original query in case the query
-        # is being passed to SQL*Plus.
-        if query.endswith(';') or query.endswith('/'):
-            query = query[:-1]
-        query = convert_unicode(query % tuple(args), self.charset)
+        query = self._convert_query(query, len(params))
         self._guess_input_sizes([params])
         try:
             return self.cursor.execute(query, self._param_generator(params))
@@ -493,17 +552,11 @@ class FormatStylePlaceholderCursor(object):
 
     def executemany(self, query, params=None):
         try:
-            args = [(':arg%d' % i) for i in range(len(params[0]))]
+            num_params = len(params[0])
         except (IndexError, TypeError):
             # No params given, nothing to do
             return None
-        # cx_Oracle wants no trailing ';' for SQL statements.  For PL/SQL, it
-        # it does want a trailing ';' but not a trailing '/'.  However, these
-        # characters must be included in the original query in case the query
-        # is being passed to SQL*Plus.
-        if query.endswith(';') or query.endswith('/'):
-            query = query[:-1]
-        query = convert_unicode(query % tuple(args), self.charset)
+        query = self._convert_query(query, num_params)
         formatted = [self._format_params(i) for i in params]
         self._guess_input_sizes(formatted)
         try:
@@ -119,3 +119,17 @@ WHERE  all_tab_cols.column_name = user_cons_columns.column_name (+)
         for row in cursor.fetchall():
             indexes[row[0]] = {'primary_key': row[1], 'unique': row[2]}
         return indexes
+
+    def get_index_columns(self, cursor, table_name):
+        cursor.execute("""
+            SELECT user_ind_columns.index_name, LOWER(user_ind_columns.column_name)
+            FROM user_ind_columns, user_indexes
+            WHERE user_ind_columns.index_name = user_indexes.index_name
+              AND user_indexes.index_type NOT LIKE 'FUNCTION-BASED%%'
+              AND user_ind_columns.table_name = UPPER(%s)
+            ORDER BY user_ind_columns.index_name, user_ind_columns.column_position""",
+            [table_name])
+        indexes = {}
+        for index_name, column in cursor.fetchall():
+            indexes.setdefault(index_name, []).append(column)
+        return indexes.values()
@@ -0,0 +1,279 @@
+"""
+Pools of persistent database connections, shared by all the threads of a
+process.
+
+Pooling is enabled per database with the POOL setting, e.g.:
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'NAME': 'mydb',
+            'POOL': {'MAX_SIZE': 20, 'MAX_AGE': 600},
+        }
+    }
+
+A thread checks a connection out of the pool the first time it needs a
+cursor and checks it back in when it closes the connection -- normally when
+the request finishes -- instead of disconnecting.
+"""
+
+import threading
+import time
+
+from django.db.utils import DatabaseError
+
+POOL_DEFAULTS = {
+    # Connections opened as soon as the pool is first used.
+    'MIN_SIZE': 0,
+    # The maximum number of connections open at once, idle or not.
+    'MAX_SIZE': 10,
+    # Connections older than this many seconds are closed rather than
+    # reused. None means connections are kept indefinitely.
+    'MAX_AGE': None,
+    # How many seconds to wait for a connection when MAX_SIZE connections are
+    # in use, before giving up with a DatabaseError.
+    'TIMEOUT': 30,
+    # Connections that have been idle for more than this many seconds are
+    # checked before they are reused.
+    'CHECK_AFTER': 5,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(alias, settings_dict):
+    """
+    Returns the pool of connections for the database with the given alias,
+    or None if its settings don't ask for one.
+    """
+    options = settings_dict.get('POOL')
+    if options is None:
+        return None
+    _pools_lock.acquire()
+    try:
+        pool = _pools.get(alias)
+        if pool is None or pool.options != options:
+            if pool is not None:
+                pool.clear()
+            pool = _pools[alias] = ConnectionPool(alias, options)
+        return pool
+    finally:
+        _pools_lock.release()
+
+def all_pools():
+    """
+    Returns a dictionary mapping database aliases to their pools.
+    """
+    _pools_lock.acquire()
+    try:
+        return dict(_pools)
+    finally:
+        _pools_lock.release()
+
+def _settings_key(settings_dict):
+    # Connections are only reused for the database they were opened for;
+    # the test runner, for one, switches NAME to the test database.
+    return tuple([settings_dict.get(key) for key in ('NAME', 'USER', 'HOST', 'PORT')])
+
+class ConnectionPool(object):
+    """
+    Keeps open DB-API connections for reuse by DatabaseWrapper instances.
+
+    Connections are handed out most recently used first, so that under a
+    light load the same few connections stay warm.
+    """
+    def __init__(self, alias, options):
+        self.alias = alias
+        self.options = options
+        settings = dict(POOL_DEFAULTS)
+        settings.update(options)
+        self.min_size = settings['MIN_SIZE']
+        self.max_size = settings['MAX_SIZE']
+        self.max_age = settings['MAX_AGE']
+        self.timeout = settings['TIMEOUT']
+        self.check_after = settings['CHECK_AFTER']
+        if self.max_size < 1 or self.min_size > self.max_size:
+            raise ValueError("The POOL settings of database '%s' need 0 <= MIN_SIZE <= MAX_SIZE and MAX_SIZE > 0." % alias)
+        self.lock = threading.Condition()
+        # (connection, opened_at, checked_in_at, settings_key) tuples.
+        self.idle = []
+        # The number of connections open, idle or in use.
+        self.size = 0
+        self.counters = {
+            'checkouts': 0,
+            'reused': 0,
+            'opened': 0,
+            'closed': 0,
+            'failed_checks': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+
+    def checkout(self, wrapper):
+        """
+        Gives wrapper a connection from the pool by setting its 'connection'
+        attribute. If no idle connection can be reused, 'connection' is left
+        as None and a slot is reserved for the connection the wrapper opens
+        itself; the slot is freed by checkin() or discard().
+        """
+        self._fill(wrapper)
+        key = _settings_key(wrapper.settings_dict)
+        deadline = time.time() + self.timeout
+        while True:
+            self.lock.acquire()
+            try:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        raise DatabaseError("Timed out after %s seconds waiting for a connection to database '%s'." % (self.timeout, self.alias))
+                    self.counters['waits'] += 1
+                    self.lock.wait(remaining)
+                if not self.idle:
+                    self.size += 1
+                    self.counters['checkouts'] += 1
+                    self.counters['opened'] += 1
+                    wrapper.connection = None
+                    wrapper.pool_connection_opened = time.time()
+                    return
+                connection, opened, checked_in, conn_key = self.idle.pop()
+            finally:
+                self.lock.release()
+
+            now = time.time()
+            if conn_key != key or self._expired(opened, now):
+                self._close(connection)
+                continue
+            wrapper.connection = connection
+            if now - checked_in > self.check_after and not wrapper.is_usable():
+                wrapper.connection = None
+                self.counters['failed_checks'] += 1
+                self._close(connection)
+                continue
+            self.lock.acquire()
+            try:
+                self.counters['checkouts'] += 1
+                self.counters['reused'] += 1
+            finally:
+                self.lock.release()
+            wrapper.pool_connection_opened = opened
+            return
+
+    def checkin(self, wrapper):
+        """
+        Takes back the connection of wrapper, rolling back anything that was
+        left uncommitted, and clears the wrapper's 'connection' attribute.
+        """
+        connection, wrapper.connection = wrapper.connection, None
+        opened = wrapper.pool_connection_opened
+        wrapper.pool_connection_opened = None
+        if connection is None:
+            self.discard()
+            return
+        now = time.time()
+        if self._expired(opened, now):
+            self._close(connection)
+            return
+        try:
+            connection.rollback()
+        except Exception:
+            # Whatever went wrong, the connection isn't fit for reuse.
+            self._close(connection)
+            return
+        self.lock.acquire()
+        try:
+            self.idle.append((connection, opened, now, _settings_key(wrapper.settings_dict)))
+            self.lock.notify()
+        finally:
+            self.lock.release()
+
+    def discard(self):
+        """
+        Frees the slot of a connection that was checked out but never opened,
+        or that was closed by its user.
+        """
+        self.lock.acquire()
+        try:
+            self.size -= 1
+            self.lock.notify()
+        finally:
+            self.lock.release()
+
+    def clear(self):
+        """
+        Closes all the idle connections. Connections in use are closed when
+        they're checked in, if they have expired, or kept otherwise.
+        """
+        self.lock.acquire()
+        try:
+            idle, self.idle = self.idle, []
+        finally:
+            self.lock.release()
+        for connection, opened, checked_in, key in idle:
+            self._close(connection)
+
+    def stats(self):
+        """
+        Returns a dictionary of statistics about the pool: its current size,
+        the number of idle connections and connections in use, and counters
+        of the checkouts, reused connections, opened and closed connections,
+        failed health checks, waits for a free connection and timeouts.
+        """
+        self.lock.acquire()
+        try:
+            stats = dict(self.counters)
+            stats.update({
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'max_size': self.max_size,
+            })
+            return stats
+        finally:
+            self.lock.release()
+
+    def _expired(self, opened, now):
+        return self.max_age is not None and now - opened >= self.max_age
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self.lock.acquire()
+        try:
+            self.size -= 1
+            self.counters['closed'] += 1
+            self.lock.notify()
+        finally:
+            self.lock.release()
+
+    def _fill(self, wrapper):
+        """
+        Opens connections until the pool holds at least MIN_SIZE of them.
+        """
+        while True:
+            self.lock.acquire()
+            try:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+                self.counters['opened'] += 1
+            finally:
+                self.lock.release()
+            # A throwaway wrapper opens the connection, so that the backend
+            # sets it up as it does any other.
+            opener = wrapper.__class__(wrapper.settings_dict, wrapper.alias)
+            try:
+                opener._cursor()
+            except:
+                self.discard()
+                raise
+            wrapper.metrics.count('connections_opened')
+            now = time.time()
+            self.lock.acquire()
+            try:
+                self.idle.append((opener.connection, now, now, _settings_key(wrapper.settings_dict)))
+                self.lock.notify()
+            finally:
+                self.lock.release()
@@ -80,6 +80,12 @@ class UnicodeCursorWrapper(object):
 
 class DatabaseFeatures(BaseDatabaseFeatures):
     uses_savepoints = True
+    has_bulk_insert = True
+    has_native_key_sequences = True
+    preferred_batch_size = 10000
+    supports_partial_indexes = True
+    supports_expression_indexes = True
+    supports_query_timeouts = True
 
 class DatabaseWrapper(BaseDatabaseWrapper):
     operators = {
@@ -126,7 +132,10 @@ class DatabaseWrapper(BaseDatabaseWrapper):
                 conn_string += " host=%s" % settings_dict['HOST']
             if settings_dict['PORT']:
                 conn_string += " port=%s" % settings_dict['PORT']
-            self.connection = Database.connect(conn_string, **settings_dict['OPTIONS'])
+            options = dict(settings_dict['OPTIONS'])
+            # Not an option of psycopg; see QuerySet.timeout().
+            options.pop('query_timeout', None)
+            self.connection = Database.connect(conn_string, **options)
             self.connection.set_isolation_level(1) # make transactions transparent to all cursors
             connection_created.send(sender=self.__class__)
         cursor = self.connection.cursor()
@@ -73,3 +73,22 @@ class DatabaseCreation(BaseDatabaseCreation):
         else:
             output = []
         return output
+
+    def sql_search_index(self, model, index, style):
+        "Returns a GIN index on to_tsvector() of each field of a SearchIndex"
+        qn = self.connection.ops.quote_name
+        tablespace_sql = ''
+        if model._meta.db_tablespace:
+            sql = self.connection.ops.tablespace_sql(model._meta.db_tablespace)
+            if sql:
+                tablespace_sql = ' ' + sql
+        output = []
+        for field, name in self.search_index_names(model, index):
+            output.append(style.SQL_KEYWORD('CREATE INDEX') + ' ' +
+                style.SQL_TABLE(qn(name)) + ' ' +
+                style.SQL_KEYWORD('ON') + ' ' +
+                style.SQL_TABLE(qn(model._meta.db_table)) + ' ' +
+                style.SQL_KEYWORD('USING') + ' gin ' +
+                "(to_tsvector('%s', %s))" % (index.config, style.SQL_FIELD(qn(field.column))) +
+                "%s;" % tablespace_sql)
+        return output
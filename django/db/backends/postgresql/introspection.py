@@ -86,3 +86,30 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
             indexes[row[0]] = {'primary_key': row[3], 'unique': row[2]}
         return indexes
 
+    def get_index_columns(self, cursor, table_name):
+        cursor.execute("""
+            SELECT attr.attnum, attr.attname
+            FROM pg_catalog.pg_class c, pg_catalog.pg_attribute attr
+            WHERE attr.attrelid = c.oid
+                AND attr.attnum > 0
+                AND c.relname = %s""", [table_name])
+        names = dict(cursor.fetchall())
+        cursor.execute("""
+            SELECT idx.indkey
+            FROM pg_catalog.pg_class c, pg_catalog.pg_index idx
+            WHERE c.oid = idx.indrelid
+                AND idx.indpred IS NULL
+                AND c.relname = %s""", [table_name])
+        result = []
+        for row in cursor.fetchall():
+            # idx.indkey is a string of space-separated column numbers, 0
+            # standing for an expression.
+            columns = []
+            for number in str(row[0]).split():
+                if int(number) == 0:
+                    break
+                columns.append(names[int(number)])
+            if columns:
+                result.append(columns)
+        return result
+
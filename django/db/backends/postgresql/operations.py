@@ -1,6 +1,7 @@
 import re
 
 from django.db.backends import BaseDatabaseOperations
+from django.db.utils import DatabaseError
 
 # This DatabaseOperations class lives in here instead of base.py because it's
 # used by both the 'postgresql' and 'postgresql_psycopg2' backends.
@@ -31,6 +32,47 @@ class DatabaseOperations(BaseDatabaseOperations):
         # http://www.postgresql.org/docs/8.0/static/functions-datetime.html#FUNCTIONS-DATETIME-TRUNC
         return "DATE_TRUNC('%s', %s)" % (lookup_type, field_name)
 
+    def search_config(self, field):
+        """
+        Returns the text search configuration of the SearchIndex covering
+        field, or 'english'.
+        """
+        from django.db.models.indexes import search_index_for
+        if field is not None:
+            index = search_index_for(field)
+            if index is not None:
+                return index.config
+        return 'english'
+
+    def search_lookup_sql(self, field_sql, params, field=None, table_alias=None):
+        # The same expression as the GIN index of a SearchIndex.
+        config = self.search_config(field)
+        return ("to_tsvector('%s', %s) @@ plainto_tsquery('%s', %%s)" % (
+            config, field_sql, config), params)
+
+    def search_rank_sql(self, field_sql, query, field, table_alias):
+        config = self.search_config(field)
+        return ("ts_rank(to_tsvector('%s', %s), plainto_tsquery('%s', %%s))" % (
+            config, field_sql, config), [query])
+
+    def start_query_timeout(self, connection, sql, timeout):
+        # A plain SET rather than SET LOCAL, which would have no effect in
+        # autocommit mode; end_query_timeout() undoes it.
+        connection.cursor().execute('SET statement_timeout = %d' % max(1, int(timeout * 1000)))
+        return sql
+
+    def end_query_timeout(self, connection, failed):
+        try:
+            connection.cursor().execute('SET statement_timeout TO DEFAULT')
+        except DatabaseError:
+            # A failed query aborts the transaction, and rolling it back
+            # undoes the SET.
+            if not failed:
+                raise
+
+    def is_query_timeout(self, exception):
+        return 'statement timeout' in str(exception)
+
     def deferrable_sql(self):
         return " DEFERRABLE INITIALLY DEFERRED"
 
@@ -60,6 +102,22 @@ class DatabaseOperations(BaseDatabaseOperations):
     def no_limit_value(self):
         return None
 
+    def key_block_sql(self, style, sequence_name, block_size):
+        return ['%s %s %s %s;' % (
+            style.SQL_KEYWORD('CREATE SEQUENCE'),
+            style.SQL_TABLE(self.quote_name(sequence_name)),
+            style.SQL_KEYWORD('INCREMENT BY'),
+            style.SQL_FIELD(str(block_size)),
+        )]
+
+    def drop_key_block_sql(self, style, sequence_name):
+        return ['%s %s;' % (style.SQL_KEYWORD('DROP SEQUENCE'),
+                style.SQL_TABLE(self.quote_name(sequence_name)))]
+
+    def reserve_key_block(self, cursor, sequence_name, block_size):
+        cursor.execute("SELECT nextval('%s')" % self.quote_name(sequence_name))
+        return cursor.fetchone()[0]
+
     def quote_name(self, name):
         if name.startswith('"') and name.endswith('"'):
             return name # Quoting once is enough.
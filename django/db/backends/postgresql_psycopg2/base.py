@@ -14,6 +14,7 @@ from django.db.backends.postgresql.client import DatabaseClient
 from django.db.backends.postgresql.creation import DatabaseCreation
 from django.db.backends.postgresql.version import get_version
 from django.db.backends.postgresql_psycopg2.introspection import DatabaseIntrospection
+from django.db.backends.prepared import PreparedStatements, has_typed_placeholders
 from django.utils.safestring import SafeUnicode, SafeString
 
 try:
@@ -36,11 +37,14 @@ class CursorWrapper(object):
     particular exception instances and reraise them with the right types.
     """
 
-    def __init__(self, cursor):
+    def __init__(self, cursor, prepared_statements=None):
         self.cursor = cursor
+        self.prepared_statements = prepared_statements
 
     def execute(self, query, args=None):
         try:
+            if self.prepared_statements is not None:
+                return self.prepared_statements.execute(self.cursor, query, args)
             return self.cursor.execute(query, args)
         except Database.IntegrityError, e:
             raise utils.IntegrityError, utils.IntegrityError(*tuple(e)), sys.exc_info()[2]
@@ -64,9 +68,48 @@ class CursorWrapper(object):
     def __iter__(self):
         return iter(self.cursor)
 
+class DatabasePreparedStatements(PreparedStatements):
+    placeholder = '$%d'
+
+    def is_preparable(self, sql, params):
+        # PREPARE infers the types of the parameters from the SQL alone, and
+        # falls back to text where it can't, as for extra(select=...), which
+        # would change the type of the values returned.
+        return (super(DatabasePreparedStatements, self).is_preparable(sql, params)
+                and has_typed_placeholders(sql))
+
+    def prepare_statement(self, cursor, name, sql):
+        # A failed PREPARE aborts the transaction it's part of, so it's
+        # wrapped in a savepoint unless the connection is in autocommit mode.
+        in_transaction = self.connection.isolation_level != 0
+        if in_transaction:
+            cursor.execute('SAVEPOINT %s' % name)
+        try:
+            cursor.execute('PREPARE %s AS %s' % (name, sql))
+        except Database.DatabaseError:
+            if in_transaction:
+                cursor.execute('ROLLBACK TO SAVEPOINT %s' % name)
+            return False
+        if in_transaction:
+            cursor.execute('RELEASE SAVEPOINT %s' % name)
+        return True
+
+    def execute_statement(self, cursor, name, params):
+        return cursor.execute('EXECUTE %s (%s)' % (name, ', '.join(['%s'] * len(params))), params)
+
+    def deallocate_statement(self, cursor, name):
+        cursor.execute('DEALLOCATE %s' % name)
+
 class DatabaseFeatures(BaseDatabaseFeatures):
     needs_datetime_string_cast = False
     can_return_id_from_insert = False
+    has_bulk_insert = True
+    has_native_key_sequences = True
+    preferred_batch_size = 10000
+    has_copy = True
+    supports_partial_indexes = True
+    supports_expression_indexes = True
+    supports_query_timeouts = True
 
 class DatabaseOperations(PostgresqlDatabaseOperations):
     def last_executed_query(self, cursor, sql, params):
@@ -78,7 +121,23 @@ class DatabaseOperations(PostgresqlDatabaseOperations):
     def return_insert_id(self):
         return "RETURNING %s", ()
 
+    def large_in_lookup_sql(self, field_sql, params, db_type=None):
+        # psycopg2 adapts a list to an ARRAY, so however many values there
+        # are, the statement has a single parameter (and, prepared, a
+        # single plan). Dates, times and decimals arrive as strings, so the
+        # array is cast to the column's type; without one, only integers
+        # are passed as an array.
+        if db_type is None:
+            for value in params:
+                if value is not None and not isinstance(value, (int, long)):
+                    return None
+            return '%s = ANY(%%s)' % field_sql, [list(params)]
+        db_type = db_type.split(' CHECK')[0]
+        db_type = {'serial': 'integer', 'bigserial': 'bigint'}.get(db_type, db_type)
+        return '%s = ANY(%%s::%s[])' % (field_sql, db_type), [list(params)]
+
 class DatabaseWrapper(BaseDatabaseWrapper):
+    prepared_statements_class = DatabasePreparedStatements
     operators = {
         'exact': '= %s',
         'iexact': '= UPPER(%s)',
@@ -123,6 +182,8 @@ class DatabaseWrapper(BaseDatabaseWrapper):
             conn_params.update(settings_dict['OPTIONS'])
             if 'autocommit' in conn_params:
                 del conn_params['autocommit']
+            if 'query_timeout' in conn_params:
+                del conn_params['query_timeout']
             if settings_dict['USER']:
                 conn_params['user'] = settings_dict['USER']
             if settings_dict['PASSWORD']:
@@ -155,7 +216,9 @@ class DatabaseWrapper(BaseDatabaseWrapper):
                     # versions that support it, but, right now, that's hard to
                     # do without breaking other things (#10509).
                     self.features.can_return_id_from_insert = True
-        return CursorWrapper(cursor)
+        if self.prepared_statements is not None:
+            self.prepared_statements.bind(self.connection)
+        return CursorWrapper(cursor, self.prepared_statements)
 
     def _enter_transaction_management(self, managed):
         """
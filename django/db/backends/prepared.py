@@ -0,0 +1,197 @@
+"""
+Server-side prepared statements for the queries a connection runs often.
+
+Enabled per database with the PREPARED_STATEMENTS setting, e.g.:
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'NAME': 'mydb',
+            'PREPARED_STATEMENTS': {'THRESHOLD': 5, 'MAX_SIZE': 100},
+        }
+    }
+
+Once a connection has run the same SQL (with different parameters) more
+than THRESHOLD times, it prepares it and runs the prepared statement from
+then on, so that the server doesn't parse and plan it again. At most
+MAX_SIZE statements are kept prepared per connection; the least recently
+used one is deallocated to make room for another.
+
+Statements are told apart by their SQL without the comment added by the
+SQL_COMMENTS setting, and prepared without it.
+"""
+
+import itertools
+import re
+
+from django.db.backends.sqlcomments import split_comment
+from django.utils.datastructures import SortedDict
+
+PREPARED_STATEMENTS_DEFAULTS = {
+    # How many times a statement runs unprepared before it's prepared.
+    'THRESHOLD': 5,
+    # The maximum number of statements kept prepared per connection.
+    'MAX_SIZE': 100,
+}
+
+# Statement names are unique across the process, so that a pooled connection
+# can't be asked to prepare a name it still holds.
+_names = itertools.count()
+
+placeholder_re = re.compile(r'%([%s])')
+
+# String literals, SELECT and FROM keywords and placeholders.
+select_list_re = re.compile(r"'[^']*'|\b(SELECT|FROM)\b|%([%s])", re.IGNORECASE)
+# What comes just before a placeholder that is compared with, or assigned
+# to, something of a known type: an operator, LIKE, a bound of BETWEEN, an
+# item of an IN, VALUES or function argument list.
+compared_re = re.compile(r'(?:[=<>+\-*/|,]|\bI?LIKE|\bBETWEEN(?:\s+%s\s+AND)?'
+                         r'|\b(?:IN|VALUES)\s*\(|\)\s*,\s*\(|\w\()\s*$', re.IGNORECASE)
+
+def has_typed_placeholders(sql):
+    """
+    Returns True if no placeholder in sql is in the select list of a SELECT,
+    and each one is compared with, or assigned to, a column or an
+    expression, so that a server can infer the type of its parameter.
+    """
+    in_select_list = False
+    for match in select_list_re.finditer(sql):
+        keyword, placeholder = match.groups()
+        if keyword is not None:
+            in_select_list = keyword.upper() == 'SELECT'
+        elif placeholder == 's':
+            if in_select_list:
+                return False
+            if not compared_re.search(sql, max(0, match.start() - 30), match.start()):
+                return False
+    return True
+
+class PreparedStatements(object):
+    """
+    The statements prepared on one connection. Backends subclass it to
+    provide the SQL that prepares, runs and deallocates a statement.
+    """
+    # The placeholder the server expects in prepared SQL; "%d" is replaced
+    # by the position of the parameter, counting from 1.
+    placeholder = '?'
+    preparable = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+    def __init__(self, options):
+        settings = dict(PREPARED_STATEMENTS_DEFAULTS)
+        settings.update(options)
+        self.threshold = settings['THRESHOLD']
+        self.max_size = settings['MAX_SIZE']
+        if self.max_size < 1:
+            raise ValueError("PREPARED_STATEMENTS needs a MAX_SIZE of at least 1.")
+        self.connection = None
+        self.stats = {'executions': 0, 'prepares': 0, 'evictions': 0, 'failures': 0}
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets all the statements, which the server has dropped.
+        """
+        # Maps SQL to the name of its prepared statement, least recently
+        # used first.
+        self.statements = SortedDict()
+        # How often each SQL not yet prepared has run.
+        self.counts = {}
+        # SQL that the server refused to prepare.
+        self.unpreparable = set()
+
+    def bind(self, connection):
+        """
+        Ties the statements to the given DB-API connection. If it isn't the
+        one they were prepared on, they are forgotten.
+        """
+        if connection is not self.connection:
+            self.reset()
+            self.connection = connection
+
+    def execute(self, cursor, sql, params):
+        """
+        Runs sql with params on the DB-API cursor, through a prepared
+        statement if it runs often enough.
+        """
+        sql, comment = split_comment(sql)
+        name = self.statements.get(sql)
+        if name is not None:
+            # Move the statement to the most recently used end.
+            self.statements.keyOrder.remove(sql)
+            self.statements.keyOrder.append(sql)
+        else:
+            if not self.is_preparable(sql, params):
+                return cursor.execute(sql + comment, params)
+            count = self.counts.get(sql, 0) + 1
+            if count <= self.threshold:
+                if len(self.counts) >= self.max_size * 10:
+                    # Don't let one-off queries pile up.
+                    self.counts.clear()
+                self.counts[sql] = count
+                return cursor.execute(sql + comment, params)
+            del self.counts[sql]
+            name = self.prepare(cursor, sql)
+            if name is None:
+                return cursor.execute(sql + comment, params)
+        self.stats['executions'] += 1
+        return self.execute_statement(cursor, name, params)
+
+    def is_preparable(self, sql, params):
+        if not params or not isinstance(params, (list, tuple)) or sql in self.unpreparable:
+            return False
+        if sql.lstrip()[:6].upper() not in self.preparable:
+            return False
+        return len([m for m in placeholder_re.findall(sql) if m == 's']) == len(params)
+
+    def convert(self, sql):
+        """
+        Returns sql with the placeholders the server expects.
+        """
+        positions = itertools.count(1)
+        def replace(match):
+            if match.group(1) == '%':
+                return '%'
+            placeholder = self.placeholder
+            if '%d' in placeholder:
+                placeholder = placeholder % positions.next()
+            return placeholder
+        return placeholder_re.sub(replace, sql)
+
+    def prepare(self, cursor, sql):
+        """
+        Prepares sql, making room for it if need be, and returns the name
+        of the statement, or None if the server refused to prepare it.
+        """
+        while len(self.statements) >= self.max_size:
+            oldest = self.statements.keyOrder[0]
+            self.deallocate_statement(cursor, self.statements.pop(oldest))
+            self.stats['evictions'] += 1
+        name = 'django_stmt_%d' % _names.next()
+        if not self.prepare_statement(cursor, name, self.convert(sql)):
+            self.stats['failures'] += 1
+            self.unpreparable.add(sql)
+            return None
+        self.stats['prepares'] += 1
+        self.statements[sql] = name
+        return name
+
+    def deallocate_all(self, cursor):
+        """
+        Deallocates all the statements, for a connection that stays open.
+        """
+        for name in self.statements.values():
+            self.deallocate_statement(cursor, name)
+        self.reset()
+
+    def prepare_statement(self, cursor, name, sql):
+        """
+        Prepares sql, with the server's placeholders, under the given name.
+        Returns False if the server refused to prepare it.
+        """
+        raise NotImplementedError
+
+    def execute_statement(self, cursor, name, params):
+        raise NotImplementedError
+
+    def deallocate_statement(self, cursor, name):
+        raise NotImplementedError
@@ -1,3 +1,6 @@
 from django.dispatch import Signal
 
 connection_created = Signal()
+
+# Sent when opening a connection to the database fails.
+connection_failed = Signal(providing_args=["alias", "exception"])
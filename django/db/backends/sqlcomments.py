@@ -0,0 +1,167 @@
+"""
+Comments appended to the SQL of ORM queries, in the sqlcommenter format, so
+that a statement seen in pg_stat_statements or a slow query log can be traced
+back to the code that ran it.
+
+Enabled per database with the SQL_COMMENTS setting, e.g.:
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'NAME': 'mydb',
+            'SQL_COMMENTS': {'CALLER': True, 'MODEL': True, 'CONTEXT': True},
+        }
+    }
+
+which turns
+
+    SELECT ... FROM "blog_entry" WHERE ...
+
+into
+
+    SELECT ... FROM "blog_entry" WHERE ...
+    /*caller='blog.views%3Aarchive',model='blog.Entry',request_id='4f2a'*/
+
+The caller is the function outside of django.db that ran the query. The
+context tags are set for the current thread with set_context() -- a request
+or trace id, say -- and include the name of the management command being
+run. Comments are only added to the queries run by SQLCompiler.execute_sql().
+
+The statement caches of the backends (prepared statements and converted
+queries) are keyed on the SQL without its comment (see split_comment()), so
+that comments with per-request tags don't defeat them.
+"""
+
+import sys
+import threading
+import urllib
+
+SQL_COMMENTS_DEFAULTS = {
+    # The function that ran the query, as "module:function".
+    'CALLER': True,
+    # The model queried, as "app_label.ModelName".
+    'MODEL': True,
+    # The tags of the current thread (see set_context()).
+    'CONTEXT': True,
+}
+
+# Callers aren't looked for in these modules.
+INTERNAL_MODULES = ('django.db.',)
+
+# The tags of each (model, caller) pair, shared by every connection of the
+# process.
+_tags_cache = {}
+_TAGS_CACHE_SIZE = 1000
+
+_context = threading.local()
+
+def format_tag(name, value):
+    """
+    Returns name='value', with value URL-encoded as sqlcommenter expects and
+    its percent signs doubled for the database adapter.
+    """
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return "%s='%s'" % (name, urllib.quote(str(value), safe='').replace('%', '%%'))
+
+def split_comment(sql):
+    """
+    Returns sql without the comment SQLComments.annotate() appended to it,
+    and the comment ('' if there's none). Tag values are URL-encoded, so the
+    comment can't contain ' /*' itself.
+    """
+    if sql.endswith('*/'):
+        start = sql.rfind(' /*')
+        if start != -1:
+            return sql[:start], sql[start:]
+    return sql, ''
+
+def get_context():
+    """
+    Returns the context tags of the current thread.
+    """
+    return getattr(_context, 'tags', {})
+
+def set_context(**tags):
+    """
+    Adds tags to the comments of the queries the current thread runs; a tag
+    set to None is removed. Returns the previous tags, for restore_context().
+    """
+    previous = get_context()
+    new = previous.copy()
+    for name, value in tags.items():
+        if value is None:
+            new.pop(name, None)
+        else:
+            new[name] = value
+    restore_context(new)
+    return previous
+
+def restore_context(tags):
+    """
+    Replaces the context tags of the current thread with tags, as returned
+    by set_context().
+    """
+    _context.tags = tags
+    items = tags.items()
+    items.sort()
+    _context.formatted = [format_tag(name, value) for name, value in items]
+
+def clear_context():
+    restore_context({})
+
+def find_caller(depth=1):
+    """
+    Returns the module name and code object of the innermost function,
+    above the given depth in the stack, that isn't part of the ORM, or
+    None.
+    """
+    frame = sys._getframe(depth + 1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith(INTERNAL_MODULES):
+            return module, frame.f_code
+        frame = frame.f_back
+    return None
+
+class SQLComments(object):
+    """
+    Builds the comments added to the queries of one connection.
+    """
+    def __init__(self, options):
+        settings = dict(SQL_COMMENTS_DEFAULTS)
+        settings.update(options)
+        self.caller = settings['CALLER']
+        self.model = settings['MODEL']
+        self.context = settings['CONTEXT']
+
+    def annotate(self, sql, model):
+        """
+        Returns sql with the comment for a query of model.
+        """
+        caller = None
+        if self.caller:
+            caller = find_caller(2)
+        if not self.model:
+            model = None
+        key = (model, caller)
+        tags = _tags_cache.get(key)
+        if tags is None:
+            tags = []
+            if caller is not None:
+                module, code = caller
+                tags.append(format_tag('caller', '%s:%s' % (module, code.co_name)))
+            if model is not None:
+                opts = model._meta
+                tags.append(format_tag('model', '%s.%s' % (opts.app_label, opts.object_name)))
+            if len(_tags_cache) >= _TAGS_CACHE_SIZE:
+                _tags_cache.clear()
+            _tags_cache[key] = tags
+        if self.context:
+            formatted = getattr(_context, 'formatted', None)
+            if formatted:
+                tags = tags + formatted
+                tags.sort()
+        if not tags:
+            return sql
+        return '%s /*%s*/' % (sql, ','.join(tags))
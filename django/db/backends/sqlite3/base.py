@@ -7,14 +7,20 @@ Python 2.5 and later can use a pysqlite2 module or the sqlite3 module in the
 standard library.
 """
 
+import re
+import struct
 import sys
+import time
 
 from django.db import utils
 from django.db.backends import *
 from django.db.backends.signals import connection_created
+from django.db.backends.sqlcomments import split_comment
 from django.db.backends.sqlite3.client import DatabaseClient
 from django.db.backends.sqlite3.creation import DatabaseCreation
 from django.db.backends.sqlite3.introspection import DatabaseIntrospection
+from django.utils import simplejson
+from django.utils.encoding import force_unicode
 from django.utils.safestring import SafeString
 
 try:
@@ -53,23 +59,157 @@ if Database.version_info >= (2,4,1):
     Database.register_adapter(str, lambda s:s.decode('utf-8'))
     Database.register_adapter(SafeString, lambda s:s.decode('utf-8'))
 
+# OPTIONS that are set with a PRAGMA on every new connection rather than
+# passed to connect(), in the order they're applied.
+PRAGMA_OPTIONS = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size',
+                  'mmap_size', 'temp_store')
+
+pragma_value_re = re.compile(r'^-?\w+$')
+# The words of a full-text search.
+search_word_re = re.compile(r'\w+', re.UNICODE)
+
+def _has_json_each():
+    connection = Database.connect(':memory:')
+    try:
+        try:
+            connection.execute("SELECT value FROM json_each('[1]')")
+        except Database.OperationalError:
+            return False
+        return True
+    finally:
+        connection.close()
+
+def _fts_module():
+    connection = Database.connect(':memory:')
+    try:
+        for module in ('fts5', 'fts4'):
+            try:
+                connection.execute("CREATE VIRTUAL TABLE t USING %s(c)" % module)
+            except Database.OperationalError:
+                continue
+            return module
+        return None
+    finally:
+        connection.close()
+
 class DatabaseFeatures(BaseDatabaseFeatures):
     # SQLite cannot handle us only partially reading from a cursor's result set
     # and then writing the same rows to the database in another cursor. This
     # setting ensures we always read result sets fully into memory all in one
     # go.
     can_use_chunked_reads = False
+    # Multi-row VALUES lists were added in SQLite 3.7.11.
+    has_bulk_insert = Database.sqlite_version_info >= (3, 7, 11)
+    # True if the JSON1 functions are compiled in, which lets a long "in"
+    # lookup pass its values as a single JSON array.
+    has_json_each = _has_json_each()
+    # Partial indexes were added in SQLite 3.8.0, indexes on expressions in
+    # 3.9.0.
+    supports_partial_indexes = Database.sqlite_version_info >= (3, 8, 0)
+    supports_expression_indexes = Database.sqlite_version_info >= (3, 9, 0)
+    # The full-text search module SearchIndexes use: 'fts5', 'fts4', or None
+    # if neither is compiled in.
+    fts_module = _fts_module()
+    # SQLITE_LIMIT_VARIABLE_NUMBER defaults to 999, and older versions treat
+    # a multi-row VALUES list as a compound SELECT limited to 500 terms.
+    max_query_params = 999
+    preferred_batch_size = 500
+    supports_query_timeouts = True
 
 class DatabaseOperations(BaseDatabaseOperations):
+    def large_in_lookup_sql(self, field_sql, params, db_type=None):
+        """
+        Passes the values as one JSON array, expanded by json_each(), since
+        a placeholder per value runs into SQLite's limit of 999 variables.
+        """
+        if not DatabaseFeatures.has_json_each:
+            return None
+        for value in params:
+            if value is not None and not isinstance(value, (int, long, float, basestring)):
+                return None
+        return ('%s IN (SELECT value FROM json_each(%%s))' % field_sql,
+                [simplejson.dumps(list(params))])
+
+    def start_query_timeout(self, connection, sql, timeout):
+        # The progress handler runs every 1000 virtual machine instructions;
+        # returning True interrupts the query.
+        deadline = time.time() + timeout
+        connection.connection.set_progress_handler(lambda: time.time() > deadline, 1000)
+        return sql
+
+    def end_query_timeout(self, connection, failed):
+        connection.connection.set_progress_handler(None, 0)
+
+    def is_query_timeout(self, exception):
+        return str(exception) == 'interrupted'
+
     def date_extract_sql(self, lookup_type, field_name):
-        # sqlite doesn't support extract, so we fake it with the user-defined
-        # function django_extract that's registered in connect().
-        return 'django_extract("%s", %s)' % (lookup_type.lower(), field_name)
+        # sqlite doesn't support extract, so we fake it with strftime(),
+        # which returns NULL for values that aren't dates. Its weekdays count
+        # from 0 for Sunday; Django's count from 1. Use double percents to
+        # escape.
+        lookup_type = lookup_type.lower()
+        if lookup_type == 'week_day':
+            return "(CAST(strftime('%%%%w', %s) AS integer) + 1)" % field_name
+        format = {'year': '%%Y', 'month': '%%m', 'day': '%%d'}[lookup_type]
+        return "CAST(strftime('%s', %s) AS integer)" % (format, field_name)
+
+    def search_lookup_sql(self, field_sql, params, field=None, table_alias=None):
+        """
+        Matches the rows of the table whose rowids the FTS table of the
+        field's SearchIndex returns.
+        """
+        index, fts_table, query = self._search_table(field, params[0])
+        if query is None:
+            return '0 = 1', []
+        qn = self.quote_name
+        return ('%s.rowid IN (SELECT rowid FROM %s WHERE %s.%s MATCH %%s)' % (
+            table_alias, fts_table, fts_table, qn(field.column)), [query])
+
+    def search_rank_sql(self, field_sql, query, field, table_alias):
+        index, fts_table, query = self._search_table(field, query)
+        if query is None:
+            return '0', []
+        qn = self.quote_name
+        if DatabaseFeatures.fts_module == 'fts5':
+            # bm25() is lower for better matches; only the searched column
+            # counts.
+            weights = ', '.join([(name == field.name and '1.0' or '0.0') for name in index.fields])
+            rank = '-bm25(%s, %s)' % (fts_table, weights)
+        else:
+            rank = 'django_fts4_rank(matchinfo(%s, \'pcx\'), %d)' % (
+                fts_table, list(index.fields).index(field.name))
+        return ('(SELECT %s FROM %s WHERE %s.%s MATCH %%s AND %s.rowid = %s.rowid)' % (
+            rank, fts_table, fts_table, qn(field.column), fts_table, table_alias), [query])
+
+    def _search_table(self, field, query):
+        """
+        Returns the SearchIndex covering field, the quoted name of its FTS
+        table, and query as an FTS query matching all its words (None if it
+        has none).
+        """
+        if field is None or not DatabaseFeatures.fts_module:
+            raise NotImplementedError('Full-text search on SQLite needs FTS5 or FTS4.')
+        from django.db.models.indexes import search_index_for
+        index = search_index_for(field)
+        if index is None:
+            from django.core.exceptions import FieldError
+            raise FieldError("Full-text search on SQLite needs a SearchIndex on "
+                             "'%s' in Meta.indexes." % field.name)
+        fts_table = self.quote_name(index.get_name(field.model))
+        words = search_word_re.findall(force_unicode(query))
+        if not words:
+            return index, fts_table, None
+        return index, fts_table, ' '.join(['"%s"' % word for word in words])
 
     def date_trunc_sql(self, lookup_type, field_name):
-        # sqlite doesn't support DATE_TRUNC, so we fake it with a user-defined
-        # function django_date_trunc that's registered in connect().
-        return 'django_date_trunc("%s", %s)' % (lookup_type.lower(), field_name)
+        # sqlite doesn't support DATE_TRUNC, so we fake it with strftime().
+        format = {
+            'year': '%%Y-01-01 00:00:00',
+            'month': '%%Y-%%m-01 00:00:00',
+            'day': '%%Y-%%m-%%d 00:00:00',
+        }[lookup_type.lower()]
+        return "strftime('%s', %s)" % (format, field_name)
 
     def drop_foreignkey_sql(self):
         return ""
@@ -154,6 +294,8 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.creation = DatabaseCreation(self)
         self.introspection = DatabaseIntrospection(self)
         self.validation = BaseDatabaseValidation(self)
+        # Queries converted to "qmark" placeholders, shared by the cursors.
+        self.converted_queries = util.StatementCache()
 
     def _cursor(self):
         if self.connection is None:
@@ -165,14 +307,39 @@ class DatabaseWrapper(BaseDatabaseWrapper):
                 'database': settings_dict['NAME'],
                 'detect_types': Database.PARSE_DECLTYPES | Database.PARSE_COLNAMES,
             }
-            kwargs.update(settings_dict['OPTIONS'])
+            if self.uses_pool():
+                # Pooled connections are passed between threads.
+                kwargs['check_same_thread'] = False
+            pragmas = []
+            for name, value in settings_dict['OPTIONS'].items():
+                if name in PRAGMA_OPTIONS:
+                    if not pragma_value_re.match(str(value)):
+                        from django.core.exceptions import ImproperlyConfigured
+                        raise ImproperlyConfigured("Invalid value %r for the SQLite option '%s'." % (value, name))
+                    pragmas.append((PRAGMA_OPTIONS.index(name), name, value))
+                elif name != 'query_timeout':
+                    kwargs[name] = value
             self.connection = Database.connect(**kwargs)
+            pragmas.sort()
+            for index, name, value in pragmas:
+                self.connection.execute('PRAGMA %s = %s' % (name, value))
             # Register extract, date_trunc, and regexp functions.
             self.connection.create_function("django_extract", 2, _sqlite_extract)
             self.connection.create_function("django_date_trunc", 2, _sqlite_date_trunc)
             self.connection.create_function("regexp", 2, _sqlite_regexp)
+            self.connection.create_function("django_fts4_rank", 2, _sqlite_fts4_rank)
             connection_created.send(sender=self.__class__)
-        return self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.converted_queries = self.converted_queries
+        return cursor
+
+    def uses_pool(self):
+        # Every connection to an in-memory database has a database of its
+        # own, so they can't be pooled.
+        return self.pool is not None and self.can_connect_from_threads()
+
+    def can_connect_from_threads(self):
+        return self.settings_dict['NAME'] != ":memory:"
 
     def close(self):
         # If database is in memory, closing the connection destroys the
@@ -186,7 +353,12 @@ class SQLiteCursorWrapper(Database.Cursor):
     Django uses "format" style placeholders, but pysqlite2 uses "qmark" style.
     This fixes it -- but note that if you want to use a literal "%s" in a query,
     you'll need to use "%%s".
+
+    Converted queries are cached, since converting a query with many
+    parameters takes a while.
     """
+    converted_queries = None
+
     def execute(self, query, params=()):
         try:
             query = self.convert_query(query, len(params))
@@ -208,8 +380,43 @@ class SQLiteCursorWrapper(Database.Cursor):
         except Database.DatabaseError, e:
             raise utils.DatabaseError, utils.DatabaseError(*tuple(e)), sys.exc_info()[2]
 
+    # SQLite runs the query as rows are fetched, so fetching can fail too
+    # (when a query timeout interrupts it, for one).
+    def fetchone(self):
+        try:
+            return Database.Cursor.fetchone(self)
+        except Database.DatabaseError, e:
+            raise utils.DatabaseError, utils.DatabaseError(*tuple(e)), sys.exc_info()[2]
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        try:
+            return Database.Cursor.fetchmany(self, size)
+        except Database.DatabaseError, e:
+            raise utils.DatabaseError, utils.DatabaseError(*tuple(e)), sys.exc_info()[2]
+
+    def fetchall(self):
+        try:
+            return Database.Cursor.fetchall(self)
+        except Database.DatabaseError, e:
+            raise utils.DatabaseError, utils.DatabaseError(*tuple(e)), sys.exc_info()[2]
+
     def convert_query(self, query, num_params):
-        return query % tuple("?" * num_params)
+        if self.converted_queries is None:
+            return query % tuple("?" * num_params)
+        # Queries are cached without their SQL_COMMENTS comment, which
+        # would make most of them unique.
+        query, comment = split_comment(query)
+        key = (query, num_params)
+        converted = self.converted_queries.get(key)
+        if converted is None:
+            converted = query % tuple("?" * num_params)
+            self.converted_queries.set(key, converted)
+        if comment:
+            # Undouble its percent signs.
+            converted += comment % ()
+        return converted
 
 def _sqlite_extract(lookup_type, dt):
     if dt is None:
@@ -235,9 +442,33 @@ def _sqlite_date_trunc(lookup_type, dt):
     elif lookup_type == 'day':
         return "%i-%02i-%02i 00:00:00" % (dt.year, dt.month, dt.day)
 
+# Compiled REGEXP patterns, by pattern. Emptied when it gets too large.
+_regexp_cache = {}
+REGEXP_CACHE_SIZE = 100
+
 def _sqlite_regexp(re_pattern, re_string):
-    import re
     try:
-        return bool(re.search(re_pattern, re_string))
+        regexp = _regexp_cache.get(re_pattern)
+        if regexp is None:
+            if len(_regexp_cache) >= REGEXP_CACHE_SIZE:
+                _regexp_cache.clear()
+            regexp = _regexp_cache[re_pattern] = re.compile(re_pattern)
+        return bool(regexp.search(re_string))
     except:
         return False
+
+def _sqlite_fts4_rank(matchinfo, column):
+    """
+    Scores a row matched by an FTS4 table from its matchinfo(..., 'pcx'): for
+    each phrase of the query, the share of its hits in the given column that
+    are in this row.
+    """
+    values = struct.unpack('@%dI' % (len(matchinfo) // 4), str(matchinfo))
+    phrases, columns = values[0], values[1]
+    score = 0.0
+    for phrase in range(phrases):
+        offset = 2 + 3 * (phrase * columns + column)
+        hits, total = values[offset], values[offset + 1]
+        if hits:
+            score += float(hits) / total
+    return score
@@ -30,6 +30,71 @@ class DatabaseCreation(BaseDatabaseCreation):
         'TimeField':                    'time',
     }
 
+    def sql_create_model(self, model, style, known_models=set()):
+        """
+        Creates the shadow full-text table of each SearchIndex along with the
+        table, so that its triggers index every row from the start.
+        """
+        output, pending = super(DatabaseCreation, self).sql_create_model(model, style, known_models)
+        if output:
+            for index in self.search_indexes(model):
+                output.extend(self.sql_search_table(model, index, style))
+        return output, pending
+
+    def sql_destroy_model(self, model, references_to_delete, style):
+        output = super(DatabaseCreation, self).sql_destroy_model(model, references_to_delete, style)
+        if output:
+            qn = self.connection.ops.quote_name
+            for index in self.search_indexes(model):
+                output.append('%s %s;' % (style.SQL_KEYWORD('DROP TABLE'),
+                    style.SQL_TABLE(qn(self.index_name(model, index)))))
+        return output
+
+    def search_indexes(self, model):
+        from django.db.models.indexes import SearchIndex
+        if not self.connection.features.fts_module:
+            return []
+        return [index for index in model._meta.indexes if isinstance(index, SearchIndex)]
+
+    def sql_search_table(self, model, index, style):
+        """
+        Returns the SQL that creates the FTS table of a SearchIndex, which
+        takes its content from the model's table, and the triggers that keep
+        it up to date. Rows of both tables are matched by rowid.
+        """
+        qn = self.connection.ops.quote_name
+        module = self.connection.features.fts_module
+        table = qn(model._meta.db_table)
+        fts_table = qn(self.index_name(model, index))
+        columns = [qn(model._meta.get_field(name).column) for name in index.fields]
+        values = {
+            'fts': fts_table,
+            'columns': ', '.join(columns),
+            'new': ', '.join(['new.%s' % c for c in columns]),
+            'old': ', '.join(['old.%s' % c for c in columns]),
+        }
+        output = ['%s %s %s %s(%s, content=%s);' % (
+            style.SQL_KEYWORD('CREATE VIRTUAL TABLE'), style.SQL_TABLE(fts_table),
+            style.SQL_KEYWORD('USING'), module, values['columns'], table)]
+        if module == 'fts5':
+            insert = 'INSERT INTO %(fts)s(rowid, %(columns)s) VALUES (new.rowid, %(new)s);' % values
+            delete = ("INSERT INTO %(fts)s(%(fts)s, rowid, %(columns)s) "
+                      "VALUES ('delete', old.rowid, %(old)s);" % values)
+            triggers = [('ai', 'AFTER INSERT', insert), ('ad', 'AFTER DELETE', delete),
+                        ('au', 'AFTER UPDATE', delete + ' ' + insert)]
+        else:
+            insert = 'INSERT INTO %(fts)s(docid, %(columns)s) VALUES (new.rowid, %(new)s);' % values
+            delete = 'DELETE FROM %(fts)s WHERE docid = old.rowid;' % values
+            triggers = [('ai', 'AFTER INSERT', insert), ('bd', 'BEFORE DELETE', delete),
+                        ('bu', 'BEFORE UPDATE', delete), ('au', 'AFTER UPDATE', insert)]
+        for suffix, when, body in triggers:
+            output.append('%s %s %s %s %s %s %s %s' % (
+                style.SQL_KEYWORD('CREATE TRIGGER'),
+                style.SQL_TABLE(qn('%s_%s' % (self.index_name(model, index), suffix))),
+                style.SQL_KEYWORD(when), style.SQL_KEYWORD('ON'), style.SQL_TABLE(table),
+                style.SQL_KEYWORD('BEGIN'), body, style.SQL_KEYWORD('END;')))
+        return output
+
     def sql_for_pending_references(self, model, style, pending_references):
         "SQLite3 doesn't support constraints"
         return []
@@ -130,6 +130,30 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
             indexes[name]['unique'] = True
         return indexes
 
+    def get_index_columns(self, cursor, table_name):
+        # An INTEGER PRIMARY KEY is the rowid rather than an index.
+        primary_key = [(info['pk'], info['name']) for info in self._table_info(cursor, table_name)
+                       if info['pk']]
+        primary_key.sort()
+        result = []
+        if primary_key:
+            result.append([name for pk, name in primary_key])
+        cursor.execute('PRAGMA index_list(%s)' % self.connection.ops.quote_name(table_name))
+        # seq, name, unique, and, since SQLite 3.8.9, origin and partial
+        for row in cursor.fetchall():
+            if len(row) > 4 and row[4]:
+                continue
+            cursor.execute('PRAGMA index_info(%s)' % self.connection.ops.quote_name(row[1]))
+            # seqno, cid, name (None for an expression)
+            columns = []
+            for seqno, cid, name in sorted(cursor.fetchall()):
+                if name is None:
+                    break
+                columns.append(name)
+            if columns and columns not in result:
+                result.append(columns)
+        return result
+
     def _table_info(self, cursor, name):
         cursor.execute('PRAGMA table_info(%s)' % self.connection.ops.quote_name(name))
         # cid, name, type, notnull, dflt_value, pk
@@ -45,26 +45,111 @@ class CursorDebugWrapper(object):
     def __iter__(self):
         return iter(self.cursor)
 
+class StatementCache(object):
+    """
+    A cache of SQL statements rewritten for the database, such as with its
+    own placeholders, holding about the max_size most recently used ones.
+
+    Entries live in two generations, each holding up to half of max_size.
+    New entries go to the young generation; when it's full, it becomes the
+    old generation, replacing the previous one. An entry found in the old
+    generation moves back to the young one.
+    """
+    def __init__(self, max_size=200):
+        self.generation_size = max(max_size // 2, 1)
+        self.young = {}
+        self.old = {}
+
+    def get(self, key):
+        value = self.young.get(key)
+        if value is None:
+            value = self.old.get(key)
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def set(self, key, value):
+        if len(self.young) >= self.generation_size:
+            self.old, self.young = self.young, {}
+        self.young[key] = value
+
+    def __len__(self):
+        return len(self.young) + len(self.old)
+
 ###############################################
 # Converters from database (string) to Python #
 ###############################################
 
+# Recently converted date and time strings; most columns hold few distinct
+# dates, and many time columns few distinct times. Emptied when they get
+# too large.
+_date_cache = {}
+_time_cache = {}
+DATE_CACHE_SIZE = 1000
+
+def _microseconds(fraction):
+    # "5" -> 500000, "312" -> 312000; digits past the sixth are dropped.
+    if len(fraction) == 6:
+        return int(fraction)
+    return int((fraction + '000000')[:6])
+
 def typecast_date(s):
-    return s and datetime.date(*map(int, s.split('-'))) or None # returns None if s is null
+    if not s: return None # returns None if s is null
+    date = _date_cache.get(s)
+    if date is None:
+        if len(s) == 10 and s[4] == '-' and s[7] == '-':
+            # The usual fixed-width "2005-07-29".
+            date = datetime.date(int(s[:4]), int(s[5:7]), int(s[8:]))
+        else:
+            date = datetime.date(*map(int, s.split('-')))
+        if len(_date_cache) >= DATE_CACHE_SIZE:
+            _date_cache.clear()
+        _date_cache[s] = date
+    return date
 
 def typecast_time(s): # does NOT store time zone information
     if not s: return None
-    hour, minutes, seconds = s.split(':')
-    if '.' in seconds: # check whether seconds have a fractional part
-        seconds, microseconds = seconds.split('.')
-    else:
-        microseconds = '0'
-    return datetime.time(int(hour), int(minutes), int(seconds), int(float('.'+microseconds) * 1000000))
+    time = _time_cache.get(s)
+    if time is None:
+        if len(s) >= 8 and s[2] == ':' and s[5] == ':':
+            # The usual fixed-width "15:48:00" or "15:48:00.590358".
+            hour, minutes, seconds, fraction = s[:2], s[3:5], s[6:8], s[9:]
+        else:
+            hour, minutes, seconds = s.split(':')
+            if '.' in seconds: # check whether seconds have a fractional part
+                seconds, fraction = seconds.split('.')
+            else:
+                fraction = ''
+        time = datetime.time(int(hour), int(minutes), int(seconds), _microseconds(fraction))
+        if len(_time_cache) >= DATE_CACHE_SIZE:
+            _time_cache.clear()
+        _time_cache[s] = time
+    return time
 
 def typecast_timestamp(s): # does NOT store time zone information
     # "2005-07-29 15:48:00.590358-05"
     # "2005-07-29 09:56:00-05"
     if not s: return None
+    if len(s) >= 19 and s[10] == ' ' and s[13] == ':' and s[16] == ':':
+        # The usual fixed-width "2005-07-29 15:48:00", followed by optional
+        # fractional seconds and time zone.
+        date = _date_cache.get(s[:10]) or typecast_date(s[:10])
+        rest = s[19:]
+        if not rest:
+            microseconds = 0
+        elif rest[0] == '.' and rest[1:7].isdigit():
+            microseconds = _microseconds(rest[1:7])
+        else:
+            fraction = ''
+            if rest[0] == '.':
+                fraction = rest[1:]
+                for i, c in enumerate(fraction):
+                    if not c.isdigit():
+                        fraction = fraction[:i]
+                        break
+            microseconds = _microseconds(fraction)
+        return datetime.datetime(date.year, date.month, date.day,
+            int(s[11:13]), int(s[14:16]), int(s[17:19]), microseconds)
     if not ' ' in s: return typecast_date(s)
     d, t = s.split()
     # Extract timezone information, if it exists. Currently we just throw
@@ -81,11 +166,11 @@ def typecast_timestamp(s): # does NOT store time zone information
     times = t.split(':')
     seconds = times[2]
     if '.' in seconds: # check whether seconds have a fractional part
-        seconds, microseconds = seconds.split('.')
+        seconds, fraction = seconds.split('.')
     else:
-        microseconds = '0'
+        fraction = ''
     return datetime.datetime(int(dates[0]), int(dates[1]), int(dates[2]),
-        int(times[0]), int(times[1]), int(seconds), int(float('.'+microseconds) * 1000000))
+        int(times[0]), int(times[1]), int(seconds), _microseconds(fraction))
 
 def typecast_boolean(s):
     if s is None: return None
@@ -119,6 +204,16 @@ def truncate_name(name, length=None):
 
     return '%s%s' % (name[:length-4], hash)
 
+# Decimal('.1') ** decimal_places, by decimal_places.
+_quantizers = {}
+
+def _quantizer(decimal_places):
+    try:
+        return _quantizers[decimal_places]
+    except KeyError:
+        quantizer = _quantizers[decimal_places] = decimal.Decimal(".1") ** decimal_places
+        return quantizer
+
 def format_number(value, max_digits, decimal_places):
     """
     Formats a number into a string with the requisite number of digits and
@@ -127,6 +222,6 @@ def format_number(value, max_digits, decimal_places):
     if isinstance(value, decimal.Decimal):
         context = decimal.getcontext().copy()
         context.prec = max_digits
-        return u'%s' % str(value.quantize(decimal.Decimal(".1") ** decimal_places, context=context))
+        return u'%s' % str(value.quantize(_quantizer(decimal_places), context=context))
     else:
         return u"%.*f" % (decimal_places, value)
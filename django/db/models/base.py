@@ -8,8 +8,9 @@ from django.core import validators
 from django.db.models.fields import AutoField, FieldDoesNotExist
 from django.db.models.fields.related import OneToOneRel, ManyToOneRel, OneToOneField
 from django.db.models.query import delete_objects, Q
-from django.db.models.query_utils import CollectedObjects, DeferredAttribute
+from django.db.models.query_utils import CollectedObjects, DeferredAttribute, QueryWrapper
 from django.db.models.options import Options
+from django.db.models.session import get_session
 from django.db import connections, router, transaction, DatabaseError, DEFAULT_DB_ALIAS
 from django.db.models import signals
 from django.db.models.loading import register_models, get_model
@@ -427,10 +428,34 @@ class Model(object):
         """
         if force_insert and force_update:
             raise ValueError("Cannot force both insert and updating in model saving.")
+        session = get_session()
+        if session is not None:
+            # The write is deferred until the session is flushed.
+            session.add(self, force_insert=force_insert,
+                    force_update=force_update, using=using)
+            return
         self.save_base(using=using, force_insert=force_insert, force_update=force_update)
 
     save.alters_data = True
 
+    def asave(self, force_insert=False, force_update=False, using=None, executor=None):
+        """
+        Saves the instance on a worker thread of the executor (the default
+        one if not given) and returns a Future. Inside a unit-of-work
+        session the save is only recorded, so it happens right away.
+        """
+        from django.db.models.executor import Future, get_executor
+        if get_session() is not None:
+            self.save(force_insert=force_insert, force_update=force_update, using=using)
+            future = Future()
+            future._finish(None, None)
+            return future
+        using = using or router.db_for_write(self.__class__, instance=self)
+        return (executor or get_executor()).submit_for(using, self.save,
+                force_insert=force_insert, force_update=force_update, using=using)
+
+    asave.alters_data = True
+
     def save_base(self, raw=False, cls=None, origin=None, force_insert=False,
             force_update=False, using=None):
         """
@@ -483,6 +508,13 @@ class Model(object):
 
             # First, try an UPDATE. If that doesn't update anything, do an INSERT.
             pk_val = self._get_pk_val(meta)
+            key_allocator = getattr(meta.pk, 'key_allocator', None)
+            if pk_val is None and key_allocator is not None and not force_update:
+                # The primary key is handed out by Django; the object can't
+                # exist in the database yet.
+                pk_val = key_allocator.next_key(using)
+                setattr(self, meta.pk.attname, pk_val)
+                force_insert = True
             pk_set = pk_val is not None
             record_exists = True
             manager = cls._base_manager
@@ -510,7 +542,8 @@ class Model(object):
 
                 if meta.order_with_respect_to:
                     field = meta.order_with_respect_to
-                    values.append((meta.get_field_by_name('_order')[0], manager.using(using).filter(**{field.name: getattr(self, field.attname)}).count()))
+                    values.append((meta.get_field_by_name('_order')[0],
+                            self._get_next_order_value(field, connection, using)))
                 record_exists = False
 
                 update_pk = bool(meta.has_auto_field and not pk_set)
@@ -591,7 +624,13 @@ class Model(object):
             # delete it and all its descendents.
             parent_obj._collect_sub_objects(seen_objs)
 
-    def delete(self, using=None):
+    def delete(self, using=None, batch_size=None):
+        session = get_session()
+        if session is not None:
+            # The delete is deferred until the session is flushed.
+            session.delete(self, using=using)
+            return
+
         using = using or router.db_for_write(self.__class__, instance=self)
         connection = connections[using]
         assert self._get_pk_val() is not None, "%s object can't be deleted because its %s attribute is set to None." % (self._meta.object_name, self._meta.pk.attname)
@@ -601,7 +640,7 @@ class Model(object):
         self._collect_sub_objects(seen_objs)
 
         # Actually delete the objects.
-        delete_objects(seen_objs, using)
+        delete_objects(seen_objs, using, batch_size)
 
     delete.alters_data = True
 
@@ -621,6 +660,21 @@ class Model(object):
         except IndexError:
             raise self.DoesNotExist("%s matching query does not exist." % self.__class__._meta.object_name)
 
+    def _get_next_order_value(self, field, connection, using):
+        """
+        Returns the value of the '_order' column for a new record that is
+        ordered with respect to 'field'. Where the backend allows it, this is
+        a subquery evaluated by the INSERT itself rather than a separate
+        query.
+        """
+        rel_val = getattr(self, field.attname)
+        if rel_val is None or not connection.features.update_can_self_select:
+            return self.__class__._base_manager.using(using).filter(**{field.name: rel_val}).count()
+        qn = connection.ops.quote_name
+        return QueryWrapper('(SELECT COALESCE(MAX(%s) + 1, 0) FROM %s WHERE %s = %%s)' % (
+                qn('_order'), qn(self._meta.db_table), qn(field.column)),
+                [field.get_db_prep_save(rel_val, connection=connection)])
+
     def _get_next_or_previous_in_order(self, is_next):
         cachename = "__%s_order_cache" % is_next
         if not hasattr(self, cachename):
@@ -870,10 +924,11 @@ def method_set_order(ordered_obj, self, id_list, using=None):
         using = DEFAULT_DB_ALIAS
     rel_val = getattr(self, ordered_obj._meta.order_with_respect_to.rel.field_name)
     order_name = ordered_obj._meta.order_with_respect_to.name
-    # FIXME: It would be nice if there was an "update many" version of update
-    # for situations like this.
-    for i, j in enumerate(id_list):
-        ordered_obj.objects.filter(**{'pk': j, order_name: rel_val}).update(_order=i)
+    order_field = ordered_obj._meta.get_field_by_name('_order')[0]
+    # All the records are renumbered by a single UPDATE (or one per batch,
+    # for very long lists).
+    ordered_obj.objects.using(using).filter(**{order_name: rel_val})._update_batch(
+            [order_field], [(pk_val, (i,)) for i, pk_val in enumerate(id_list)])
     transaction.commit_unless_managed(using=using)
 
 
@@ -0,0 +1,328 @@
+"""
+Running ORM calls on a pool of worker threads, for callers that mustn't
+block -- event-loop based servers, for instance.
+
+QuerySet.afetch(), QuerySet.acount(), QuerySet.aiterator() and
+Model.asave() hand their work to a QueryExecutor and return a Future
+straight away:
+
+    >>> future = Book.objects.filter(published=True).afetch()
+    >>> future.add_done_callback(lambda f: render(f.result()))
+
+Each worker thread has connections of its own, which only it uses. The
+number of calls queued or running at once is bounded; once the bound is
+reached, handing over another call blocks until one finishes.
+"""
+
+import sys
+import thread
+import threading
+import Queue
+
+from django.db import connections, transaction
+
+class TimeoutError(Exception):
+    "The result of a Future wasn't ready in time."
+    pass
+
+class Future(object):
+    """
+    The result of a call made on a worker thread.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._done = False
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        return self._done
+
+    def _wait(self, timeout):
+        self._condition.acquire()
+        try:
+            if not self._done:
+                self._condition.wait(timeout)
+            if not self._done:
+                raise TimeoutError("The result wasn't ready after %s seconds." % timeout)
+        finally:
+            self._condition.release()
+
+    def result(self, timeout=None):
+        """
+        Waits up to timeout seconds (forever by default) for the call to
+        finish and returns its result, or raises its exception.
+        """
+        self._wait(timeout)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        """
+        Waits like result(), and returns the exception the call raised, or
+        None.
+        """
+        self._wait(timeout)
+        if self._exc_info is not None:
+            return self._exc_info[1]
+        return None
+
+    def add_done_callback(self, func):
+        """
+        Arranges for func(future) to be called when the call finishes, on the
+        thread that ran it. If the call already finished, func is called
+        right away.
+        """
+        self._condition.acquire()
+        try:
+            if not self._done:
+                self._callbacks.append(func)
+                return
+        finally:
+            self._condition.release()
+        func(self)
+
+    def _finish(self, result, exc_info):
+        self._condition.acquire()
+        try:
+            self._result, self._exc_info = result, exc_info
+            self._done = True
+            self._condition.notifyAll()
+            callbacks, self._callbacks = self._callbacks, []
+        finally:
+            self._condition.release()
+        for func in callbacks:
+            func(self)
+
+def _call(future, func, args, kwargs):
+    try:
+        result = func(*args, **kwargs)
+    except Exception:
+        future._finish(None, sys.exc_info())
+    else:
+        future._finish(result, None)
+
+class _Worker(threading.Thread):
+    def __init__(self, executor):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.executor = executor
+        self.jobs = Queue.Queue()
+        # The number of calls queued or running on this worker.
+        self.pending = 0
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            try:
+                try:
+                    _call(*job)
+                finally:
+                    self._end_transactions()
+            finally:
+                self.executor._finished(self)
+        # Close the connections this thread opened.
+        for connection in connections.all():
+            connection.close()
+
+    def _end_transactions(self):
+        """
+        Rolls back what a call left uncommitted, so that the next call on this
+        worker doesn't run inside its transaction. A connection left under
+        transaction management, or that can't be rolled back, is closed.
+        """
+        thread_ident = thread.get_ident()
+        for connection in connections.all():
+            if connection.connection is None:
+                continue
+            alias = connection.alias
+            if transaction.state.get(thread_ident, {}).get(alias) or transaction.is_dirty(using=alias):
+                connection.close()
+            else:
+                try:
+                    connection._rollback()
+                except Exception:
+                    connection.close()
+        transaction.state.pop(thread_ident, None)
+        transaction.dirty.pop(thread_ident, None)
+        transaction.savepoint_state.pop(thread_ident, None)
+
+class QueryExecutor(object):
+    """
+    A pool of at most max_workers threads that runs ORM calls. At most
+    max_in_flight calls (four per worker by default) can be queued or
+    running at once.
+    """
+    def __init__(self, max_workers=4, max_in_flight=None):
+        if max_workers < 1:
+            raise ValueError("A QueryExecutor needs at least one worker.")
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight or max_workers * 4
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._workers = []
+        self._in_flight = 0
+        self._shutdown = False
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) on a worker thread and returns a Future of
+        its result.
+        """
+        return self._submit(None, func, args, kwargs)[0]
+
+    def submit_for(self, alias, func, *args, **kwargs):
+        """
+        Like submit(), for a call that queries the database with the given
+        alias. Databases that can't be reached from another thread, such as
+        in-memory SQLite databases, are queried from the calling thread, and
+        the Future returned is already done.
+        """
+        if not connections[alias].can_connect_from_threads():
+            future = Future()
+            _call(future, func, args, kwargs)
+            return future
+        return self.submit(func, *args, **kwargs)
+
+    def _submit(self, worker, func, args, kwargs):
+        """
+        Queues a call on the given worker, or on the least busy one, and
+        returns its Future and the worker.
+        """
+        if self._shutdown:
+            raise RuntimeError("Can't submit calls to a QueryExecutor that was shut down.")
+        # Blocks while max_in_flight calls are pending.
+        self._slots.acquire()
+        self._lock.acquire()
+        try:
+            if worker is None:
+                worker = self._choose_worker()
+            worker.pending += 1
+            self._in_flight += 1
+        finally:
+            self._lock.release()
+        future = Future()
+        worker.jobs.put((future, func, args, kwargs))
+        return future, worker
+
+    def _choose_worker(self):
+        idle = [w for w in self._workers if not w.pending]
+        if idle:
+            return idle[0]
+        if len(self._workers) < self.max_workers:
+            worker = _Worker(self)
+            worker.start()
+            self._workers.append(worker)
+            return worker
+        return min([(w.pending, i, w) for i, w in enumerate(self._workers)])[2]
+
+    def _finished(self, worker):
+        self._lock.acquire()
+        try:
+            worker.pending -= 1
+            self._in_flight -= 1
+        finally:
+            self._lock.release()
+        self._slots.release()
+
+    def stats(self):
+        """
+        Returns a dictionary with the number of worker threads and of calls
+        queued or running.
+        """
+        self._lock.acquire()
+        try:
+            return {'workers': len(self._workers), 'in_flight': self._in_flight,
+                    'max_in_flight': self.max_in_flight}
+        finally:
+            self._lock.release()
+
+    def shutdown(self, wait=True):
+        """
+        Stops the worker threads once the calls already submitted have run,
+        and closes their connections.
+        """
+        self._lock.acquire()
+        try:
+            self._shutdown = True
+            workers, self._workers = self._workers, []
+        finally:
+            self._lock.release()
+        for worker in workers:
+            worker.jobs.put(None)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+class ChunkedIterator(object):
+    """
+    Fetches the results of a QuerySet in chunks on a worker thread. Every
+    chunk is read on the same thread, from the same cursor, so results are
+    never all held in memory at once.
+    """
+    def __init__(self, queryset, chunk_size, executor):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self.local = not connections[queryset.db].can_connect_from_threads()
+        self._worker = None
+        self._iterator = None
+
+    def next_chunk(self):
+        """
+        Returns a Future of a list of the next chunk_size results at most. The
+        list is empty once the results are exhausted.
+        """
+        if self.local:
+            future = Future()
+            _call(future, self._read_chunk, (), {})
+            return future
+        future, self._worker = self.executor._submit(self._worker, self._read_chunk, (), {})
+        return future
+
+    def _read_chunk(self):
+        if self._iterator is None:
+            self._iterator = self.queryset.iterator()
+        chunk = []
+        for obj in self._iterator:
+            chunk.append(obj)
+            if len(chunk) == self.chunk_size:
+                break
+        return chunk
+
+    def close(self):
+        """
+        Drops the cursor, on the thread that reads from it. Returns a Future.
+        """
+        if self.local or self._worker is None:
+            self._iterator = None
+            future = Future()
+            future._finish(None, None)
+            return future
+        return self.executor._submit(self._worker, self._close, (), {})[0]
+
+    def _close(self):
+        self._iterator = None
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+def get_executor():
+    """
+    Returns the QueryExecutor used when none is given, creating it on first
+    use.
+    """
+    global _default_executor
+    _default_executor_lock.acquire()
+    try:
+        if _default_executor is None:
+            _default_executor = QueryExecutor()
+        return _default_executor
+    finally:
+        _default_executor_lock.release()
@@ -0,0 +1,93 @@
+try:
+    from threading import local
+except ImportError:
+    from django.utils._threading_local import local
+
+from django.db import connections, transaction
+from django.db.models.fields import IntegerField
+from django.utils.translation import ugettext_lazy as _
+
+class KeyAllocator(object):
+    """
+    Hands out primary key values from blocks of block_size keys reserved in
+    the database, so that a round trip to the database is only needed once
+    every block_size new objects.
+
+    Blocks are kept per thread and per database. A block reserved from a
+    table (rather than from a native sequence) inside a transaction is
+    thrown away if the connection rolls anything back, since the rollback
+    may have undone the reservation.
+    """
+    def __init__(self, sequence_name, block_size):
+        assert block_size > 0, "The key block size must be positive."
+        self.sequence_name = sequence_name
+        self.block_size = block_size
+        self._blocks = local()
+
+    def next_key(self, using):
+        """
+        Returns a new primary key value for an object saved to the database
+        with alias 'using'.
+        """
+        return self.reserve(1, using)[0]
+
+    def reserve(self, count, using):
+        """
+        Returns a list of 'count' new primary key values for objects saved
+        to the database with alias 'using'.
+        """
+        connection = connections[using]
+        blocks = self._blocks.__dict__
+        keys = []
+        while len(keys) < count:
+            block = blocks.get(using)
+            if (block is None or block[0] >= block[1] or
+                    (block[2] is not None and block[2] != connection.rollback_count)):
+                block = blocks[using] = self._reserve_block(using)
+            taken = min(count - len(keys), block[1] - block[0])
+            keys.extend(range(block[0], block[0] + taken))
+            block[0] += taken
+        return keys
+
+    def _reserve_block(self, using):
+        """
+        Reserves a new block and returns it as a [next, end, rollback_count]
+        list; rollback_count is None if the reservation can't be undone.
+        """
+        connection = connections[using]
+        cursor = connection.cursor()
+        start = connection.ops.reserve_key_block(cursor, self.sequence_name,
+                self.block_size)
+        rollback_count = None
+        if not connection.features.has_native_key_sequences:
+            if transaction.is_managed(using=using):
+                transaction.set_dirty(using=using)
+                rollback_count = connection.rollback_count
+            else:
+                transaction.commit_unless_managed(using=using)
+        return [start, start + self.block_size, rollback_count]
+
+class HiLoField(IntegerField):
+    """
+    An integer primary key whose values are assigned by Django before the
+    object is inserted, from blocks of keys reserved in the database, instead
+    of by the database itself. Objects with such a key can be inserted
+    without asking the database for the new key afterwards, which allows
+    many of them to be written with a single statement.
+    """
+    description = _("Integer")
+
+    def __init__(self, *args, **kwargs):
+        assert kwargs.get('primary_key', False) is True, "%ss must have primary_key=True." % self.__class__.__name__
+        self.block_size = kwargs.pop('block_size', 100)
+        self.sequence_name = kwargs.pop('sequence_name', None)
+        kwargs['blank'] = True
+        IntegerField.__init__(self, *args, **kwargs)
+
+    def validate(self, value, model_instance):
+        pass
+
+    def contribute_to_class(self, cls, name):
+        super(HiLoField, self).contribute_to_class(cls, name)
+        sequence_name = self.sequence_name or '%s_%s_hilo' % (cls._meta.db_table, self.column)
+        self.key_allocator = KeyAllocator(sequence_name, self.block_size)
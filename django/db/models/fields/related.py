@@ -1,11 +1,11 @@
 from django.conf import settings
-from django.db import connection, router, transaction
+from django.db import connection, connections, router, transaction
 from django.db.backends import util
 from django.db.models import signals, get_model
 from django.db.models.fields import (AutoField, Field, IntegerField,
     PositiveIntegerField, PositiveSmallIntegerField, FieldDoesNotExist)
 from django.db.models.related import RelatedObject
-from django.db.models.query import QuerySet
+from django.db.models.query import QuerySet, bulk_insert_query
 from django.db.models.query_utils import QueryWrapper
 from django.utils.encoding import smart_unicode
 from django.utils.translation import ugettext_lazy as _, string_concat, ungettext, ugettext
@@ -476,6 +476,28 @@ def create_many_related_manager(superclass, rel=False):
                     self._remove_items(self.target_field_name, self.source_field_name, *objs)
             remove.alters_data = True
 
+            def set(self, objs):
+                """
+                Makes objs the complete set of related objects. Only the
+                differences with the current set are written: one DELETE for
+                the rows that go away and one INSERT for the new ones.
+                """
+                new_ids = self._get_target_ids(objs)
+                db = router.db_for_write(self.through.__class__, instance=self.instance)
+                old_ids = set(self.through._default_manager.using(db).values_list(
+                    self.target_field_name, flat=True).filter(**{
+                        self.source_field_name: self._pk_val,
+                    }))
+                removed_ids = old_ids - new_ids
+                added_ids = new_ids - old_ids
+                if removed_ids:
+                    self.remove(*removed_ids)
+                if added_ids:
+                    self._insert_items(self.source_field_name, self.target_field_name, added_ids, db)
+                    if self.symmetrical:
+                        self._add_items(self.target_field_name, self.source_field_name, *added_ids)
+            set.alters_data = True
+
         def clear(self):
             self._clear_items(self.source_field_name)
 
@@ -514,19 +536,8 @@ def create_many_related_manager(superclass, rel=False):
             # *objs - objects to add. Either object instances, or primary keys of object instances.
 
             # If there aren't any objects, there is nothing to do.
-            from django.db.models import Model
             if objs:
-                new_ids = set()
-                for obj in objs:
-                    if isinstance(obj, self.model):
-                        if not router.allow_relation(obj, self.instance):
-                           raise ValueError('Cannot add "%r": instance is on database "%s", value is is on database "%s"' %
-                                               (obj, self.instance._state.db, obj._state.db))
-                        new_ids.add(obj.pk)
-                    elif isinstance(obj, Model):
-                        raise TypeError("'%s' instance expected" % self.model._meta.object_name)
-                    else:
-                        new_ids.add(obj)
+                new_ids = self._get_target_ids(objs)
                 db = router.db_for_write(self.through.__class__, instance=self.instance)
                 vals = self.through._default_manager.using(db).values_list(target_field_name, flat=True)
                 vals = vals.filter(**{
@@ -535,17 +546,45 @@ def create_many_related_manager(superclass, rel=False):
                 })
                 new_ids = new_ids - set(vals)
                 # Add the ones that aren't there already
-                for obj_id in new_ids:
-                    self.through._default_manager.using(db).create(**{
-                        '%s_id' % source_field_name: self._pk_val,
-                        '%s_id' % target_field_name: obj_id,
-                    })
-                if self.reverse or source_field_name == self.source_field_name:
-                    # Don't send the signal when we are inserting the
-                    # duplicate data row for symmetrical reverse entries.
-                    signals.m2m_changed.send(sender=rel.through, action='add',
-                        instance=self.instance, reverse=self.reverse,
-                        model=self.model, pk_set=new_ids)
+                self._insert_items(source_field_name, target_field_name, new_ids, db)
+
+        def _get_target_ids(self, objs):
+            # Returns the set of primary keys for objs, which are either
+            # object instances or primary keys of object instances.
+            from django.db.models import Model
+            target_ids = set()
+            for obj in objs:
+                if isinstance(obj, self.model):
+                    if not router.allow_relation(obj, self.instance):
+                       raise ValueError('Cannot add "%r": instance is on database "%s", value is is on database "%s"' %
+                                           (obj, self.instance._state.db, obj._state.db))
+                    target_ids.add(obj.pk)
+                elif isinstance(obj, Model):
+                    raise TypeError("'%s' instance expected" % self.model._meta.object_name)
+                else:
+                    target_ids.add(obj)
+            return target_ids
+
+        def _insert_items(self, source_field_name, target_field_name, new_ids, db):
+            # Writes one join table row per id in new_ids, all in a single
+            # multi-row INSERT where the backend allows it. The caller is
+            # responsible for leaving out the ids that are already related.
+            if new_ids:
+                opts = self.through._meta
+                connection = connections[db]
+                source_field = opts.get_field(source_field_name)
+                target_field = opts.get_field(target_field_name)
+                source_val = source_field.get_db_prep_save(self._pk_val, connection=connection)
+                rows = [(source_val, target_field.get_db_prep_save(obj_id, connection=connection))
+                        for obj_id in new_ids]
+                bulk_insert_query(self.through, [source_field, target_field], rows, using=db)
+                transaction.commit_unless_managed(using=db)
+            if self.reverse or source_field_name == self.source_field_name:
+                # Don't send the signal when we are inserting the
+                # duplicate data row for symmetrical reverse entries.
+                signals.m2m_changed.send(sender=rel.through, action='add',
+                    instance=self.instance, reverse=self.reverse,
+                    model=self.model, pk_set=new_ids)
 
         def _remove_items(self, source_field_name, target_field_name, *objs):
             # source_col_name: the PK colname in join_table for the source object
@@ -0,0 +1,145 @@
+import re
+
+from django.utils.hashcompat import md5_constructor
+
+field_ref_re = re.compile(r'%\((\w+)\)s')
+config_re = re.compile(r'^\w+$')
+
+class Index(object):
+    """
+    An index on the table of a model, declared in its Meta.indexes:
+
+        class Meta:
+            indexes = [
+                # Several columns; a leading "-" sorts a column descending.
+                Index('last_name', '-joined'),
+                # A partial index, on the rows matching some SQL.
+                Index('joined', where='%(is_active)s = 1'),
+                # An expression index.
+                Index('LOWER(%(email)s)', unique=True),
+            ]
+
+    In expressions and in the where clause, %(name)s stands for the quoted
+    column of the field called name, and literal percent signs must be
+    doubled.
+    """
+    # Added to the default name of the index.
+    name_suffix = None
+
+    def __init__(self, *fields, **kwargs):
+        if not fields:
+            raise ValueError("An Index needs at least one field or expression.")
+        self.fields = fields
+        self.name = kwargs.pop('name', None)
+        self.where = kwargs.pop('where', None)
+        self.unique = kwargs.pop('unique', False)
+        if kwargs:
+            raise TypeError("%s() got unexpected keyword arguments: %s" % (
+                self.__class__.__name__, ', '.join(kwargs.keys())))
+
+    def __repr__(self):
+        return '<Index: %s>' % ', '.join(self.fields)
+
+    def parts(self):
+        """
+        Returns a (field name or expression, is an expression, descending)
+        triple for each part of the index.
+        """
+        result = []
+        for part in self.fields:
+            descending = part.startswith('-')
+            if descending:
+                part = part[1:]
+            result.append((part, '(' in part, descending))
+        return result
+
+    def get_name(self, model, max_length=None):
+        """
+        Returns the name of the index on model's table: the one it was given,
+        or one made of the table and column names, with a hash of the rest of
+        its definition if it has expressions, descending columns or a where
+        clause, shortened to max_length.
+        """
+        from django.db.backends.util import truncate_name
+        if self.name:
+            return self.name
+        opts = model._meta
+        parts = [opts.db_table]
+        plain = not self.where
+        for part, is_expression, descending in self.parts():
+            if not is_expression:
+                parts.append(opts.get_field(part).column)
+            if is_expression or descending:
+                plain = False
+        if not plain:
+            parts.append(md5_constructor('%r %r' % (self.fields, self.where)).hexdigest()[:8])
+        if self.name_suffix:
+            parts.append(self.name_suffix)
+        return truncate_name('_'.join(parts), max_length)
+
+    def has_expressions(self):
+        for part, is_expression, descending in self.parts():
+            if is_expression:
+                return True
+        return False
+
+    def field_names(self):
+        """
+        Returns the names of all the fields the index refers to.
+        """
+        names = []
+        for part, is_expression, descending in self.parts():
+            if is_expression:
+                names.extend(field_ref_re.findall(part))
+            else:
+                names.append(part)
+        if self.where:
+            names.extend(field_ref_re.findall(self.where))
+        return names
+
+class SearchIndex(Index):
+    """
+    A full-text index on one or more text fields, used by the "search" lookup
+    and QuerySet.search():
+
+        class Meta:
+            indexes = [SearchIndex('title', 'body')]
+
+    On SQLite, it's a shadow FTS5 (or FTS4) table kept up to date by
+    triggers; on PostgreSQL, a GIN index on to_tsvector() of each field, in
+    the text search configuration given by config; on MySQL, a FULLTEXT
+    index on each field.
+    """
+    name_suffix = 'search'
+
+    def __init__(self, *fields, **kwargs):
+        self.config = kwargs.pop('config', 'english')
+        if not config_re.match(self.config):
+            raise ValueError("Invalid text search configuration %r." % self.config)
+        super(SearchIndex, self).__init__(*fields, **kwargs)
+        for part, is_expression, descending in self.parts():
+            if is_expression or descending:
+                raise ValueError("A SearchIndex can only be made of field names.")
+        if self.where or self.unique:
+            raise ValueError("A SearchIndex can't be partial or unique.")
+
+def search_index_for(field):
+    """
+    Returns the SearchIndex of the model of field that covers it, or None.
+    """
+    for index in field.model._meta.indexes:
+        if isinstance(index, SearchIndex) and field.name in index.fields:
+            return index
+    return None
+
+class ColumnReferences(object):
+    """
+    Maps the names of a model's fields to their quoted columns, to fill in the
+    %(name)s references of an Index's expressions and where clause.
+    """
+    def __init__(self, model, quote_name):
+        self.opts = model._meta
+        self.quote_name = quote_name
+
+    def __getitem__(self, name):
+        return self.quote_name(self.opts.get_field(name).column)
@@ -188,6 +188,30 @@ class Manager(object):
     def using(self, *args, **kwargs):
         return self.get_query_set().using(*args, **kwargs)
 
+    def timeout(self, *args, **kwargs):
+        return self.get_query_set().timeout(*args, **kwargs)
+
+    def scatter(self, *args, **kwargs):
+        return self.get_query_set().scatter(*args, **kwargs)
+
+    def afetch(self, *args, **kwargs):
+        return self.get_query_set().afetch(*args, **kwargs)
+
+    def acount(self, *args, **kwargs):
+        return self.get_query_set().acount(*args, **kwargs)
+
+    def aiterator(self, *args, **kwargs):
+        return self.get_query_set().aiterator(*args, **kwargs)
+
+    def copy_from(self, *args, **kwargs):
+        return self.get_query_set().copy_from(*args, **kwargs)
+
+    def copy_to(self, *args, **kwargs):
+        return self.get_query_set().copy_to(*args, **kwargs)
+
+    def search(self, *args, **kwargs):
+        return self.get_query_set().search(*args, **kwargs)
+
     def exists(self, *args, **kwargs):
         return self.get_query_set().exists(*args, **kwargs)
 
@@ -21,7 +21,7 @@ get_verbose_name = lambda class_name: re.sub('(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|
 DEFAULT_NAMES = ('verbose_name', 'db_table', 'ordering',
                  'unique_together', 'permissions', 'get_latest_by',
                  'order_with_respect_to', 'app_label', 'db_tablespace',
-                 'abstract', 'managed', 'proxy', 'auto_created')
+                 'abstract', 'managed', 'proxy', 'auto_created', 'indexes')
 
 class Options(object):
     def __init__(self, meta, app_label=None):
@@ -32,6 +32,7 @@ class Options(object):
         self.db_table = ''
         self.ordering = []
         self.unique_together =  []
+        self.indexes = []
         self.permissions =  []
         self.object_name, self.app_label = None, app_label
         self.get_latest_by = None
@@ -8,7 +8,7 @@ from django.db import connections, router, transaction, IntegrityError
 from django.db.models.aggregates import Aggregate
 from django.db.models.fields import DateField
 from django.db.models.query_utils import Q, select_related_descend, CollectedObjects, CyclicDependency, deferred_class_factory, InvalidQuery
-from django.db.models import signals, sql
+from django.db.models import session, signals, sql
 from django.utils.copycompat import deepcopy
 
 # Used to control how many objects are worked with at once in some cases (e.g.
@@ -347,7 +347,13 @@ class QuerySet(object):
         """
         obj = self.model(**kwargs)
         self._for_write = True
-        obj.save(force_insert=True, using=self.db)
+        # The object is returned saved, even inside a unit-of-work session.
+        session.suspend()
+        try:
+            # Unless a database was chosen, let the routers see the instance.
+            obj.save(force_insert=True, using=self._db)
+        finally:
+            session.resume()
         return obj
 
     def get_or_create(self, **kwargs):
@@ -368,7 +374,11 @@ class QuerySet(object):
                 params.update(defaults)
                 obj = self.model(**params)
                 sid = transaction.savepoint(using=self.db)
-                obj.save(force_insert=True, using=self.db)
+                session.suspend()
+                try:
+                    obj.save(force_insert=True, using=self.db)
+                finally:
+                    session.resume()
                 transaction.savepoint_commit(sid, using=self.db)
                 return obj, True
             except IntegrityError, e:
@@ -407,9 +417,10 @@ class QuerySet(object):
         qs.query.add_filter(('pk__in', id_list))
         return dict([(obj._get_pk_val(), obj) for obj in qs.iterator()])
 
-    def delete(self):
+    def delete(self, batch_size=None):
         """
-        Deletes the records in the current QuerySet.
+        Deletes the records in the current QuerySet, batch_size at a time (by
+        default, as many as the database's preferred_batch_size feature).
         """
         assert self.query.can_filter(), \
                 "Cannot use 'limit' or 'offset' with delete."
@@ -427,17 +438,19 @@ class QuerySet(object):
 
         # Delete objects in chunks to prevent the list of related objects from
         # becoming too long.
+        chunk_size = sql.subqueries.get_batch_size(connections[del_query.db],
+                batch_size)
         seen_objs = None
         while 1:
             # Collect all the objects to be deleted in this chunk, and all the
             # objects that are related to the objects that are to be deleted.
             seen_objs = CollectedObjects(seen_objs)
-            for object in del_query[:CHUNK_SIZE]:
+            for object in del_query[:chunk_size]:
                 object._collect_sub_objects(seen_objs)
 
             if not seen_objs:
                 break
-            delete_objects(seen_objs, del_query.db)
+            delete_objects(seen_objs, del_query.db, batch_size)
 
         # Clear the result cache, in case this QuerySet gets reused.
         self._result_cache = None
@@ -486,6 +499,22 @@ class QuerySet(object):
         return query.get_compiler(self.db).execute_sql(None)
     _update.alters_data = True
 
+    def _update_batch(self, fields, rows):
+        """
+        Writes a different set of values to each of several records matched
+        by this QuerySet. 'rows' is a sequence of (pk_val, values) pairs, as
+        for bulk_update_query(); records that aren't matched by the QuerySet
+        are left alone. Returns the number of rows affected. Not intended for
+        use by general code.
+        """
+        assert self.query.can_filter(), \
+                "Cannot update a query once a slice has been taken."
+        query = self.query.clone(sql.UpdateQuery)
+        query.update_batch(fields, rows)
+        self._result_cache = None
+        return query.get_compiler(self.db).execute_batch_sql()
+    _update_batch.alters_data = True
+
     def exists(self):
         if self._result_cache is None:
             return self.query.has_results(using=self.db)
@@ -703,6 +732,85 @@ class QuerySet(object):
         clone._db = alias
         return clone
 
+    def timeout(self, seconds):
+        """
+        Returns a new QuerySet whose queries are cancelled, raising
+        QueryTimeout, if they run for longer than seconds. None uses the
+        database's default (the 'query_timeout' option), and 0 means no
+        limit.
+        """
+        clone = self._clone()
+        clone.query.timeout = seconds
+        return clone
+
+    def scatter(self, aliases, max_workers=None):
+        """
+        Returns an object that runs this QuerySet on each of the given
+        databases concurrently and gathers the results.
+        """
+        from django.db.models.scatter import Scatter
+        return Scatter(self, aliases, max_workers)
+
+    def afetch(self, executor=None):
+        """
+        Evaluates the QuerySet on a worker thread of the executor (the
+        default one if not given) and returns a Future of the list of
+        results.
+        """
+        from django.db.models.executor import get_executor
+        clone = self._clone()
+        return (executor or get_executor()).submit_for(clone.db, list, clone)
+
+    def acount(self, executor=None):
+        """
+        Like count(), on a worker thread. Returns a Future.
+        """
+        from django.db.models.executor import get_executor
+        clone = self._clone()
+        return (executor or get_executor()).submit_for(clone.db, clone.count)
+
+    def aiterator(self, chunk_size=100, executor=None):
+        """
+        Returns a ChunkedIterator, whose next_chunk() method fetches the next
+        chunk_size results on a worker thread and returns a Future of them.
+        """
+        from django.db.models.executor import ChunkedIterator, get_executor
+        return ChunkedIterator(self._clone(), chunk_size, executor or get_executor())
+
+    def copy_from(self, source, fields=None, format='csv'):
+        """
+        Loads the rows of source, an iterable of rows or a file, into the
+        model's table, with COPY where the backend supports it. Returns the
+        number of rows loaded. See django.db.models.transfer.
+        """
+        from django.db.models.transfer import copy_from
+        self._for_write = True
+        return copy_from(self.model, source, fields, format, using=self.db)
+    copy_from.alters_data = True
+
+    def copy_to(self, fileobj, fields=None, format='csv'):
+        """
+        Writes the values of the given fields of every result to fileobj,
+        with COPY where the backend supports it.
+        """
+        from django.db.models.transfer import copy_to
+        copy_to(self, fileobj, fields, format)
+
+    def search(self, field_name, query, rank='rank'):
+        """
+        Returns a new QuerySet of the results whose field_name matches a
+        full-text search for query, each with its relevance (the higher, the
+        better) as an extra attribute called rank.
+        """
+        field = self.model._meta.get_field(field_name)
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(field.model._meta.db_table)
+        sql, params = connection.ops.search_rank_sql(
+                '%s.%s' % (table, qn(field.column)), query, field, table)
+        clone = self.filter(**{'%s__search' % field_name: query})
+        return clone.extra(select={rank: sql}, select_params=params)
+
     ###################################
     # PUBLIC INTROSPECTION ATTRIBUTES #
     ###################################
@@ -1012,7 +1120,10 @@ class EmptyQuerySet(QuerySet):
     def count(self):
         return 0
 
-    def delete(self):
+    def delete(self, batch_size=None):
+        pass
+
+    def copy_to(self, fileobj, fields=None, format='csv'):
         pass
 
     def _clone(self, klass=None, setup=False, **kwargs):
@@ -1238,10 +1349,11 @@ def get_cached_row(klass, row, index_start, max_depth=0, cur_depth=0,
 
     return obj, index_end
 
-def delete_objects(seen_objs, using):
+def delete_objects(seen_objs, using, batch_size=None):
     """
     Iterate through a list of seen classes, and remove any instances that are
-    referred to.
+    referred to. Queries name at most batch_size primary keys each (see
+    sql.subqueries.get_batch_size()).
     """
     connection = connections[using]
     if not transaction.is_managed(using=using):
@@ -1258,6 +1370,12 @@ def delete_objects(seen_objs, using):
         # try anyway.
         ordered_classes = seen_objs.unordered_keys()
 
+    # Only passed on when given, so that query subclasses written before
+    # batch_size was added keep working.
+    batch_kwargs = {}
+    if batch_size is not None:
+        batch_kwargs['batch_size'] = batch_size
+
     obj_pairs = {}
     try:
         for cls in ordered_classes:
@@ -1265,14 +1383,17 @@ def delete_objects(seen_objs, using):
             items.sort()
             obj_pairs[cls] = items
 
-            # Pre-notify all instances to be deleted.
-            for pk_val, instance in items:
-                if not cls._meta.auto_created:
+            # Pre-notify all instances to be deleted, first as a batch and
+            # then one at a time.
+            if not cls._meta.auto_created:
+                signals.pre_bulk_delete.send(sender=cls,
+                        instances=[instance for pk_val, instance in items])
+                for pk_val, instance in items:
                     signals.pre_delete.send(sender=cls, instance=instance)
 
             pk_list = [pk for pk,instance in items]
             del_query = sql.DeleteQuery(cls)
-            del_query.delete_batch_related(pk_list, using=using)
+            del_query.delete_batch_related(pk_list, using=using, **batch_kwargs)
 
             update_query = sql.UpdateQuery(cls)
             for field, model in cls._meta.get_fields_with_model():
@@ -1280,9 +1401,11 @@ def delete_objects(seen_objs, using):
                         filter(lambda f: f.column == field.rel.get_related_field().column,
                         field.rel.to._meta.fields)):
                     if model:
-                        sql.UpdateQuery(model).clear_related(field, pk_list, using=using)
+                        sql.UpdateQuery(model).clear_related(field, pk_list,
+                                using=using, **batch_kwargs)
                     else:
-                        update_query.clear_related(field, pk_list, using=using)
+                        update_query.clear_related(field, pk_list,
+                                using=using, **batch_kwargs)
 
         # Now delete the actual data.
         for cls in ordered_classes:
@@ -1291,11 +1414,12 @@ def delete_objects(seen_objs, using):
 
             pk_list = [pk for pk,instance in items]
             del_query = sql.DeleteQuery(cls)
-            del_query.delete_batch(pk_list, using=using)
+            del_query.delete_batch(pk_list, using=using, **batch_kwargs)
 
             # Last cleanup; set NULLs where there once was a reference to the
-            # object, NULL the primary key of the found objects, and perform
-            # post-notification.
+            # object, perform post-notification and NULL the primary key of
+            # the found objects. The batch notification is sent before the
+            # primary keys are cleared so receivers can still identify rows.
             for pk_val, instance in items:
                 for field in cls._meta.fields:
                     if field.rel and field.null and field.rel.to in seen_objs:
@@ -1303,6 +1427,10 @@ def delete_objects(seen_objs, using):
 
                 if not cls._meta.auto_created:
                     signals.post_delete.send(sender=cls, instance=instance)
+            if not cls._meta.auto_created:
+                signals.post_bulk_delete.send(sender=cls,
+                        instances=[instance for pk_val, instance in items])
+            for pk_val, instance in items:
                 setattr(instance, cls._meta.pk.attname, None)
 
         if forced_managed:
@@ -1426,3 +1554,26 @@ def insert_query(model, values, return_id=False, raw_values=False, using=None):
     query = sql.InsertQuery(model)
     query.insert_values(values, raw_values)
     return query.get_compiler(using=using).execute_sql(return_id)
+
+def bulk_insert_query(model, fields, rows, using=None):
+    """
+    Inserts several new records for the given model, using as few statements
+    as the backend allows. Each item of 'rows' is a tuple of values for
+    'fields', already prepared for the database. It is not part of the public
+    API.
+    """
+    query = sql.InsertQuery(model)
+    query.insert_batch(fields, rows)
+    query.get_compiler(using=using).execute_batch_sql()
+
+def bulk_update_query(model, fields, rows, using=None):
+    """
+    Updates several existing records for the given model, writing a different
+    set of values to each of them with as few statements as possible. 'rows'
+    is a sequence of (pk_val, values) pairs, where values is a tuple of values
+    for 'fields', already prepared for the database. Returns the number of
+    rows affected. It is not part of the public API.
+    """
+    query = sql.UpdateQuery(model)
+    query.update_batch(fields, rows)
+    return query.get_compiler(using=using).execute_batch_sql()
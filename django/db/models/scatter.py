@@ -0,0 +1,427 @@
+"""
+Running the same query against several databases at once.
+
+QuerySet.scatter() returns a Scatter, which runs the QuerySet against each
+of the given database aliases in a pool of threads and gathers the
+results:
+
+    >>> books = Book.objects.filter(published=True).order_by('-rating')
+    >>> sharded = books.scatter(['shard1', 'shard2', 'shard3'])
+    >>> sharded.count()
+    >>> sharded.aggregate(Max('rating'), Avg('pages'))
+    >>> for book in sharded[:20]:
+    ...     print book
+
+Each thread uses its own connections, so each database runs its part of the
+query on a connection of its own.
+"""
+
+import heapq
+import Queue
+import sys
+import threading
+
+from django.db import connections
+from django.db.models.aggregates import Count, Sum
+from django.db.models.sql.constants import LOOKUP_SEP
+
+# The number of results each database may get ahead of the merge while
+# iterating.
+STREAM_BUFFER_SIZE = 100
+
+# Marks the end of the results of a database in a stream queue.
+_DONE = object()
+
+def run_on_aliases(func, aliases, max_workers=None):
+    """
+    Calls func(alias) for each alias, in a pool of at most max_workers
+    threads (one per alias by default), and returns a dictionary mapping each
+    alias to the result. If a call raises an exception, the first one is
+    raised again here once all the calls have finished.
+
+    Databases that can't be reached from another thread, such as in-memory
+    SQLite databases, are queried from the calling thread instead.
+    """
+    results, errors = {}, []
+    threaded = [alias for alias in aliases
+            if connections[alias].can_connect_from_threads()]
+    local = [alias for alias in aliases if alias not in threaded]
+
+    jobs = Queue.Queue()
+    for alias in threaded:
+        jobs.put(alias)
+
+    def worker():
+        while True:
+            try:
+                alias = jobs.get_nowait()
+            except Queue.Empty:
+                return
+            try:
+                try:
+                    results[alias] = func(alias)
+                except Exception:
+                    errors.append(sys.exc_info())
+            finally:
+                # Release the connection this thread opened.
+                connections[alias].close()
+
+    threads = []
+    for i in range(min(max_workers or len(threaded), len(threaded))):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        threads.append(thread)
+    for alias in local:
+        try:
+            results[alias] = func(alias)
+        except Exception:
+            errors.append(sys.exc_info())
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+    return results
+
+class Descending(object):
+    """
+    Wraps a value so that it sorts in reverse order.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def __cmp__(self, other):
+        return cmp(other.value, self.value)
+
+def ordering_key(queryset):
+    """
+    Returns a function that maps a result of queryset to a value that sorts
+    the same way as the queryset's ordering, or None if the queryset isn't
+    ordered. Raises ValueError if the ordering can't be reproduced in
+    Python, for example if it spans relations.
+    """
+    from django.db.models.query import ValuesQuerySet, ValuesListQuerySet
+    query = queryset.query
+    opts = queryset.model._meta
+    if query.extra_order_by:
+        ordering = query.extra_order_by
+    elif query.order_by:
+        ordering = query.order_by
+    elif query.default_ordering and opts.ordering:
+        ordering = opts.ordering
+    else:
+        return None
+
+    getters = []
+    for name in ordering:
+        if not isinstance(name, basestring) or name == '?' or '.' in name or LOOKUP_SEP in name:
+            raise ValueError("Results ordered by %r can't be merged." % (name,))
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        attname = name
+        if name in query.extra_select or name in query.aggregate_select:
+            pass
+        elif name == 'pk':
+            attname = opts.pk.attname
+        else:
+            field = opts.get_field(name)
+            if field.rel and field.rel.to._meta.ordering and field.attname != name:
+                raise ValueError("Results ordered by %r can't be merged." % (name,))
+            attname = field.attname
+
+        if isinstance(queryset, ValuesListQuerySet):
+            if queryset._fields:
+                columns = list(queryset._fields)
+            else:
+                columns = query.extra_select.keys() + queryset.field_names + query.aggregate_select.keys()
+            if name in columns:
+                index = columns.index(name)
+            elif attname in columns:
+                index = columns.index(attname)
+            else:
+                raise ValueError("Results must include %r to be merged." % (name,))
+            if queryset.flat and len(queryset._fields) == 1:
+                getter = lambda row: row
+            else:
+                getter = lambda row, index=index: row[index]
+        elif isinstance(queryset, ValuesQuerySet):
+            getter = lambda row, name=name, attname=attname: row.get(name, row.get(attname))
+        else:
+            getter = lambda obj, attname=attname: getattr(obj, attname)
+        if descending:
+            getter = lambda item, getter=getter: Descending(getter(item))
+        getters.append(getter)
+    return lambda item: tuple([getter(item) for getter in getters])
+
+class _StreamState(object):
+    """
+    What the fetching threads of a MergeIterator share with it. Kept apart
+    from the iterator so that the threads don't keep it alive.
+    """
+    def __init__(self):
+        self.stopped = False
+        self.errors = []
+
+def _fetch(queryset, queue, state, close):
+    """
+    Puts the results of queryset on queue, followed by _DONE, unless the
+    consumer stops first.
+    """
+    try:
+        try:
+            for item in queryset.iterator():
+                if not _put(queue, item, state):
+                    return
+        except Exception:
+            state.errors.append(sys.exc_info())
+    finally:
+        _put(queue, _DONE, state)
+        if close:
+            # Release the connection this thread opened.
+            connections[queryset.db].close()
+
+def _put(queue, item, state):
+    while not state.stopped:
+        try:
+            queue.put(item, True, 0.1)
+            return True
+        except Queue.Full:
+            pass
+    return False
+
+class MergeIterator(object):
+    """
+    Iterates over the results of a QuerySet on several databases, which are
+    fetched in background threads. If sort_key is given, each database's
+    results are assumed to be sorted by it and are merged in order;
+    otherwise results are returned as they arrive.
+    """
+    def __init__(self, queryset, aliases, sort_key=None):
+        self.sort_key = sort_key
+        self.state = _StreamState()
+        self.heap = None
+        # The queues the results are read from, in order. Databases that
+        # are queried from this thread get an unbounded queue each, filled
+        # up front; in unordered mode, the others share one queue.
+        self.queues = []
+        shared = None
+        local = []
+        for alias in aliases:
+            if not connections[alias].can_connect_from_threads():
+                queue = Queue.Queue()
+                local.append((queryset.using(alias), queue))
+            elif sort_key is not None:
+                queue = Queue.Queue(STREAM_BUFFER_SIZE)
+            elif shared is None:
+                queue = shared = Queue.Queue(STREAM_BUFFER_SIZE * len(aliases))
+            else:
+                # The shared queue is listed once per database, since it
+                # gets a _DONE from each of them.
+                queue = shared
+            self.queues.append(queue)
+            if connections[alias].can_connect_from_threads():
+                thread = threading.Thread(target=_fetch,
+                        args=(queryset.using(alias), queue, self.state, True))
+                thread.setDaemon(True)
+                thread.start()
+        for local_queryset, queue in local:
+            _fetch(local_queryset, queue, self.state, False)
+
+    def _get(self, queue):
+        """
+        Returns the next result from queue, or _DONE.
+        """
+        item = queue.get()
+        if self.state.errors:
+            self.close()
+            error = self.state.errors[0]
+            raise error[0], error[1], error[2]
+        return item
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        if self.state.stopped:
+            raise StopIteration
+        if self.sort_key is None:
+            while self.queues:
+                item = self._get(self.queues[0])
+                if item is _DONE:
+                    self.queues.pop(0)
+                else:
+                    return item
+            self.close()
+            raise StopIteration
+        if self.heap is None:
+            self.heap = []
+            for index, queue in enumerate(self.queues):
+                self._push(index, queue)
+        if not self.heap:
+            self.close()
+            raise StopIteration
+        key, index, item, queue = heapq.heappop(self.heap)
+        self._push(index, queue)
+        return item
+
+    def _push(self, index, queue):
+        item = self._get(queue)
+        if item is not _DONE:
+            # The index breaks ties, so that items are never compared.
+            heapq.heappush(self.heap, (self.sort_key(item), index, item, queue))
+
+    def close(self):
+        """
+        Stops the background threads.
+        """
+        self.state.stopped = True
+
+    def __del__(self):
+        self.close()
+
+class SliceIterator(object):
+    """
+    Returns the items of iterator from start up to stop, and closes it when
+    done or when discarded.
+    """
+    def __init__(self, iterator, start, stop):
+        self.iterator = iterator
+        self.start = start
+        self.stop = stop
+        self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        while True:
+            if self.stop is not None and self.position >= self.stop:
+                self.iterator.close()
+                raise StopIteration
+            item = self.iterator.next()
+            self.position += 1
+            if self.position > self.start:
+                return item
+
+    def __del__(self):
+        self.iterator.close()
+
+class Scatter(object):
+    """
+    A QuerySet to be run against several databases at once. See
+    QuerySet.scatter().
+    """
+    def __init__(self, queryset, aliases, max_workers=None):
+        if not aliases:
+            raise ValueError("Scatter needs at least one database alias.")
+        self.queryset = queryset
+        self.aliases = list(aliases)
+        self.max_workers = max_workers
+        self.low_mark, self.high_mark = 0, None
+
+    def __repr__(self):
+        return '<Scatter of %r across %s>' % (self.queryset, ', '.join(self.aliases))
+
+    def _clone(self):
+        c = self.__class__(self.queryset, self.aliases, self.max_workers)
+        c.low_mark, c.high_mark = self.low_mark, self.high_mark
+        return c
+
+    def __getitem__(self, k):
+        """
+        Limits the merged results. Every database is asked for enough
+        results to fill the slice, and the slice is taken after merging.
+        """
+        if not isinstance(k, slice) or k.step or (k.start or 0) < 0 or (k.stop is not None and k.stop < 0):
+            raise TypeError("Scatter only supports slicing with non-negative bounds.")
+        c = self._clone()
+        start = self.low_mark + (k.start or 0)
+        if k.stop is not None:
+            stop = self.low_mark + k.stop
+            if self.high_mark is not None:
+                stop = min(stop, self.high_mark)
+        else:
+            stop = self.high_mark
+        c.low_mark, c.high_mark = start, stop
+        return c
+
+    def iterator(self):
+        """
+        Returns an iterator over the results of all the databases, merged in
+        the order of the QuerySet if it's ordered.
+        """
+        queryset = self.queryset._clone()
+        queryset.query.clear_limits()
+        if self.high_mark is not None:
+            # Each database returns at most as many rows as the slice ends at.
+            queryset.query.set_limits(high=self.high_mark)
+        merged = MergeIterator(queryset, self.aliases, ordering_key(queryset))
+        return SliceIterator(merged, self.low_mark, self.high_mark)
+
+    def __iter__(self):
+        return self.iterator()
+
+    def __len__(self):
+        return len(list(self.iterator()))
+
+    def count(self):
+        """
+        Returns the total number of results across all the databases.
+        """
+        if self.low_mark or self.high_mark is not None:
+            return len(self)
+        counts = run_on_aliases(lambda alias: self.queryset.using(alias).count(),
+                self.aliases, self.max_workers)
+        return sum(counts.values())
+
+    def exists(self):
+        found = run_on_aliases(lambda alias: self.queryset.using(alias).exists(),
+                self.aliases, self.max_workers)
+        return True in found.values()
+
+    def aggregate(self, *args, **kwargs):
+        """
+        Computes aggregates across all the databases. Count, Sum, Min and Max
+        are combined from the per-database values; Avg is computed from a
+        per-database Sum and Count. Other aggregates, and distinct counts,
+        can't be combined and raise ValueError.
+        """
+        for arg in args:
+            kwargs[arg.default_alias] = arg
+        queries = {}
+        for name, aggregate in kwargs.items():
+            if aggregate.name == 'Avg':
+                queries['%s__sum' % name] = Sum(aggregate.lookup)
+                queries['%s__count' % name] = Count(aggregate.lookup)
+            elif aggregate.name in ('Count', 'Sum', 'Min', 'Max'):
+                if aggregate.extra.get('distinct'):
+                    raise ValueError("Distinct counts can't be combined across databases.")
+                queries[name] = aggregate
+            else:
+                raise ValueError("%s can't be combined across databases." % aggregate.name)
+        partial = run_on_aliases(lambda alias: self.queryset.using(alias).aggregate(**queries),
+                self.aliases, self.max_workers).values()
+
+        result = {}
+        for name, aggregate in kwargs.items():
+            if aggregate.name == 'Avg':
+                total = _combine('Sum', [p['%s__sum' % name] for p in partial])
+                count = _combine('Count', [p['%s__count' % name] for p in partial])
+                if count:
+                    result[name] = float(total) / count
+                else:
+                    result[name] = None
+            else:
+                result[name] = _combine(aggregate.name, [p[name] for p in partial])
+        return result
+
+def _combine(name, values):
+    values = [v for v in values if v is not None]
+    if name == 'Count':
+        return sum(values)
+    if not values:
+        return None
+    if name == 'Sum':
+        return reduce(lambda a, b: a + b, values)
+    if name == 'Min':
+        return min(values)
+    return max(values)
@@ -0,0 +1,377 @@
+"""
+A unit of work that defers and batches model writes.
+
+While a session is active in the current thread, Model.save() and
+Model.delete() don't touch the database; the objects are queued on the
+session instead. When the session is flushed -- explicitly with flush(), or
+when a ``with session():`` block exits without an exception -- the queued
+writes are sorted so that related objects are written before the objects
+that point to them, grouped by model, and written with as few statements as
+the backend allows, in a single transaction per database -- or, when a
+transaction is already in progress, in a savepoint of it.
+
+    from django.db.models.session import session
+
+    with session():
+        for row in rows:
+            author = Author(name=row['author'])
+            author.save()
+            Book(title=row['title'], author=author).save()
+
+Objects that are queued but not yet flushed have no primary key if it is
+assigned by the database, and queries don't see them.
+"""
+
+try:
+    from threading import local
+except ImportError:
+    from django.utils._threading_local import local
+
+from django.db import connections, router, transaction
+from django.db.models import signals
+from django.db.models.fields import AutoField
+from django.db.models.query_utils import CollectedObjects
+from django.db.models.sql.subqueries import get_bulk_batch_size
+
+_state = local()
+
+def _get_stack():
+    if not hasattr(_state, 'stack'):
+        _state.stack = []
+    return _state.stack
+
+def get_session():
+    """
+    Returns the session that is active in the current thread, or None if
+    writes aren't being deferred.
+    """
+    stack = _get_stack()
+    if stack:
+        return stack[-1]
+    return None
+
+def suspend():
+    """
+    Makes writes in the current thread go straight to the database until the
+    matching resume() call, even if a session is active. Used by code that
+    needs a primary key right away, such as QuerySet.create().
+    """
+    _get_stack().append(None)
+
+def resume():
+    """
+    Undoes the effect of the last suspend() call.
+    """
+    _get_stack().pop()
+
+class Session(object):
+    """
+    Collects the model instances saved or deleted while it is active, and
+    writes them to the database in batches when flushed.
+    """
+    def __init__(self, using=None):
+        self.using = using
+        self.clear()
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.flush()
+            else:
+                self.clear()
+        finally:
+            self.end()
+
+    def begin(self):
+        """
+        Makes this the active session of the current thread.
+        """
+        _get_stack().append(self)
+
+    def end(self):
+        """
+        Deactivates the session. Anything that hasn't been flushed is kept
+        queued, but no more writes are deferred to it.
+        """
+        stack = _get_stack()
+        if self not in stack:
+            raise ValueError("This session isn't active.")
+        stack.remove(self)
+
+    def clear(self):
+        """
+        Forgets all the queued writes.
+        """
+        # Maps id(obj) to the queued (obj, using, force_insert, force_update)
+        # tuple; the order list remembers in which order objects were queued.
+        self._saves = {}
+        self._save_order = []
+        self._deletes = {}
+        self._delete_order = []
+
+    def __len__(self):
+        return len(self._saves) + len(self._deletes)
+
+    def add(self, obj, force_insert=False, force_update=False, using=None):
+        """
+        Queues obj to be saved on the next flush. Saving the same object
+        several times before a flush only writes it once.
+        """
+        key = id(obj)
+        if key not in self._saves:
+            self._save_order.append(key)
+        self._saves[key] = (obj, using or self.using, force_insert, force_update)
+
+    def delete(self, obj, using=None):
+        """
+        Queues obj to be deleted, along with the objects that depend on it,
+        on the next flush. Deletes are performed after all the saves.
+        """
+        assert obj._get_pk_val() is not None, "%s object can't be deleted because its %s attribute is set to None." % (obj._meta.object_name, obj._meta.pk.attname)
+        key = id(obj)
+        if key not in self._deletes:
+            self._delete_order.append(key)
+        self._deletes[key] = (obj, using or self.using)
+
+    def flush(self):
+        """
+        Writes all the queued saves and deletes to the database, one
+        transaction per database, and empties the queue. On a database where
+        a transaction is already under way, the writes are made in a
+        savepoint instead, and the transaction is left to its owner.
+        """
+        saves = [self._saves[key] for key in self._save_order]
+        deletes = [self._deletes[key] for key in self._delete_order]
+        self.clear()
+
+        by_db = {}
+        for obj, using, force_insert, force_update in saves:
+            using = using or router.db_for_write(obj.__class__, instance=obj)
+            by_db.setdefault(using, ([], []))[0].append((obj, force_insert, force_update))
+        for obj, using in deletes:
+            using = using or router.db_for_write(obj.__class__, instance=obj)
+            by_db.setdefault(using, ([], []))[1].append(obj)
+
+        suspend()
+        try:
+            for using, (db_saves, db_deletes) in by_db.items():
+                if transaction.is_managed(using=using):
+                    self._flush_in_savepoint(db_saves, db_deletes, using)
+                else:
+                    self._flush_in_transaction(db_saves, db_deletes, using)
+        finally:
+            resume()
+
+    def _flush_in_transaction(self, saves, deletes, using):
+        transaction.enter_transaction_management(using=using)
+        transaction.managed(True, using=using)
+        try:
+            try:
+                self._flush_saves(saves, using)
+                self._flush_deletes(deletes, using)
+            except:
+                transaction.rollback(using=using)
+                raise
+            else:
+                transaction.commit(using=using)
+        finally:
+            transaction.leave_transaction_management(using=using)
+
+    def _flush_in_savepoint(self, saves, deletes, using):
+        sid = transaction.savepoint(using=using)
+        try:
+            self._flush_saves(saves, using)
+            self._flush_deletes(deletes, using)
+        except:
+            transaction.savepoint_rollback(sid, using=using)
+            raise
+        transaction.savepoint_commit(sid, using=using)
+        transaction.set_dirty(using=using)
+
+    def _flush_saves(self, saves, using):
+        by_model = {}
+        models = []
+        for obj, force_insert, force_update in saves:
+            if obj.__class__ not in by_model:
+                models.append(obj.__class__)
+            by_model.setdefault(obj.__class__, []).append((obj, force_insert, force_update))
+        for model in sort_models(models):
+            opts = model._meta
+            if opts.proxy or opts.parents or opts.order_with_respect_to:
+                # Multi-table inheritance, proxies and ordered models need
+                # the extra work done by save_base(); they are written one
+                # at a time, inside the session's transaction.
+                for obj, force_insert, force_update in by_model[model]:
+                    resolve_related_keys(obj)
+                    obj.save_base(using=using, force_insert=force_insert,
+                            force_update=force_update)
+            else:
+                save_batch(model, by_model[model], using)
+
+    def _flush_deletes(self, deletes, using):
+        from django.db.models.query import delete_objects
+        if not deletes:
+            return
+        seen_objs = CollectedObjects()
+        for obj in deletes:
+            obj._collect_sub_objects(seen_objs)
+        delete_objects(seen_objs, using)
+
+def session(using=None):
+    """
+    Returns a new Session, to be used as a context manager:
+
+        with session():
+            ...
+
+    If 'using' is given, the queued writes go to that database instead of
+    the one chosen by the router.
+    """
+    return Session(using=using)
+
+def sort_models(models):
+    """
+    Returns the given models ordered so that every model comes after the
+    models it has foreign keys to. Models involved in a dependency cycle keep
+    the order in which they were given.
+    """
+    pending = list(models)
+    deps = {}
+    for model in pending:
+        deps[model] = set([f.rel.to for f in model._meta.fields
+                if f.rel and f.rel.to in models and f.rel.to is not model])
+    ordered = []
+    while pending:
+        for model in pending:
+            if not [d for d in deps[model] if d not in ordered]:
+                break
+        else:
+            # A cycle; take the first remaining model and carry on.
+            model = pending[0]
+        ordered.append(model)
+        pending.remove(model)
+    return ordered
+
+def resolve_related_keys(obj):
+    """
+    Fills in the foreign key values of obj that were left empty because the
+    related object had no primary key yet when it was assigned.
+    """
+    for field in obj._meta.fields:
+        if field.rel and getattr(obj, field.attname) is None:
+            related = getattr(obj, field.get_cache_name(), None)
+            if related is not None:
+                setattr(obj, field.attname,
+                        getattr(related, field.rel.get_related_field().attname))
+
+def save_batch(model, items, using):
+    """
+    Saves the (obj, force_insert, force_update) items, all instances of the
+    same concrete model, with as few statements as possible:
+
+    * one query finds which of the objects that have a primary key already
+      exist;
+    * objects that exist are written with batched UPDATE statements;
+    * objects that don't and have a primary key are written with multi-row
+      INSERT statements;
+    * objects without a primary key are inserted one at a time, since the
+      database has to hand back their key -- unless the key is handed out by
+      Django (see HiLoField), in which case they are given one and written
+      along with the other inserts.
+    """
+    from django.db.models.query import bulk_insert_query, bulk_update_query, \
+        insert_query
+    opts = model._meta
+    connection = connections[using]
+    manager = model._base_manager
+    pk_field = opts.pk
+    origin = not opts.auto_created and model or None
+
+    objs = [obj for obj, _, _ in items]
+    if origin:
+        signals.pre_bulk_save.send(sender=origin, instances=objs, raw=False)
+        for obj in objs:
+            signals.pre_save.send(sender=origin, instance=obj, raw=False)
+    for obj in objs:
+        resolve_related_keys(obj)
+
+    # Give new objects their primary key up front if Django allocates it.
+    allocated = set()
+    key_allocator = getattr(pk_field, 'key_allocator', None)
+    if key_allocator is not None:
+        new_objs = [obj for obj, force_insert, force_update in items
+                if obj._get_pk_val() is None and not force_update]
+        for obj, pk_val in zip(new_objs, key_allocator.reserve(len(new_objs), using)):
+            setattr(obj, pk_field.attname, pk_val)
+            allocated.add(id(obj))
+
+    # Work out which of the objects with a primary key already exist.
+    check_pks = [obj._get_pk_val() for obj, force_insert, force_update in items
+            if obj._get_pk_val() is not None and id(obj) not in allocated
+            and not (force_insert or force_update)]
+    existing = set()
+    batch_size = get_bulk_batch_size(connection, 1)
+    for offset in range(0, len(check_pks), batch_size):
+        existing.update(manager.using(using).filter(
+            pk__in=check_pks[offset:offset + batch_size]
+        ).values_list('pk', flat=True))
+    existing = set([pk_field.to_python(pk_val) for pk_val in existing])
+
+    updates, inserts, auto_inserts = [], [], []
+    for obj, force_insert, force_update in items:
+        pk_val = obj._get_pk_val()
+        if pk_val is None:
+            if force_update:
+                raise ValueError("Cannot force an update in save() with no primary key.")
+            auto_inserts.append(obj)
+        elif id(obj) in allocated:
+            inserts.append(obj)
+        elif force_update or (not force_insert and
+                pk_field.to_python(pk_val) in existing):
+            updates.append(obj)
+        else:
+            inserts.append(obj)
+
+    non_pks = [f for f in opts.local_fields if not f.primary_key]
+    if updates and non_pks:
+        rows = [(obj._get_pk_val(), [f.get_db_prep_save(f.pre_save(obj, False), connection=connection)
+                for f in non_pks]) for obj in updates]
+        bulk_update_query(model, non_pks, rows, using=using)
+    if inserts:
+        rows = [[f.get_db_prep_save(f.pre_save(obj, True), connection=connection)
+                for f in opts.local_fields] for obj in inserts]
+        bulk_insert_query(model, opts.local_fields, rows, using=using)
+    for obj in auto_inserts:
+        # Objects earlier in this loop may be the targets of foreign keys
+        # on later ones (self-referential models).
+        resolve_related_keys(obj)
+        values = [(f, f.get_db_prep_save(f.pre_save(obj, True), connection=connection))
+                for f in opts.local_fields if not isinstance(f, AutoField)]
+        if opts.has_auto_field:
+            if values:
+                result = insert_query(model, values, return_id=True, using=using)
+            else:
+                result = insert_query(model, [(pk_field, connection.ops.pk_default_value())],
+                        return_id=True, raw_values=True, using=using)
+            setattr(obj, pk_field.attname, result)
+        else:
+            insert_query(model, values, using=using)
+    transaction.set_dirty(using=using)
+
+    for obj in objs:
+        obj._state.db = using
+    if origin:
+        updated = set([id(obj) for obj in updates])
+        for obj in objs:
+            signals.post_save.send(sender=origin, instance=obj,
+                created=id(obj) not in updated, raw=False)
+        if updates:
+            signals.post_bulk_save.send(sender=origin, instances=updates,
+                raw=False, created=False)
+        if inserts or auto_inserts:
+            signals.post_bulk_save.send(sender=origin,
+                instances=inserts + auto_inserts, raw=False, created=True)
@@ -11,6 +11,12 @@ post_save = Signal(providing_args=["instance", "raw", "created"])
 pre_delete = Signal(providing_args=["instance"])
 post_delete = Signal(providing_args=["instance"])
 
+pre_bulk_save = Signal(providing_args=["instances", "raw"])
+post_bulk_save = Signal(providing_args=["instances", "raw", "created"])
+
+pre_bulk_delete = Signal(providing_args=["instances"])
+post_bulk_delete = Signal(providing_args=["instances"])
+
 post_syncdb = Signal(providing_args=["class", "app", "created_models", "verbosity", "interactive"])
 
 m2m_changed = Signal(providing_args=["action", "instance", "reverse", "model", "pk_set"])
@@ -1,13 +1,21 @@
+import sys
+import time
+
 from django.core.exceptions import FieldError
-from django.db import connections
+from django.db import connections, DatabaseError, QueryTimeout
 from django.db.backends.util import truncate_name
 from django.db.models.sql.constants import *
 from django.db.models.sql.datastructures import EmptyResultSet
+from django.db.models.sql import workload
 from django.db.models.sql.expressions import SQLEvaluator
+from django.db.models.sql.subqueries import get_bulk_batch_size
 from django.db.models.sql.query import get_proxied_model, get_order_dir, \
      select_related_descend, Query
 
 class SQLCompiler(object):
+    # The type the queries are counted as in the connection's metrics.
+    statement_type = 'select'
+
     def __init__(self, query, connection, using):
         self.query = query
         self.connection = connection
@@ -736,15 +744,49 @@ class SQLCompiler(object):
             else:
                 return
 
+        if workload.recorder is not None:
+            workload.recorder.record(self.using, self.query)
+        if self.connection.sql_comments is not None:
+            sql = self.connection.sql_comments.annotate(sql, self.query.model)
         cursor = self.connection.cursor()
-        cursor.execute(sql, params)
+        timeout = self.query.timeout
+        if timeout is None:
+            timeout = self.connection.query_timeout
+        ops = self.connection.ops
+        if timeout:
+            sql = ops.start_query_timeout(self.connection, sql, timeout)
+        failed = True
+        start = time.time()
+        try:
+            try:
+                cursor.execute(sql, params)
+                result = self.fetch_results(cursor, result_type)
+                failed = False
+            except DatabaseError, e:
+                if timeout and ops.is_query_timeout(e):
+                    raise QueryTimeout, QueryTimeout("The query ran for longer than its "
+                            "timeout of %s seconds." % timeout), sys.exc_info()[2]
+                raise
+        finally:
+            self.connection.metrics.query(self.statement_type, time.time() - start, failed)
+            if timeout:
+                ops.end_query_timeout(self.connection, failed)
+        return result
 
+    def fetch_results(self, cursor, result_type):
+        """
+        Returns what execute_sql() returns for result_type, once the query
+        has run on cursor.
+        """
         if not result_type:
             return cursor
         if result_type == SINGLE:
+            row = cursor.fetchone()
+            if row is not None:
+                self.connection.metrics.count('rows_fetched')
             if self.query.ordering_aliases:
-                return cursor.fetchone()[:-len(self.query.ordering_aliases)]
-            return cursor.fetchone()
+                return row[:-len(self.query.ordering_aliases)]
+            return row
 
         # The MULTI case.
         if self.query.ordering_aliases:
@@ -753,6 +795,7 @@ class SQLCompiler(object):
         else:
             result = iter((lambda: cursor.fetchmany(GET_ITERATOR_CHUNK_SIZE)),
                     self.connection.features.empty_fetchmany_value)
+        result = counted_iter(result, self.connection.metrics)
         if not self.connection.features.can_use_chunked_reads:
             # If we are using non-chunked reads, we return the same data
             # structure as normally, but ensure it is all read into memory
@@ -760,8 +803,23 @@ class SQLCompiler(object):
             return list(result)
         return result
 
+    def timed_execute(self, execute, sql, params):
+        """
+        Calls execute(sql, params), recording the query in the connection's
+        metrics, for statements run other than through execute_sql().
+        """
+        failed = True
+        start = time.time()
+        try:
+            execute(sql, params)
+            failed = False
+        finally:
+            self.connection.metrics.query(self.statement_type, time.time() - start, failed)
+
 
 class SQLInsertCompiler(SQLCompiler):
+    statement_type = 'insert'
+
     def placeholder(self, field, val):
         if field is None:
             # A field value of None means the value is raw.
@@ -781,9 +839,23 @@ class SQLInsertCompiler(SQLCompiler):
         opts = self.query.model._meta
         result = ['INSERT INTO %s' % qn(opts.db_table)]
         result.append('(%s)' % ', '.join([qn(c) for c in self.query.columns]))
-        values = [self.placeholder(*v) for v in self.query.values]
+        values, params = [], []
+        query_params = iter(self.query.params)
+        for field, val in self.query.values:
+            if field is None:
+                values.append(val)
+                continue
+            param = query_params.next()
+            if hasattr(param, 'as_sql'):
+                # The value is an SQL fragment, such as a subquery.
+                sql, sql_params = param.as_sql(qn, self.connection)
+                values.append(sql)
+                params.extend(sql_params)
+            else:
+                values.append(self.placeholder(field, val))
+                params.append(param)
         result.append('VALUES (%s)' % ', '.join(values))
-        params = self.query.params
+        params = tuple(params)
         if self.return_id and self.connection.features.can_return_id_from_insert:
             col = "%s.%s" % (qn(opts.db_table), qn(opts.pk.column))
             r_fmt, r_params = self.connection.ops.return_insert_id()
@@ -791,6 +863,31 @@ class SQLInsertCompiler(SQLCompiler):
             params = params + r_params
         return ' '.join(result), params
 
+    def execute_batch_sql(self):
+        """
+        Inserts all the rows in query.batch. Backends that support it get one
+        multi-row INSERT per batch; the others run a single executemany().
+        """
+        qn = self.connection.ops.quote_name
+        opts = self.query.model._meta
+        rows = self.query.batch
+        if not rows:
+            return
+        sql = 'INSERT INTO %s (%s) VALUES ' % (qn(opts.db_table),
+                ', '.join([qn(c) for c in self.query.columns]))
+        placeholders = '(%s)' % ', '.join([self.placeholder(*v) for v in self.query.values])
+        cursor = self.connection.cursor()
+        if not self.connection.features.has_bulk_insert:
+            self.timed_execute(cursor.executemany, sql + placeholders, rows)
+            return
+        batch_size = get_bulk_batch_size(self.connection, len(self.query.values))
+        for offset in range(0, len(rows), batch_size):
+            chunk = rows[offset:offset + batch_size]
+            params = []
+            for row in chunk:
+                params.extend(row)
+            self.timed_execute(cursor.execute, sql + ', '.join([placeholders] * len(chunk)), params)
+
     def execute_sql(self, return_id=False):
         self.return_id = return_id
         cursor = super(SQLInsertCompiler, self).execute_sql(None)
@@ -803,6 +900,8 @@ class SQLInsertCompiler(SQLCompiler):
 
 
 class SQLDeleteCompiler(SQLCompiler):
+    statement_type = 'delete'
+
     def as_sql(self):
         """
         Creates the SQL for this query. Returns the SQL string and list of
@@ -817,6 +916,8 @@ class SQLDeleteCompiler(SQLCompiler):
         return ' '.join(result), tuple(params)
 
 class SQLUpdateCompiler(SQLCompiler):
+    statement_type = 'update'
+
     def as_sql(self):
         """
         Creates the SQL for this query. Returns the SQL string and list of
@@ -864,6 +965,62 @@ class SQLUpdateCompiler(SQLCompiler):
             result.append('WHERE %s' % where)
         return ' '.join(result), tuple(update_params + params)
 
+    def execute_batch_sql(self):
+        """
+        Writes the per-record values in query.batch. Each statement updates a
+        batch of records, selecting every column's new value with a CASE on
+        the primary key:
+
+            UPDATE t SET c = CASE pk WHEN %s THEN %s ... ELSE c END
+            WHERE pk IN (...)
+
+        The query's own filters, if any, are added to the WHERE clause.
+        Returns the number of rows affected.
+        """
+        qn = self.connection.ops.quote_name
+        opts = self.query.model._meta
+        fields = self.query.batch_fields
+        rows = self.query.batch
+        if not (fields and rows):
+            return 0
+        pk_col = qn(opts.pk.column)
+        pk_prep = opts.pk.get_db_prep_value
+        # Any filters on the query further restrict the updated records.
+        where, where_params = self.query.where.as_sql(
+                qn=self.quote_name_unless_alias, connection=self.connection)
+        # Each record uses two parameters per column and one more for the
+        # IN list (plus a spare one to leave room for the filters).
+        params_per_row = 1 + len(fields) * 2
+        if where_params:
+            params_per_row += 1
+        batch_size = get_bulk_batch_size(self.connection, params_per_row)
+        cursor = self.connection.cursor()
+        updated = 0
+        for offset in range(0, len(rows), batch_size):
+            chunk = rows[offset:offset + batch_size]
+            pk_vals = [pk_prep(pk_val, connection=self.connection) for pk_val, _ in chunk]
+            columns, params = [], []
+            for i, field in enumerate(fields):
+                col = qn(field.column)
+                cases = []
+                for pk_val, (_, values) in zip(pk_vals, chunk):
+                    val = values[i]
+                    if hasattr(field, 'get_placeholder'):
+                        placeholder = field.get_placeholder(val, self.connection)
+                    else:
+                        placeholder = '%s'
+                    cases.append('WHEN %%s THEN %s' % placeholder)
+                    params.extend([pk_val, val])
+                columns.append('%s = CASE %s %s ELSE %s END' % (col, pk_col,
+                        ' '.join(cases), col))
+            sql = 'UPDATE %s SET %s WHERE %s IN (%s)' % (qn(opts.db_table),
+                    ', '.join(columns), pk_col, ', '.join(['%s'] * len(chunk)))
+            if where:
+                sql = '%s AND %s' % (sql, where)
+            self.timed_execute(cursor.execute, sql, params + pk_vals + list(where_params))
+            updated += cursor.rowcount
+        return updated
+
     def execute_sql(self, result_type):
         """
         Execute the specified update. Returns the number of rows affected by
@@ -876,6 +1033,7 @@ class SQLUpdateCompiler(SQLCompiler):
         is_empty = cursor is None
         del cursor
         for query in self.query.get_related_updates():
+            query.timeout = self.query.timeout
             aux_rows = query.get_compiler(self.using).execute_sql(result_type)
             if is_empty:
                 rows = aux_rows
@@ -975,6 +1133,16 @@ def empty_iter():
     yield iter([]).next()
 
 
+def counted_iter(blocks, metrics):
+    """
+    Yields the blocks of rows of an iterator, counting the rows fetched in
+    metrics.
+    """
+    for rows in blocks:
+        metrics.count('rows_fetched', len(rows))
+        yield rows
+
+
 def order_modified_iter(cursor, trim, sentinel):
     """
     Yields blocks of rows from a cursor. We use this iterator in the special
@@ -137,6 +137,9 @@ class Query(object):
         # load.
         self.deferred_loading = (set(), True)
 
+        # How many seconds the query may run for (see QuerySet.timeout()).
+        self.timeout = None
+
     def __str__(self):
         """
         Returns the query as a string of SQL with the parameter values
@@ -260,6 +263,7 @@ class Query(object):
         obj.extra_params = self.extra_params
         obj.extra_order_by = self.extra_order_by
         obj.deferred_loading = deepcopy(self.deferred_loading)
+        obj.timeout = self.timeout
         if self.filter_is_sticky and self.used_aliases:
             obj.used_aliases = self.used_aliases.copy()
         else:
@@ -13,6 +13,33 @@ from django.db.models.sql.where import AND, Constraint
 __all__ = ['DeleteQuery', 'UpdateQuery', 'InsertQuery', 'DateQuery',
         'AggregateQuery']
 
+def get_batch_size(connection, batch_size=None, extra_params=0):
+    """
+    Returns how many primary key values the batched helpers below put in a
+    single query: batch_size, or the backend's preferred_batch_size if it's
+    None, but never so many that the query, with its extra_params other
+    parameters, has more than the backend's max_query_params.
+    """
+    if batch_size is None:
+        batch_size = connection.features.preferred_batch_size
+    max_params = connection.features.max_query_params
+    if max_params is not None:
+        batch_size = min(batch_size, max_params - extra_params)
+    return max(batch_size, 1)
+
+def get_bulk_batch_size(connection, params_per_row):
+    """
+    Returns how many rows a multi-row INSERT or UPDATE writes at a time when
+    each row takes params_per_row parameters: the backend's
+    preferred_batch_size, but never so many that the query has more than its
+    max_query_params.
+    """
+    batch_size = connection.features.preferred_batch_size
+    max_params = connection.features.max_query_params
+    if max_params is not None and params_per_row:
+        batch_size = min(batch_size, max_params // params_per_row)
+    return max(batch_size, 1)
+
 class DeleteQuery(Query):
     """
     Delete queries are done through this class, since they are more constrained
@@ -26,31 +53,34 @@ class DeleteQuery(Query):
         self.where = where
         self.get_compiler(using).execute_sql(None)
 
-    def delete_batch_related(self, pk_list, using):
+    def delete_batch_related(self, pk_list, using, batch_size=None):
         """
         Set up and execute delete queries for all the objects related to the
         primary key values in pk_list. To delete the objects themselves, use
         the delete_batch() method.
 
-        More than one physical query may be executed if there are a
-        lot of values in pk_list.
+        More than one physical query may be executed if there are more than
+        batch_size values in pk_list (see get_batch_size()).
         """
         from django.contrib.contenttypes import generic
         cls = self.model
+        connection = connections[using]
         for related in cls._meta.get_all_related_many_to_many_objects():
             if not isinstance(related.field, generic.GenericRelation):
-                for offset in range(0, len(pk_list), GET_ITERATOR_CHUNK_SIZE):
+                size = get_batch_size(connection, batch_size)
+                for offset in range(0, len(pk_list), size):
                     where = self.where_class()
                     where.add((Constraint(None,
                             related.field.m2m_reverse_name(), related.field),
                             'in',
-                            pk_list[offset : offset+GET_ITERATOR_CHUNK_SIZE]),
+                            pk_list[offset : offset + size]),
                             AND)
                     self.do_query(related.field.m2m_db_table(), where, using=using)
 
         for f in cls._meta.many_to_many:
             w1 = self.where_class()
             db_prep_value = None
+            extra_params = 0
             if isinstance(f, generic.GenericRelation):
                 from django.contrib.contenttypes.models import ContentType
                 ct_field = f.rel.to._meta.get_field(f.content_type_field_name)
@@ -58,29 +88,32 @@ class DeleteQuery(Query):
                         ContentType.objects.get_for_model(cls).id), AND)
                 id_field = f.rel.to._meta.get_field(f.object_id_field_name)
                 db_prep_value = id_field.get_db_prep_value
-            for offset in range(0, len(pk_list), GET_ITERATOR_CHUNK_SIZE):
+                extra_params = 1
+            size = get_batch_size(connection, batch_size, extra_params)
+            for offset in range(0, len(pk_list), size):
                 where = self.where_class()
                 where.add((Constraint(None, f.m2m_column_name(), f), 'in',
                         map(db_prep_value,
-                            pk_list[offset : offset + GET_ITERATOR_CHUNK_SIZE])),
+                            pk_list[offset : offset + size])),
                         AND)
                 if w1:
                     where.add(w1, AND)
                 self.do_query(f.m2m_db_table(), where, using=using)
 
-    def delete_batch(self, pk_list, using):
+    def delete_batch(self, pk_list, using, batch_size=None):
         """
         Set up and execute delete queries for all the objects in pk_list. This
         should be called after delete_batch_related(), if necessary.
 
-        More than one physical query may be executed if there are a
-        lot of values in pk_list.
+        More than one physical query may be executed if there are more than
+        batch_size values in pk_list (see get_batch_size()).
         """
-        for offset in range(0, len(pk_list), GET_ITERATOR_CHUNK_SIZE):
+        size = get_batch_size(connections[using], batch_size)
+        for offset in range(0, len(pk_list), size):
             where = self.where_class()
             field = self.model._meta.pk
             where.add((Constraint(None, field.column, field), 'in',
-                    pk_list[offset : offset + GET_ITERATOR_CHUNK_SIZE]), AND)
+                    pk_list[offset : offset + size]), AND)
             self.do_query(self.model._meta.db_table, where, using=using)
 
 class UpdateQuery(Query):
@@ -102,6 +135,8 @@ class UpdateQuery(Query):
         """
         self.values = []
         self.related_ids = None
+        self.batch_fields = []
+        self.batch = []
         if not hasattr(self, 'related_updates'):
             self.related_updates = {}
 
@@ -110,18 +145,19 @@ class UpdateQuery(Query):
                 related_updates=self.related_updates.copy(), **kwargs)
 
 
-    def clear_related(self, related_field, pk_list, using):
+    def clear_related(self, related_field, pk_list, using, batch_size=None):
         """
         Set up and execute an update query that clears related entries for the
-        keys in pk_list.
+        keys in pk_list, batch_size keys at a time (see get_batch_size()).
 
         This is used by the QuerySet.delete_objects() method.
         """
-        for offset in range(0, len(pk_list), GET_ITERATOR_CHUNK_SIZE):
+        size = get_batch_size(connections[using], batch_size, 1)
+        for offset in range(0, len(pk_list), size):
             self.where = self.where_class()
             f = self.model._meta.pk
             self.where.add((Constraint(None, f.column, f), 'in',
-                    pk_list[offset : offset + GET_ITERATOR_CHUNK_SIZE]),
+                    pk_list[offset : offset + size]),
                     AND)
             self.values = [(related_field, None, None)]
             self.get_compiler(using).execute_sql(None)
@@ -151,6 +187,16 @@ class UpdateQuery(Query):
         """
         self.values.extend(values_seq)
 
+    def update_batch(self, fields, rows):
+        """
+        Set up the update query to write different values to several records
+        at once. 'rows' is a sequence of (pk_val, values) pairs, where values
+        is a tuple of values for 'fields' that are already prepared for the
+        database.
+        """
+        self.batch_fields = list(fields)
+        self.batch = [(pk_val, tuple(values)) for pk_val, values in rows]
+
     def add_related_update(self, model, field, value):
         """
         Adds (name, value) to an update query for an ancestor model.
@@ -187,12 +233,14 @@ class InsertQuery(Query):
         self.columns = []
         self.values = []
         self.params = ()
+        self.batch = []
 
     def clone(self, klass=None, **kwargs):
         extras = {
             'columns': self.columns[:],
             'values': self.values[:],
-            'params': self.params
+            'params': self.params,
+            'batch': self.batch[:],
         }
         extras.update(kwargs)
         return super(InsertQuery, self).clone(klass, **extras)
@@ -218,6 +266,17 @@ class InsertQuery(Query):
             self.params += tuple(values)
             self.values.extend(placeholders)
 
+    def insert_batch(self, fields, rows):
+        """
+        Set up the insert query to write several records at once. 'fields' is
+        the sequence of model fields being written and 'rows' is a sequence of
+        value tuples, one per record, in the same order as 'fields'. The values
+        must already be prepared for the database.
+        """
+        self.columns = [f.column for f in fields]
+        self.values = [(f, None) for f in fields]
+        self.batch = [tuple(row) for row in rows]
+
 class DateQuery(Query):
     """
     A DateQuery is a normal query, except that it specifically selects a single
@@ -252,3 +311,4 @@ class AggregateQuery(Query):
 
     def add_subquery(self, query, using):
         self.subquery, self.sub_params = query.get_compiler(using).as_sql(with_col_aliases=True)
+        self.timeout = query.timeout
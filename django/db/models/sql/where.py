@@ -136,6 +136,7 @@ class WhereNode(tree.Node):
         it.
         """
         lvalue, lookup_type, value_annot, params_or_value = child
+        field = getattr(lvalue, 'field', None)
         if hasattr(lvalue, 'process'):
             try:
                 lvalue, params = lvalue.process(lookup_type, params_or_value, connection)
@@ -178,8 +179,10 @@ class WhereNode(tree.Node):
                 raise EmptyResultSet
             if extra:
                 return ('%s IN %s' % (field_sql, extra), params)
-            return ('%s IN (%s)' % (field_sql, ', '.join(['%s'] * len(params))),
-                    params)
+            db_type = None
+            if isinstance(lvalue, tuple):
+                db_type = lvalue[2]
+            return connection.ops.in_lookup_sql(field_sql, params, db_type)
         elif lookup_type in ('range', 'year'):
             return ('%s BETWEEN %%s and %%s' % field_sql, params)
         elif lookup_type in ('month', 'day', 'week_day'):
@@ -189,7 +192,10 @@ class WhereNode(tree.Node):
             return ('%s IS %sNULL' % (field_sql,
                 (not value_annot and 'NOT ' or '')), ())
         elif lookup_type == 'search':
-            return (connection.ops.fulltext_search_sql(field_sql), params)
+            if field is not None and isinstance(lvalue, tuple):
+                return connection.ops.search_lookup_sql(field_sql, params,
+                        field, qn(lvalue[0]))
+            return connection.ops.search_lookup_sql(field_sql, params)
         elif lookup_type in ('regex', 'iregex'):
             return connection.ops.regex_lookup(lookup_type) % (field_sql, cast_sql), params
 
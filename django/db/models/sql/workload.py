@@ -0,0 +1,326 @@
+"""
+Recording the columns that ORM queries filter, join and sort on, and
+suggesting the indexes that would serve them.
+
+    >>> from django.db.models.sql import workload
+    >>> recorder = workload.start_recording()
+    >>> # ... run the application for a while ...
+    >>> workload.stop_recording()
+    >>> recorder.dump(open('workload.json', 'w'))
+
+and then:
+
+    django-admin.py adviseindexes workload.json
+
+Each query is recorded as one access per table it reads. An access holds
+the columns compared for equality (including the column the table is joined
+on), the columns compared with a range and, for the main table, the columns
+the results are ordered by. The recorder counts identical accesses rather
+than keeping each query, and stops adding new ones after max_accesses, so
+its memory use is bounded.
+"""
+
+import threading
+
+from django.db.models.sql.constants import TABLE_NAME, JOIN_TYPE, RHS_JOIN_COL
+from django.db.models.sql.where import OR
+from django.utils import simplejson
+
+# Lookups a B-tree index on the column can serve.
+EQUALITY_LOOKUPS = ('exact', 'in', 'isnull')
+RANGE_LOOKUPS = ('gt', 'gte', 'lt', 'lte', 'range', 'year')
+
+# The number of distinct accesses a recorder keeps by default.
+MAX_ACCESSES = 10000
+
+def _where_columns(node, columns):
+    """
+    Adds the columns compared in the where node to columns, a dictionary
+    mapping each alias to a pair of sets: the columns compared for equality
+    and those compared with a range. Only conditions that must hold for
+    every row count: negated and ORed conditions don't.
+    """
+    if node.negated or (node.connector == OR and len(node.children) > 1):
+        return
+    for child in node.children:
+        if hasattr(child, 'children'):
+            _where_columns(child, columns)
+            continue
+        if not isinstance(child, tuple) or len(child) != 4:
+            continue
+        obj, lookup_type, annotation, value = child
+        alias, column = getattr(obj, 'alias', None), getattr(obj, 'col', None)
+        if alias is None or column is None:
+            continue
+        if lookup_type in EQUALITY_LOOKUPS:
+            if lookup_type == 'isnull' and not value:
+                continue
+            columns.setdefault(alias, (set(), set()))[0].add(column)
+        elif lookup_type in RANGE_LOOKUPS:
+            columns.setdefault(alias, (set(), set()))[1].add(column)
+
+def _order_columns(query):
+    """
+    Returns (column, descending) pairs for the leading fields the results of
+    query are ordered by, as far as they are local, non-relation fields.
+    """
+    from django.db.models.fields import FieldDoesNotExist
+    if query.extra_order_by:
+        return ()
+    opts = query.model._meta
+    ordering = query.order_by or (query.default_ordering and opts.ordering) or ()
+    result = []
+    for name in ordering:
+        if not isinstance(name, basestring) or name == '?':
+            break
+        descending = name.startswith('-')
+        name = name.lstrip('-+')
+        if name == 'pk':
+            field = opts.pk
+        else:
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                break
+        if field.rel:
+            break
+        if not query.standard_ordering:
+            descending = not descending
+        result.append((field.column, descending))
+    return tuple(result)
+
+def describe_query(query):
+    """
+    Returns the accesses of a compiled query, as (table, equality columns,
+    range columns, order columns) tuples. Order columns are (column,
+    descending) pairs.
+    """
+    from django.db.models.sql.subqueries import DeleteQuery, UpdateQuery
+    ordered = not isinstance(query, (DeleteQuery, UpdateQuery))
+    columns = {}
+    _where_columns(query.where, columns)
+    accesses = []
+    for alias in query.tables:
+        if not query.alias_refcount.get(alias):
+            continue
+        join = query.alias_map[alias]
+        equal, ranges = columns.get(alias, (set(), set()))
+        if join[JOIN_TYPE] is not None:
+            equal = equal | set([join[RHS_JOIN_COL]])
+        order = ()
+        if ordered and alias == query.tables[0]:
+            order = _order_columns(query)
+        if equal or ranges or order:
+            equal = list(equal)
+            equal.sort()
+            ranges = [c for c in ranges if c not in equal]
+            ranges.sort()
+            accesses.append((join[TABLE_NAME], tuple(equal), tuple(ranges), order))
+    return accesses
+
+class WorkloadRecorder(object):
+    """
+    Counts the accesses of the queries run while it's recording.
+    """
+    def __init__(self, max_accesses=MAX_ACCESSES):
+        self.max_accesses = max_accesses
+        # Maps (database, table, equality columns, range columns, order
+        # columns) to the number of queries that made the access.
+        self.counts = {}
+        # The number of accesses not counted because max_accesses distinct
+        # ones already were.
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def record(self, using, query):
+        accesses = describe_query(query)
+        self._lock.acquire()
+        try:
+            for access in accesses:
+                key = (using,) + access
+                if key in self.counts:
+                    self.counts[key] += 1
+                elif len(self.counts) < self.max_accesses:
+                    self.counts[key] = 1
+                else:
+                    self.dropped += 1
+        finally:
+            self._lock.release()
+
+    def accesses(self):
+        """
+        Returns the accesses recorded, as (database, table, equality columns,
+        range columns, order columns, count) tuples.
+        """
+        self._lock.acquire()
+        try:
+            return [key + (count,) for key, count in self.counts.items()]
+        finally:
+            self._lock.release()
+
+    def dump(self, fileobj):
+        """
+        Writes the accesses recorded to fileobj, one JSON object per line, in
+        the format load() reads.
+        """
+        for using, table, equal, ranges, order, count in self.accesses():
+            fileobj.write(simplejson.dumps({
+                'database': using,
+                'table': table,
+                'equal': list(equal),
+                'range': list(ranges),
+                'order': [(descending and '-' or '') + column for column, descending in order],
+                'count': count,
+            }) + '\n')
+
+def load(fileobj):
+    """
+    Returns the accesses written by WorkloadRecorder.dump() to fileobj, as
+    WorkloadRecorder.accesses() returns them. Raises ValueError for a line
+    that can't be read.
+    """
+    accesses = []
+    for number, line in enumerate(fileobj):
+        if not line.strip():
+            continue
+        try:
+            data = simplejson.loads(line)
+            order = []
+            for column in data.get('order', ()):
+                order.append((str(column.lstrip('-')), column.startswith('-')))
+            accesses.append((str(data.get('database', 'default')), str(data['table']),
+                             tuple([str(c) for c in data.get('equal', ())]),
+                             tuple([str(c) for c in data.get('range', ())]),
+                             tuple(order), int(data.get('count', 1))))
+        except (ValueError, KeyError, TypeError, AttributeError), e:
+            raise ValueError("Line %d isn't a recorded access: %s" % (number + 1, e))
+    return accesses
+
+recorder = None
+
+def start_recording(max_accesses=MAX_ACCESSES):
+    """
+    Starts recording the accesses of every query the ORM runs, in every
+    thread, and returns the WorkloadRecorder.
+    """
+    global recorder
+    recorder = WorkloadRecorder(max_accesses)
+    return recorder
+
+def stop_recording():
+    """
+    Stops recording and returns the WorkloadRecorder.
+    """
+    global recorder
+    result, recorder = recorder, None
+    return result
+
+class Suggestion(object):
+    """
+    An index suggested for a table: its equality columns, in any order,
+    followed by range or order columns (column, descending) pairs, and how
+    many recorded queries it would serve.
+    """
+    def __init__(self, table, equal, rest, kind, hits):
+        self.table = table
+        self.equal = equal
+        self.rest = rest
+        self.kind = kind
+        self.hits = hits
+
+    def __repr__(self):
+        return '<Suggestion: %s (%s), %d hits>' % (self.table, ', '.join(self.columns()), self.hits)
+
+    def columns(self):
+        return list(self.equal) + [column for column, descending in self.rest]
+
+    def covered_by(self, columns):
+        """
+        Returns True if an index on the given columns, in order, serves the
+        queries this suggestion is for.
+        """
+        wanted = self.columns()
+        if len(columns) < len(wanted):
+            return False
+        count = len(self.equal)
+        return (set(columns[:count]) == set(self.equal) and
+                list(columns[count:len(wanted)]) == wanted[count:])
+
+def existing_indexes(connection):
+    """
+    Returns a dictionary mapping each table to the lists of columns of its
+    indexes: those the models declare, and those introspection finds in the
+    database when the backend supports it.
+    """
+    from django.db import models
+    from django.db.models.indexes import SearchIndex
+    result = {}
+    for model in models.get_models(include_auto_created=True):
+        opts = model._meta
+        indexes = result.setdefault(opts.db_table, [])
+        indexes.append([opts.pk.column])
+        for field in opts.local_fields:
+            if field.db_index or field.unique:
+                indexes.append([field.column])
+        for names in opts.unique_together:
+            indexes.append([opts.get_field(name).column for name in names])
+        for index in opts.indexes:
+            if index.where or isinstance(index, SearchIndex):
+                continue
+            columns = []
+            for part, is_expression, descending in index.parts():
+                if is_expression:
+                    break
+                columns.append(opts.get_field(part).column)
+            if columns:
+                indexes.append(columns)
+    cursor = connection.cursor()
+    for table in connection.introspection.table_names():
+        try:
+            found = connection.introspection.get_index_columns(cursor, table)
+        except NotImplementedError:
+            break
+        result.setdefault(table, []).extend(found)
+    return result
+
+def suggest_indexes(accesses, existing, min_hits=1):
+    """
+    Returns Suggestions for the accesses that no index in existing (see
+    existing_indexes()) serves, most hits first. An index serving several
+    accesses is suggested once, with the sum of their counts.
+    """
+    candidates = {}
+    for table, equal, ranges, order, count in accesses:
+        if ranges:
+            # Only the first range column can use the index.
+            rest, kind = ((ranges[0], False),), 'range'
+        else:
+            rest = tuple([(c, d) for c, d in order if c not in equal])
+            kind = rest and 'order' or None
+        if not equal and not rest:
+            continue
+        key = (table, equal, rest, kind)
+        candidates[key] = candidates.get(key, 0) + count
+
+    suggestions = []
+    for (table, equal, rest, kind), hits in candidates.items():
+        suggestion = Suggestion(table, equal, rest, kind, hits)
+        for columns in existing.get(table, ()):
+            if suggestion.covered_by(columns):
+                break
+        else:
+            suggestions.append(suggestion)
+
+    # Fold each suggestion into a wider one that serves it too.
+    suggestions.sort(key=lambda s: (-len(s.columns()), -s.hits, s.table, s.columns()))
+    result = []
+    for suggestion in suggestions:
+        for wider in result:
+            if wider.table == suggestion.table and suggestion.covered_by(wider.columns()):
+                wider.hits += suggestion.hits
+                break
+        else:
+            result.append(suggestion)
+    result = [s for s in result if s.hits >= min_hits]
+    result.sort(key=lambda s: (-s.hits, s.table, s.columns()))
+    return result
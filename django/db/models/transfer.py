@@ -0,0 +1,287 @@
+"""
+Loading rows into a table and exporting the results of a QuerySet in bulk.
+
+    Book.objects.copy_from(rows, fields=['title', 'pages'])
+    Book.objects.filter(published=True).copy_to(open('books.csv', 'w'))
+
+On PostgreSQL with psycopg2, both use COPY, streaming the data rather than
+building it up in memory. Other backends load rows with multi-row INSERTs
+(see bulk_insert_query()) and export them by iterating over the QuerySet,
+reading and writing the same formats, so the same code works everywhere.
+
+Two formats are understood, those of PostgreSQL's COPY:
+
+    * "csv": comma separated values. NULL is an unquoted empty value; an
+      empty string is written "".
+    * "text": tab separated values. NULL is written \\N, and backslashes,
+      tabs and line breaks are escaped with a backslash.
+
+Rows are loaded without calling save() or sending signals.
+"""
+
+import re
+
+from django.db import connections, transaction
+from django.db.models.fields import AutoField
+from django.db.models.query import bulk_insert_query
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.utils.encoding import smart_str
+
+FORMATS = ('csv', 'text')
+
+# How many rows are inserted at a time when COPY isn't available.
+CHUNK_SIZE = 1000
+
+csv_quote_re = re.compile(r'[,"\r\n]')
+csv_field_re = re.compile(r'(?:"((?:[^"]|"")*)"|([^,]*))(,|$)', re.DOTALL)
+text_escapes = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'}
+text_escape_re = re.compile(r'[\\\t\n\r]')
+text_unescapes = {'t': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v'}
+text_unescape_re = re.compile(r'\\(.)')
+
+def _to_str(value):
+    if isinstance(value, bool):
+        if value:
+            return 't'
+        return 'f'
+    return smart_str(value)
+
+def format_csv_row(values):
+    """
+    Returns a line of CSV, as COPY reads and writes it, for a sequence of
+    values.
+    """
+    result = []
+    for value in values:
+        if value is None:
+            result.append('')
+            continue
+        value = _to_str(value)
+        if not value or value == '\\.' or csv_quote_re.search(value):
+            value = '"%s"' % value.replace('"', '""')
+        result.append(value)
+    return ','.join(result) + '\n'
+
+def parse_csv_rows(fileobj):
+    """
+    Yields the values, as strings or None, of each record of a CSV file.
+    Unlike the csv module, tells an unquoted empty value (NULL) from a quoted
+    one (an empty string).
+    """
+    lines = iter(fileobj)
+    for record in lines:
+        # A quoted value can span several lines.
+        while record.count('"') % 2:
+            try:
+                record += lines.next()
+            except StopIteration:
+                raise ValueError("Unterminated quoted value in CSV: %r" % record)
+        record = record.rstrip('\r\n')
+        if not record:
+            continue
+        values, pos = [], 0
+        while True:
+            match = csv_field_re.match(record, pos)
+            quoted, unquoted, separator = match.groups()
+            if quoted is not None:
+                values.append(quoted.replace('""', '"'))
+            elif unquoted:
+                values.append(unquoted)
+            else:
+                values.append(None)
+            if not separator:
+                break
+            pos = match.end()
+        yield values
+
+def format_text_row(values):
+    """
+    Returns a line of COPY's text format for a sequence of values.
+    """
+    result = []
+    for value in values:
+        if value is None:
+            result.append('\\N')
+        else:
+            result.append(text_escape_re.sub(lambda m: text_escapes[m.group(0)],
+                                             _to_str(value)))
+    return '\t'.join(result) + '\n'
+
+def parse_text_row(line):
+    """
+    Returns the values, as strings or None, of a line in COPY's text format.
+    """
+    values = []
+    for value in line.rstrip('\r\n').split('\t'):
+        if value == '\\N':
+            values.append(None)
+        else:
+            values.append(text_unescape_re.sub(
+                lambda m: text_unescapes.get(m.group(1), m.group(1)), value))
+    return values
+
+class IteratorFile(object):
+    """
+    A read-only file whose contents are the strings produced by an iterator,
+    read as COPY asks for them.
+    """
+    def __init__(self, iterator):
+        self._iterator = iter(iterator)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += self._iterator.next()
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        result, self._buffer = self._buffer[:size], self._buffer[size:]
+        return result
+
+    def readline(self, size=-1):
+        while '\n' not in self._buffer:
+            try:
+                self._buffer += self._iterator.next()
+            except StopIteration:
+                break
+        end = self._buffer.find('\n') + 1 or len(self._buffer)
+        if size >= 0:
+            end = min(end, size)
+        result, self._buffer = self._buffer[:end], self._buffer[end:]
+        return result
+
+def _check_format(format):
+    if format not in FORMATS:
+        raise ValueError("Unknown format %r; use one of %s." % (format, ', '.join(FORMATS)))
+
+def _load_fields(model, fields):
+    opts = model._meta
+    if opts.parents:
+        raise ValueError("copy_from() can't load rows of %s, which inherits "
+                         "from another model." % opts.object_name)
+    if fields is None:
+        return [f for f in opts.local_fields if not isinstance(f, AutoField)]
+    return [opts.get_field(name) for name in fields]
+
+def _prepare_rows(rows, fields, connection):
+    """
+    Yields each row of values for the fields, prepared for the database. Rows
+    are sequences of values or model instances.
+    """
+    from django.db.models.base import Model
+    for row in rows:
+        if isinstance(row, Model):
+            row = [f.pre_save(row, True) for f in fields]
+        elif len(row) != len(fields):
+            raise ValueError("Expected %d values, got %d: %r" % (len(fields), len(row), row))
+        yield [f.get_db_prep_save(value, connection=connection)
+               for f, value in zip(fields, row)]
+
+def _parse_file(fileobj, format, fields):
+    """
+    Yields the rows of a file in the given format, converted to Python values
+    for the fields.
+    """
+    if format == 'csv':
+        records = parse_csv_rows(fileobj)
+    else:
+        records = (parse_text_row(line) for line in fileobj if line.strip('\r\n'))
+    for values in records:
+        row = []
+        for field, value in zip(fields, values):
+            if value is not None:
+                value = field.to_python(value.decode('utf-8'))
+            row.append(value)
+        yield row
+
+def copy_from(model, source, fields=None, format='csv', using=None):
+    """
+    Loads rows into the table of model. source is an iterable of rows --
+    sequences of values for the given fields (by default, all the fields but
+    an automatic primary key), or model instances -- or a file in the given
+    format. Returns the number of rows loaded.
+    """
+    _check_format(format)
+    connection = connections[using]
+    fields = _load_fields(model, fields)
+    is_file = hasattr(source, 'read')
+    count = 0
+    if connection.features.has_copy:
+        qn = connection.ops.quote_name
+        sql = 'COPY %s (%s) FROM STDIN' % (qn(model._meta.db_table),
+                ', '.join([qn(f.column) for f in fields]))
+        if format == 'csv':
+            sql += ' WITH CSV'
+        cursor = connection.cursor()
+        if is_file:
+            cursor.copy_expert(sql, source)
+            count = cursor.rowcount
+        else:
+            counter = [0]
+            if format == 'csv':
+                formatter = format_csv_row
+            else:
+                formatter = format_text_row
+            def lines():
+                for values in _prepare_rows(source, fields, connection):
+                    counter[0] += 1
+                    yield formatter(values)
+            cursor.copy_expert(sql, IteratorFile(lines()))
+            count = counter[0]
+    else:
+        if is_file:
+            source = _parse_file(source, format, fields)
+        chunk = []
+        for values in _prepare_rows(source, fields, connection):
+            chunk.append(values)
+            if len(chunk) == CHUNK_SIZE:
+                bulk_insert_query(model, fields, chunk, using=using)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            bulk_insert_query(model, fields, chunk, using=using)
+            count += len(chunk)
+    transaction.commit_unless_managed(using=using)
+    return count
+
+def copy_to(queryset, fileobj, fields=None, format='csv'):
+    """
+    Writes the values of the given fields (by default, all of them) of each
+    result of queryset to fileobj, in the given format. Foreign keys are
+    written as the primary key of the related object.
+    """
+    _check_format(format)
+    opts = queryset.model._meta
+    if fields is None:
+        fields = [f.name for f in opts.fields]
+    model_fields = [opts.get_field(name) for name in fields]
+    values = queryset.values_list(*fields)
+    connection = connections[values.db]
+    if connection.features.has_copy:
+        try:
+            sql, params = values.query.get_compiler(values.db).as_sql()
+        except EmptyResultSet:
+            return
+        cursor = connection.cursor()
+        sql = 'COPY (%s) TO STDOUT' % cursor.mogrify(sql, params)
+        if format == 'csv':
+            sql += ' WITH CSV'
+        cursor.copy_expert(sql, fileobj)
+        return
+    if format == 'csv':
+        formatter = format_csv_row
+    else:
+        formatter = format_text_row
+    for row in values.iterator():
+        # Write what COPY would: values as they are sent to the database
+        # (booleans, which SQLite returns as integers, and decimals with
+        # their decimal places, for instance).
+        row = list(row)
+        for i, value in enumerate(row):
+            if value is not None:
+                field = model_fields[i]
+                row[i] = field.get_db_prep_save(field.to_python(value),
+                                                connection=connection)
+        fileobj.write(formatter(row))
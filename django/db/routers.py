@@ -0,0 +1,281 @@
+"""
+Database routers that ship with Django. Install them with the
+DATABASE_ROUTERS setting, like any other router.
+"""
+
+import bisect
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_failed
+from django.db.utils import DEFAULT_DB_ALIAS
+from django.utils.encoding import smart_str
+from django.utils.hashcompat import md5_constructor
+
+class ReplicaRouter(object):
+    """
+    Sends writes to a primary database and spreads reads over its read
+    replicas.
+
+    The replicas of the primary are the databases whose REPLICA_OF setting
+    names it; their WEIGHT setting (1 by default) sets their share of the
+    reads. Subclasses can instead set the 'replicas' attribute to a
+    dictionary mapping aliases to weights.
+
+    After a thread asks where to write, its reads go to the primary for
+    'pin_seconds', so that it sees its own writes even if the replicas lag
+    behind. A replica that can't be connected to is left out of rotation
+    for 'retry_after' seconds.
+
+    With the 'least_outstanding' strategy, reads go to the replica with the
+    fewest connections in use, which requires connection pooling (see the
+    POOL setting); replicas without a pool are chosen by weight.
+    """
+    primary = DEFAULT_DB_ALIAS
+    replicas = None
+    strategy = 'weighted'
+    pin_seconds = 5
+    retry_after = 30
+
+    def __init__(self):
+        if self.strategy not in ('weighted', 'least_outstanding'):
+            raise ValueError("Unknown replica routing strategy '%s'." % self.strategy)
+        if self.replicas is None:
+            self.replicas = dict([(alias, db.get('WEIGHT', 1))
+                    for alias, db in settings.DATABASES.items()
+                    if db.get('REPLICA_OF') == self.primary])
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Maps the aliases of unhealthy replicas to the time they can be
+        # tried again.
+        self._unhealthy = {}
+        connection_failed.connect(self._connection_failed)
+
+    def _connection_failed(self, sender, alias, **kwargs):
+        if alias in self.replicas:
+            self.mark_unhealthy(alias)
+
+    def mark_unhealthy(self, alias):
+        """
+        Takes the replica out of rotation for 'retry_after' seconds.
+        """
+        self._lock.acquire()
+        try:
+            self._unhealthy[alias] = time.time() + self.retry_after
+        finally:
+            self._lock.release()
+
+    def healthy_replicas(self):
+        """
+        Returns the aliases of the replicas currently in rotation.
+        """
+        now = time.time()
+        self._lock.acquire()
+        try:
+            for alias, retry_at in self._unhealthy.items():
+                if retry_at <= now:
+                    del self._unhealthy[alias]
+            return [alias for alias in self.replicas
+                    if alias not in self._unhealthy and self.replicas[alias] > 0]
+        finally:
+            self._lock.release()
+
+    def pin(self):
+        """
+        Sends the reads of the current thread to the primary for the next
+        'pin_seconds' seconds.
+        """
+        self._local.pinned_until = time.time() + self.pin_seconds
+
+    def unpin(self):
+        """
+        Lets the reads of the current thread go to the replicas again.
+        """
+        self._local.pinned_until = None
+
+    def is_pinned(self):
+        pinned_until = getattr(self._local, 'pinned_until', None)
+        return pinned_until is not None and time.time() < pinned_until
+
+    def choose_replica(self, aliases):
+        """
+        Picks one of the given healthy replicas for a read.
+        """
+        if self.strategy == 'least_outstanding':
+            from django.db import connections
+            in_use = []
+            for alias in aliases:
+                pool = connections[alias].pool
+                if pool is None:
+                    break
+                in_use.append((pool.stats()['in_use'], alias))
+            else:
+                fewest = min(in_use)[0]
+                return random.choice([alias for count, alias in in_use if count == fewest])
+        point = random.uniform(0, sum([self.replicas[alias] for alias in aliases]))
+        for alias in aliases:
+            point -= self.replicas[alias]
+            if point <= 0:
+                return alias
+        return aliases[-1]
+
+    def db_for_read(self, model, **hints):
+        if self.is_pinned():
+            return self.primary
+        aliases = self.healthy_replicas()
+        if not aliases:
+            return self.primary
+        return self.choose_replica(aliases)
+
+    def db_for_write(self, model, **hints):
+        self.pin()
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = [self.primary] + self.replicas.keys()
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_syncdb(self, db, model):
+        if db in self.replicas:
+            # Replicas get their tables through replication.
+            return False
+        return None
+
+def _hash(value):
+    return long(md5_constructor(smart_str(value)).hexdigest()[:8], 16)
+
+class HashRing(object):
+    """
+    A consistent-hash ring mapping keys onto nodes.
+
+    Each node is placed on the ring at 'vnodes' points per unit of weight,
+    and a key belongs to the first node after the key's own point. Adding a
+    node to N others only moves about 1/(N+1) of the keys, all to the new
+    node.
+    """
+    def __init__(self, nodes, vnodes=100):
+        if not isinstance(nodes, dict):
+            nodes = dict([(node, 1) for node in nodes])
+        self.nodes = nodes
+        ring = []
+        for node, weight in nodes.items():
+            for i in range(int(vnodes * weight)):
+                ring.append((_hash('%s-%s' % (node, i)), node))
+        ring.sort()
+        self.points = [point for point, node in ring]
+        self.ring_nodes = [node for point, node in ring]
+
+    def get_node(self, key):
+        """
+        Returns the node the key belongs to.
+        """
+        if not self.points:
+            raise ValueError("The hash ring has no nodes.")
+        index = bisect.bisect(self.points, _hash(key)) % len(self.points)
+        return self.ring_nodes[index]
+
+class ShardRouter(object):
+    """
+    Spreads the rows of sharded models over several databases by a shard
+    key, through a consistent-hash ring.
+
+    'shard_keys' maps the models to shard, as 'app_label.modelname'
+    strings, to the name of their shard key field. Rows with equal keys
+    live on the same shard, so related models can be kept together by
+    sharding them on the same value -- a Customer on 'id' and its Orders on
+    'customer', for instance.
+
+    The shards are the databases whose SHARD setting is True, with their
+    WEIGHT setting (1 by default) as their share of the ring; subclasses
+    can instead set the 'shards' attribute to a list of aliases or a
+    dictionary mapping aliases to weights.
+
+    Writes go to the shard of the instance being saved. Reads go to the
+    shard of the instance in the 'instance' hint, which Django passes when
+    following relations; other reads should name their shard explicitly,
+    with using(shard_for(key)). Relations between objects on different
+    shards aren't allowed.
+    """
+    shards = None
+    shard_keys = {}
+    vnodes = 100
+
+    def __init__(self):
+        if self.shards is None:
+            self.shards = dict([(alias, db.get('WEIGHT', 1))
+                    for alias, db in settings.DATABASES.items()
+                    if db.get('SHARD')])
+        elif not isinstance(self.shards, dict):
+            self.shards = dict([(alias, 1) for alias in self.shards])
+        self.ring = HashRing(self.shards, self.vnodes)
+
+    def shard_for(self, key):
+        """
+        Returns the alias of the shard that holds the given key.
+        """
+        return self.ring.get_node(key)
+
+    def shard_key_field(self, model):
+        """
+        Returns the shard key field of the model, or None if it isn't
+        sharded.
+        """
+        opts = model._meta
+        name = self.shard_keys.get('%s.%s' % (opts.app_label, opts.object_name.lower()))
+        if name is None:
+            return None
+        return opts.get_field(name)
+
+    def _db_for_instance(self, model, hints):
+        if 'shard_key' in hints:
+            return self.shard_for(hints['shard_key'])
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        field = self.shard_key_field(instance.__class__)
+        if field is not None:
+            key = getattr(instance, field.attname)
+            if key is not None:
+                return self.shard_for(key)
+        if instance._state.db in self.shards:
+            return instance._state.db
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_instance(model, hints)
+
+    def db_for_write(self, model, **hints):
+        db = self._db_for_instance(model, hints)
+        if db is None and 'instance' in hints and self.shard_key_field(model) is not None:
+            raise ValueError("Can't choose a shard for %s without a value for its shard key '%s'."
+                    % (model._meta.object_name, self.shard_key_field(model).name))
+        return db
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._state.db in self.shards or obj2._state.db in self.shards:
+            return obj1._state.db == obj2._state.db
+        return None
+
+def get_shard_router():
+    """
+    Returns the first ShardRouter in DATABASE_ROUTERS.
+    """
+    from django.db import router
+    for candidate in router.routers:
+        if isinstance(candidate, ShardRouter):
+            return candidate
+    raise ImproperlyConfigured("No ShardRouter is installed in DATABASE_ROUTERS.")
+
+def shard_for(key):
+    """
+    Returns the alias of the shard that holds the given key, according to
+    the installed ShardRouter:
+
+        >>> Order.objects.using(shard_for(customer_id)).filter(customer=customer_id)
+    """
+    return get_shard_router().shard_for(key)
@@ -16,6 +16,10 @@ class DatabaseError(Exception):
 class IntegrityError(DatabaseError):
     pass
 
+class QueryTimeout(DatabaseError):
+    "A query was cancelled because it ran for longer than its timeout."
+    pass
+
 
 def load_backend(backend_name):
     try:
@@ -79,6 +83,9 @@ class ConnectionHandler(object):
         conn.setdefault('TEST_NAME', None)
         conn.setdefault('TEST_MIRROR', None)
         conn.setdefault('TIME_ZONE', settings.TIME_ZONE)
+        conn.setdefault('POOL', None)
+        conn.setdefault('PREPARED_STATEMENTS', None)
+        conn.setdefault('SQL_COMMENTS', None)
         for setting in ('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT'):
             conn.setdefault(setting, '')
 
@@ -99,6 +106,25 @@ class ConnectionHandler(object):
     def all(self):
         return [self[alias] for alias in self]
 
+    def pool_stats(self):
+        """
+        Returns a dictionary mapping the alias of every database that uses a
+        connection pool to the statistics of the pool.
+        """
+        stats = {}
+        for alias in self:
+            conn = self[alias]
+            if conn.pool is not None:
+                stats[alias] = conn.pool.stats()
+        return stats
+
+    def metrics(self):
+        """
+        Returns a dictionary mapping the alias of every database to a
+        snapshot of its metrics (see ConnectionMetrics.snapshot()).
+        """
+        return dict([(alias, self[alias].metrics.snapshot()) for alias in self])
+
 
 class ConnectionRouter(object):
     def __init__(self, routers):
@@ -0,0 +1,24 @@
+"""
+Client-assigned primary keys
+
+A ``HiLoField`` primary key is assigned by Django from blocks of keys
+reserved in the database, so that new objects have a primary key before
+they are inserted.
+"""
+
+from django.db import models
+
+class Event(models.Model):
+    id = models.HiLoField(primary_key=True, block_size=10)
+    name = models.CharField(max_length=50)
+
+    def __unicode__(self):
+        return self.name
+
+class Attendee(models.Model):
+    id = models.HiLoField(primary_key=True, block_size=3, sequence_name='attendee_keys')
+    event = models.ForeignKey(Event)
+    name = models.CharField(max_length=50)
+
+    def __unicode__(self):
+        return self.name
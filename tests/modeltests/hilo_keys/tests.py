@@ -0,0 +1,151 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.utils import load_backend
+from django.db.models.session import session
+from django.test import TestCase, TransactionTestCase
+
+from models import Event, Attendee
+
+
+class HiLoFieldTests(TestCase):
+    def setUp(self):
+        self.old_debug = settings.DEBUG
+        settings.DEBUG = True
+
+    def tearDown(self):
+        settings.DEBUG = self.old_debug
+
+    def test_keys_come_from_blocks(self):
+        connection.queries = []
+        events = [Event.objects.create(name='e%d' % i) for i in range(10)]
+        pks = [e.pk for e in events]
+        self.assertEqual(len(set(pks)), 10)
+        # The first block covers all ten objects, and the keys are known
+        # before the INSERT, so no existence check is made.
+        self.assertEqual(pks, range(pks[0], pks[0] + 10))
+        inserts = [q for q in connection.queries if q['sql'].startswith('INSERT INTO "hilo_keys_event"')]
+        selects = [q for q in connection.queries if 'hilo_keys_event' in q['sql'] and q['sql'].startswith('SELECT')]
+        self.assertEqual(len(inserts), 10)
+        self.assertEqual(selects, [])
+
+        # The next object starts a new block.
+        e = Event.objects.create(name='e10')
+        self.assertEqual(e.pk, pks[-1] + 1)
+        self.assertEqual(Event.objects.get(pk=e.pk).name, 'e10')
+
+    def test_explicit_key(self):
+        e = Event(pk=1000, name='explicit')
+        e.save()
+        self.assertEqual(Event.objects.get(pk=1000).name, 'explicit')
+        e.name = 'changed'
+        e.save()
+        self.assertEqual(Event.objects.get(pk=1000).name, 'changed')
+        self.assertEqual(Event.objects.count(), 1)
+
+    def test_sequences_are_separate(self):
+        e = Event.objects.create(name='event')
+        attendees = [Attendee.objects.create(event=e, name='a%d' % i) for i in range(7)]
+        self.assertEqual(len(set([a.pk for a in attendees])), 7)
+        self.assertEqual(list(Attendee.objects.order_by('pk')), attendees)
+
+    def test_session_inserts_in_batch(self):
+        connection.queries = []
+        s = session()
+        s.begin()
+        try:
+            events = [Event(name='e%d' % i) for i in range(25)]
+            for event in events:
+                event.save()
+            attendees = [Attendee(event=events[0], name='a%d' % i) for i in range(5)]
+            for attendee in attendees:
+                attendee.save()
+            s.flush()
+        finally:
+            s.end()
+        self.assertEqual(len(set([e.pk for e in events])), 25)
+        self.assertEqual(Event.objects.count(), 25)
+        self.assertEqual(events[0].attendee_set.count(), 5)
+        if connection.features.has_bulk_insert:
+            inserts = [q for q in connection.queries if q['sql'].startswith('INSERT INTO "hilo_keys_event"')]
+            self.assertEqual(len(inserts), 1)
+
+    def test_creation_sql(self):
+        from django.core.management.color import no_style
+        output, _ = connection.creation.sql_create_model(Attendee, no_style())
+        self.assertEqual(output[1:], connection.ops.key_block_sql(no_style(), 'attendee_keys', 3))
+
+
+class HiLoRollbackTests(TransactionTestCase):
+    def test_rolled_back_block_is_not_reused(self):
+        if connection.features.has_native_key_sequences:
+            return
+        # Start without a cached block, so that the first object reserves
+        # one inside the transaction.
+        Event._meta.pk.key_allocator._blocks.__dict__.clear()
+        transaction.enter_transaction_management()
+        transaction.managed(True)
+        try:
+            first = Event.objects.create(name='rolled back')
+            transaction.rollback()
+            second = Event.objects.create(name='kept')
+            transaction.commit()
+        finally:
+            transaction.leave_transaction_management()
+        # The reservation was undone with the first object, so the block is
+        # reserved again; the key doesn't clash with anything.
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual([e.name for e in Event.objects.all()], ['kept'])
+
+    def test_committed_blocks_survive(self):
+        if connection.features.has_native_key_sequences:
+            return
+        block_size = Event._meta.pk.block_size
+        Event._meta.pk.key_allocator._blocks.__dict__.clear()
+        transaction.enter_transaction_management()
+        transaction.managed(True)
+        try:
+            a = Event.objects.create(name='a')
+            b = Event.objects.create(name='b')
+            transaction.commit()
+            rolled_back = Event.objects.create(name='rolled back')
+            transaction.rollback()
+            c = Event.objects.create(name='c')
+            transaction.commit()
+        finally:
+            transaction.leave_transaction_management()
+        self.assertEqual(b.pk, a.pk + 1)
+        self.assertEqual(rolled_back.pk, b.pk + 1)
+        # The reservation of the first block was committed, so the rollback
+        # doesn't undo it: the block isn't handed out again, and the next
+        # one starts after it.
+        self.assertTrue(c.pk >= a.pk + block_size, (a.pk, c.pk))
+        self.assertEqual([e.name for e in Event.objects.order_by('pk')], ['a', 'b', 'c'])
+
+    def test_close_without_changes(self):
+        # Closing a connection only counts as a rollback when there were
+        # uncommitted changes, so that blocks aren't thrown away for nothing.
+        fd, name = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        settings_dict = dict(connection.settings_dict, ENGINE='django.db.backends.sqlite3',
+                             NAME=name, POOL=None)
+        wrapper = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, connection.alias)
+        try:
+            wrapper.cursor()
+            wrapper.close()
+            self.assertEqual(wrapper.rollback_count, 0)
+            transaction.enter_transaction_management()
+            transaction.managed(True)
+            try:
+                wrapper.cursor()
+                transaction.set_dirty()
+                wrapper.close()
+                transaction.set_clean()
+            finally:
+                transaction.leave_transaction_management()
+            self.assertEqual(wrapper.rollback_count, 1)
+        finally:
+            wrapper.close()
+            os.remove(name)
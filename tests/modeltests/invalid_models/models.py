@@ -182,6 +182,18 @@ class UniqueM2M(models.Model):
     """ Model to test for unique ManyToManyFields, which are invalid. """
     unique_people = models.ManyToManyField( Person, unique=True )
 
+class BadIndexes(models.Model):
+    """ Model to test for indexes on fields that don't exist or are M2M. """
+    name = models.CharField(max_length=10)
+    people = models.ManyToManyField(Person)
+
+    class Meta:
+        indexes = [
+            models.Index('name', '-missing'),
+            models.Index('people'),
+            models.Index('LOWER(%(name)s)', where='%(deleted)s = 0'),
+        ]
+
 
 model_errors = """invalid_models.fielderrors: "charfield": CharFields require a "max_length" attribute.
 invalid_models.fielderrors: "decimalfield": DecimalFields require a "decimal_places" attribute.
@@ -279,4 +291,7 @@ invalid_models.personselfrefm2mexplicit: Many-to-many fields with intermediate t
 invalid_models.abstractrelationmodel: 'fk1' has a relation with model AbstractModel, which has either not been installed or is abstract.
 invalid_models.abstractrelationmodel: 'fk2' has an m2m relation with model AbstractModel, which has either not been installed or is abstract.
 invalid_models.uniquem2m: ManyToManyFields cannot be unique.  Remove the unique argument on 'unique_people'.
+invalid_models.badindexes: "indexes" refers to missing, a field that doesn't exist.
+invalid_models.badindexes: "indexes" refers to people. ManyToManyFields can't be indexed.
+invalid_models.badindexes: "indexes" refers to deleted, a field that doesn't exist.
 """
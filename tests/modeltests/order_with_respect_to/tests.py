@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+from models import Question, Answer
+
+
+class OrderingQueryTests(TestCase):
+    def setUp(self):
+        self.old_debug = settings.DEBUG
+        settings.DEBUG = True
+        self.q1 = Question.objects.create(text='q1')
+        self.q2 = Question.objects.create(text='q2')
+
+    def tearDown(self):
+        settings.DEBUG = self.old_debug
+
+    def test_insert_is_single_query(self):
+        Answer.objects.create(text='a', question=self.q1)
+        connection.queries = []
+        Answer.objects.create(text='b', question=self.q1)
+        if connection.features.update_can_self_select:
+            # _order is computed by the INSERT itself.
+            self.assertEqual(len(connection.queries), 1)
+        self.assertEqual([a.text for a in self.q1.answer_set.all()], ['a', 'b'])
+
+    def test_insert_after_delete(self):
+        answers = [Answer.objects.create(text=str(i), question=self.q1) for i in range(3)]
+        answers[1].delete()
+        Answer.objects.create(text='3', question=self.q1)
+        Answer.objects.create(text='x', question=self.q2)
+        self.assertEqual([a.text for a in self.q1.answer_set.all()], ['0', '2', '3'])
+        self.assertEqual(Answer.objects.filter(text='x').values_list('_order', flat=True)[0], 0)
+
+    def test_set_order_is_single_update(self):
+        answers = [Answer.objects.create(text=str(i), question=self.q1) for i in range(50)]
+        other = Answer.objects.create(text='other', question=self.q2)
+        id_list = [a.pk for a in reversed(answers)]
+        # A key belonging to another question is ignored.
+        connection.queries = []
+        self.q1.set_answer_order(id_list + [other.pk])
+        self.assertEqual(len(connection.queries), 1)
+        self.assertEqual(self.q1.get_answer_order(), id_list)
+        self.assertEqual(Answer.objects.filter(pk=other.pk).values_list('_order', flat=True)[0], 0)
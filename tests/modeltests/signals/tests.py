@@ -26,3 +26,40 @@ class SignalTests(TestCase):
         self.failUnless(b._run)
         self.assertEqual(signals.post_save.receivers, [])
         
+
+    def test_bulk_delete_signals(self):
+        """
+        Test that the bulk delete signals are sent once per batch, with all
+        of the affected instances, while the per-instance signals still fire.
+        """
+        for first_name in ('John', 'Paul', 'George'):
+            Person.objects.create(first_name=first_name, last_name='Smith')
+
+        sent = []
+        def pre_bulk_handler(signal, sender, instances, **kwargs):
+            sent.append(('pre_bulk_delete', sender,
+                sorted([i.first_name for i in instances])))
+        def post_bulk_handler(signal, sender, instances, **kwargs):
+            sent.append(('post_bulk_delete', sender,
+                sorted([i.first_name for i in instances]),
+                [i.pk is not None for i in instances]))
+        def post_handler(signal, sender, instance, **kwargs):
+            sent.append(('post_delete', sender, instance.first_name))
+
+        signals.pre_bulk_delete.connect(pre_bulk_handler, sender=Person)
+        signals.post_bulk_delete.connect(post_bulk_handler, sender=Person)
+        signals.post_delete.connect(post_handler, sender=Person)
+        try:
+            Person.objects.filter(last_name='Smith').delete()
+        finally:
+            signals.pre_bulk_delete.disconnect(pre_bulk_handler, sender=Person)
+            signals.post_bulk_delete.disconnect(post_bulk_handler, sender=Person)
+            signals.post_delete.disconnect(post_handler, sender=Person)
+
+        self.assertEqual(sent[0],
+            ('pre_bulk_delete', Person, ['George', 'John', 'Paul']))
+        self.assertEqual(len([s for s in sent if s[0] == 'post_delete']), 3)
+        self.assertEqual(sent[-1],
+            ('post_bulk_delete', Person, ['George', 'John', 'Paul'],
+             [True, True, True]))
+        self.assertEqual(Person.objects.count(), 0)
@@ -0,0 +1,35 @@
+"""
+Unit-of-work sessions
+
+Inside a session, ``save()`` and ``delete()`` are queued and written in
+batches when the session is flushed.
+"""
+
+from django.db import models
+
+class Author(models.Model):
+    name = models.CharField(max_length=50)
+
+    def __unicode__(self):
+        return self.name
+
+class Book(models.Model):
+    title = models.CharField(max_length=50)
+    author = models.ForeignKey(Author)
+
+    def __unicode__(self):
+        return self.title
+
+class Category(models.Model):
+    name = models.CharField(max_length=50)
+    parent = models.ForeignKey('self', null=True)
+
+    def __unicode__(self):
+        return self.name
+
+class Code(models.Model):
+    code = models.CharField(max_length=10, primary_key=True)
+    description = models.CharField(max_length=50)
+
+    def __unicode__(self):
+        return self.code
@@ -0,0 +1,234 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import signals
+from django.db.models.session import session, get_session
+from django.test import TestCase, TransactionTestCase
+
+from models import Author, Book, Category, Code
+
+
+class SessionTests(TestCase):
+    def test_saves_are_deferred(self):
+        s = session()
+        s.begin()
+        try:
+            a = Author(name='Douglas')
+            a.save()
+            self.assertEqual(len(s), 1)
+            self.assertEqual(Author.objects.count(), 0)
+            self.assertEqual(a.pk, None)
+            s.flush()
+        finally:
+            s.end()
+        self.assertEqual(get_session(), None)
+        self.assertEqual(Author.objects.count(), 1)
+        self.assertNotEqual(a.pk, None)
+        self.assertEqual(a._state.db, 'default')
+
+    def test_dependency_order(self):
+        s = session()
+        s.begin()
+        try:
+            # Children are saved before their parents, but written after
+            # them.
+            a = Author(name='Terry')
+            books = [Book(title='Book %d' % i, author=a) for i in range(3)]
+            for book in books:
+                book.save()
+            a.save()
+            s.flush()
+        finally:
+            s.end()
+        self.assertEqual(
+            sorted(Book.objects.filter(author__name='Terry').values_list('title', flat=True)),
+            ['Book 0', 'Book 1', 'Book 2'])
+        for book in books:
+            self.assertEqual(book.author_id, a.pk)
+
+    def test_self_referential(self):
+        s = session()
+        s.begin()
+        try:
+            root = Category(name='root')
+            child = Category(name='child', parent=root)
+            root.save()
+            child.save()
+            s.flush()
+        finally:
+            s.end()
+        self.assertEqual(Category.objects.get(name='child').parent, root)
+
+    def test_batched_statements(self):
+        Code.objects.create(code='a', description='old')
+        old_debug = settings.DEBUG
+        settings.DEBUG = True
+        try:
+            connection.queries = []
+            s = session()
+            s.begin()
+            try:
+                Code(code='a', description='new').save()
+                for i in range(10):
+                    Code(code='c%d' % i, description='code').save()
+                s.flush()
+            finally:
+                s.end()
+            queries = [q['sql'] for q in connection.queries]
+        finally:
+            settings.DEBUG = old_debug
+        if connection.features.has_bulk_insert:
+            # One SELECT to find the existing rows, one UPDATE and one
+            # INSERT.
+            self.assertEqual(len([q for q in queries if 'SAVEPOINT' not in q]), 3)
+        self.assertEqual(Code.objects.get(code='a').description, 'new')
+        self.assertEqual(Code.objects.count(), 11)
+
+    def test_save_twice(self):
+        s = session()
+        s.begin()
+        try:
+            a = Author(name='first')
+            a.save()
+            a.name = 'second'
+            a.save()
+            self.assertEqual(len(s), 1)
+            s.flush()
+        finally:
+            s.end()
+        self.assertEqual(list(Author.objects.values_list('name', flat=True)), ['second'])
+
+    def test_delete(self):
+        a = Author.objects.create(name='Ursula')
+        Book.objects.create(title='Earthsea', author=a)
+        s = session()
+        s.begin()
+        try:
+            a.delete()
+            self.assertEqual(Author.objects.count(), 1)
+            s.flush()
+        finally:
+            s.end()
+        self.assertEqual(Author.objects.count(), 0)
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_explicit_flush(self):
+        s = session()
+        s.begin()
+        try:
+            Author(name='Iain').save()
+            s.flush()
+            self.assertEqual(Author.objects.count(), 1)
+            self.assertEqual(len(s), 0)
+        finally:
+            s.end()
+
+    def test_create_writes_through(self):
+        s = session()
+        s.begin()
+        try:
+            a = Author.objects.create(name='Neil')
+            self.assertNotEqual(a.pk, None)
+            self.assertEqual(Author.objects.count(), 1)
+            s.flush()
+        finally:
+            s.end()
+
+    def test_signals(self):
+        sent = []
+        def bulk_handler(signal, sender, instances, **kwargs):
+            sent.append((signal, len(instances), kwargs.get('created')))
+        def handler(signal, sender, instance, **kwargs):
+            sent.append((signal, instance.name, kwargs.get('created')))
+        signals.pre_bulk_save.connect(bulk_handler, sender=Author)
+        signals.post_bulk_save.connect(bulk_handler, sender=Author)
+        signals.post_save.connect(handler, sender=Author)
+        try:
+            s = session()
+            s.begin()
+            try:
+                Author(name='a').save()
+                Author(name='b').save()
+                s.flush()
+            finally:
+                s.end()
+        finally:
+            signals.pre_bulk_save.disconnect(bulk_handler, sender=Author)
+            signals.post_bulk_save.disconnect(bulk_handler, sender=Author)
+            signals.post_save.disconnect(handler, sender=Author)
+        self.assertEqual(sent, [
+            (signals.pre_bulk_save, 2, None),
+            (signals.post_save, 'a', True),
+            (signals.post_save, 'b', True),
+            (signals.post_bulk_save, 2, True),
+        ])
+
+
+class SessionTransactionTests(TransactionTestCase):
+    def test_exception_discards_writes(self):
+        s = session()
+        s.begin()
+        try:
+            try:
+                Author(name='never').save()
+                raise ValueError
+            except ValueError:
+                pass
+        finally:
+            s.clear()
+            s.end()
+        self.assertEqual(Author.objects.count(), 0)
+
+    def test_failed_flush_rolls_back(self):
+        Code.objects.create(code='x', description='existing')
+        s = session()
+        s.begin()
+        try:
+            Author(name='rolled back').save()
+            Code(code='x', description='duplicate').save(force_insert=True)
+            try:
+                s.flush()
+            except Exception:
+                pass
+        finally:
+            s.end()
+        self.assertEqual(Author.objects.count(), 0)
+        self.assertEqual(Code.objects.get(code='x').description, 'existing')
+
+    def test_flush_in_caller_transaction(self):
+        # A flush inside a transaction the caller manages doesn't end it:
+        # the caller can still roll the writes back.
+        def work():
+            Author.objects.create(name='before')
+            s = session()
+            s.begin()
+            try:
+                Author(name='queued').save()
+                s.flush()
+            finally:
+                s.end()
+            self.assertTrue(transaction.is_dirty())
+            transaction.rollback()
+        transaction.commit_manually(work)()
+        self.assertEqual(Author.objects.count(), 0)
+
+    def test_failed_flush_in_caller_transaction(self):
+        # A failed flush only undoes its own writes.
+        if not connection.features.uses_savepoints:
+            return
+        Code.objects.create(code='x', description='existing')
+        def work():
+            Author.objects.create(name='before')
+            s = session()
+            s.begin()
+            try:
+                Author(name='rolled back').save()
+                Code(code='x', description='duplicate').save(force_insert=True)
+                try:
+                    s.flush()
+                except Exception:
+                    pass
+            finally:
+                s.end()
+            transaction.commit()
+        transaction.commit_manually(work)()
+        self.assertEqual(list(Author.objects.values_list('name', flat=True)), ['before'])
@@ -2,6 +2,7 @@
 # Unit and doctests for specific database backends.
 import unittest
 from django.db import backend, connection, DEFAULT_DB_ALIAS
+from django.db.backends.prepared import PreparedStatements, has_typed_placeholders
 from django.db.backends.signals import connection_created
 from django.conf import settings
 
@@ -34,6 +35,280 @@ class LongString(unittest.TestCase):
             c.execute('DROP TABLE ltext')
             self.assertEquals(long_str, row[0].read())
 
+class MySQLLiveness(unittest.TestCase):
+
+    def test_no_ping_when_recently_used(self):
+        # If the backend is MySQL, check that the connection is only pinged
+        # after it has been idle for a while.
+        if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] == 'django.db.backends.mysql':
+            connection.cursor()
+            pings = connection.liveness_stats()['pings']
+            for i in range(5):
+                connection.cursor()
+            self.assertEquals(connection.liveness_stats()['pings'], pings)
+            connection.last_used -= 3600
+            connection.cursor()
+            self.assertEquals(connection.liveness_stats()['pings'], pings + 1)
+
+    def test_retry_read_on_lost_connection(self):
+        # If the backend is MySQL, kill the connection from the server side
+        # and check that a read reconnects.
+        if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] == 'django.db.backends.mysql':
+            from django.db import transaction
+            if transaction.is_dirty():
+                return
+            cursor = connection.cursor()
+            cursor.execute('SELECT CONNECTION_ID()')
+            old_id = cursor.fetchone()[0]
+            reconnects = connection.liveness_stats()['reconnects']
+            try:
+                connection.connection.kill(old_id)
+            except Exception:
+                # The server may report the killed connection right away.
+                pass
+            cursor.execute('SELECT CONNECTION_ID()')
+            self.assertNotEquals(cursor.fetchone()[0], old_id)
+            self.assertEquals(connection.liveness_stats()['reconnects'], reconnects + 1)
+
+class SQLitePragmas(unittest.TestCase):
+
+    def test_pragma_options(self):
+        # If the backend is SQLite, check that the PRAGMA options are applied
+        # to new connections, and the other options passed to connect().
+        if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] == 'django.db.backends.sqlite3':
+            import os
+            import tempfile
+            from django.core.exceptions import ImproperlyConfigured
+            from django.db.backends.sqlite3.base import DatabaseWrapper
+            directory = tempfile.mkdtemp()
+            name = os.path.join(directory, 'pragmas.db')
+            wrapper = DatabaseWrapper({'NAME': name, 'OPTIONS': {
+                'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 1234,
+                'cache_size': -4000, 'temp_store': 'MEMORY', 'cached_statements': 10,
+            }})
+            try:
+                cursor = wrapper.cursor()
+                def pragma(name):
+                    cursor.execute('PRAGMA %s' % name)
+                    return cursor.fetchone()[0]
+                self.assertEquals(pragma('journal_mode'), 'wal')
+                self.assertEquals(pragma('synchronous'), 1)
+                self.assertEquals(pragma('busy_timeout'), 1234)
+                self.assertEquals(pragma('cache_size'), -4000)
+                self.assertEquals(pragma('temp_store'), 2)
+                wrapper.close()
+
+                wrapper = DatabaseWrapper({'NAME': name, 'OPTIONS': {'synchronous': 'OFF; DROP TABLE x'}})
+                self.assertRaises(ImproperlyConfigured, wrapper.cursor)
+            finally:
+                wrapper.close()
+                for filename in os.listdir(directory):
+                    os.remove(os.path.join(directory, filename))
+                os.rmdir(directory)
+
+class SQLiteDateFunctions(unittest.TestCase):
+
+    def test_native_date_functions(self):
+        # If the backend is SQLite, check that date extraction and truncation
+        # are done in SQL, including for values with microseconds.
+        if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] == 'django.db.backends.sqlite3':
+            ops = connection.ops
+            values = ['2010-02-28 13:45:10.123456', '2010-03-07', 'not a date', None]
+            expressions = [ops.date_extract_sql(lookup_type, '%s')
+                           for lookup_type in ('year', 'month', 'day', 'week_day')]
+            expressions += [ops.date_trunc_sql(lookup_type, '%s')
+                            for lookup_type in ('year', 'month', 'day')]
+            self.assertFalse([e for e in expressions if 'django_' in e])
+            cursor = connection.cursor()
+            rows = []
+            for value in values:
+                cursor.execute('SELECT %s' % ', '.join(expressions), [value] * len(expressions))
+                rows.append(tuple(cursor.fetchone()))
+            self.assertEquals(rows, [
+                (2010, 2, 28, 1, '2010-01-01 00:00:00', '2010-02-01 00:00:00', '2010-02-28 00:00:00'),
+                (2010, 3, 7, 1, '2010-01-01 00:00:00', '2010-03-01 00:00:00', '2010-03-07 00:00:00'),
+                (None,) * 7,
+                (None,) * 7,
+            ])
+
+    def test_regexp_cache(self):
+        if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] == 'django.db.backends.sqlite3':
+            from django.db.backends.sqlite3 import base
+            base._regexp_cache.clear()
+            self.assertEquals(base._sqlite_regexp('^a.c$', 'abc'), True)
+            self.assertEquals(base._sqlite_regexp('^a.c$', 'abcd'), False)
+            self.assertEquals(base._regexp_cache.keys(), ['^a.c$'])
+            self.assertEquals(base._sqlite_regexp('(', 'abc'), False)
+            self.assertEquals(base._sqlite_regexp('^a', None), False)
+            for i in range(base.REGEXP_CACHE_SIZE + 1):
+                base._sqlite_regexp('x%d' % i, 'x')
+            self.assertTrue(len(base._regexp_cache) <= base.REGEXP_CACHE_SIZE)
+
+class StatementCacheTests(unittest.TestCase):
+
+    def test_generations(self):
+        from django.db.backends.util import StatementCache
+        cache = StatementCache(4)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        # 'a' and 'b' are now in the old generation; using 'a' keeps it.
+        self.assertEquals(cache.get('a'), 1)
+        cache.set('d', 4)
+        self.assertEquals(cache.get('b'), None)
+        self.assertEquals([cache.get(key) for key in 'acd'], [1, 3, 4])
+        self.assertTrue(len(cache) <= 4)
+
+    def test_sqlite_converted_queries(self):
+        if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] == 'django.db.backends.sqlite3':
+            cursor = connection.cursor()
+            sql = "SELECT %s, %s, '50%%'"
+            for i in range(2):
+                cursor.execute(sql, [1, 2])
+                self.assertEquals(cursor.fetchone(), (1, 2, '50%'))
+            self.assertEquals(connection.converted_queries.get((sql, 2)), "SELECT ?, ?, '50%'")
+
+class RecordingCursor(object):
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+class RecordingPreparedStatements(PreparedStatements):
+    placeholder = '$%d'
+
+    def prepare_statement(self, cursor, name, sql):
+        if 'refuse' in sql:
+            return False
+        cursor.execute('PREPARE %s AS %s' % (name, sql))
+        return True
+
+    def execute_statement(self, cursor, name, params):
+        cursor.execute('EXECUTE %s' % name, params)
+
+    def deallocate_statement(self, cursor, name):
+        cursor.execute('DEALLOCATE %s' % name)
+
+class PreparedStatementsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.statements = RecordingPreparedStatements({'THRESHOLD': 2, 'MAX_SIZE': 2})
+        self.statements.bind(object())
+        self.cursor = RecordingCursor()
+
+    def execute(self, sql, params):
+        self.cursor.executed = []
+        self.statements.execute(self.cursor, sql, params)
+        return [executed[0].split(' ')[0] for executed in self.cursor.executed]
+
+    def test_prepared_after_threshold(self):
+        sql = 'SELECT a FROM t WHERE b = %s AND c LIKE %s'
+        self.assertEquals(self.execute(sql, [1, 'x%']), ['SELECT'])
+        self.assertEquals(self.execute(sql, [2, 'x%']), ['SELECT'])
+        self.assertEquals(self.execute(sql, [3, 'x%']), ['PREPARE', 'EXECUTE'])
+        self.assertEquals(self.cursor.executed[0][0],
+            'PREPARE %s AS SELECT a FROM t WHERE b = $1 AND c LIKE $2' % self.statements.statements[sql])
+        self.assertEquals(self.cursor.executed[1][1], [3, 'x%'])
+        self.assertEquals(self.execute(sql, [4, 'x%']), ['EXECUTE'])
+        self.assertEquals(self.statements.stats['prepares'], 1)
+        self.assertEquals(self.statements.stats['executions'], 2)
+
+    def test_not_preparable(self):
+        for sql, params in [
+                ('SELECT 1', []),
+                ('SELECT a FROM t WHERE b = %(b)s', {'b': 1}),
+                ('CREATE TABLE t (a varchar(10) DEFAULT %s)', ['x']),
+                ("SELECT a FROM t WHERE b LIKE 'x%%' AND c = %s", [1, 2])]:
+            for i in range(4):
+                self.assertEquals(self.execute(sql, params), [sql.split(' ')[0]])
+        # Literal percent signs are unescaped in prepared SQL.
+        self.assertEquals(self.statements.convert("SELECT 'x%%' WHERE a = %s"),
+            "SELECT 'x%' WHERE a = $1")
+
+    def test_refused(self):
+        sql = 'SELECT refuse FROM t WHERE b = %s'
+        for i in range(5):
+            self.assertEquals(self.execute(sql, [i]), ['SELECT'])
+        self.assertEquals(self.statements.stats['failures'], 1)
+
+    def test_eviction(self):
+        queries = ['SELECT a FROM t%d WHERE b = %%s' % i for i in range(3)]
+        for sql in queries[:2]:
+            for i in range(3):
+                self.execute(sql, [i])
+        # Use the first statement, so that the second is the least recent.
+        self.execute(queries[0], [1])
+        for i in range(2):
+            self.execute(queries[2], [i])
+        self.assertEquals(self.execute(queries[2], [2]), ['DEALLOCATE', 'PREPARE', 'EXECUTE'])
+        self.assertEquals(self.statements.statements.keys(), [queries[0], queries[2]])
+        self.assertEquals(self.statements.stats['evictions'], 1)
+
+        self.cursor.executed = []
+        self.statements.deallocate_all(self.cursor)
+        self.assertEquals([sql.split(' ')[0] for sql, params in self.cursor.executed],
+            ['DEALLOCATE', 'DEALLOCATE'])
+        self.assertEquals(len(self.statements.statements), 0)
+
+    def test_comments(self):
+        # Statements differing only in their SQL_COMMENTS comment are one
+        # statement, prepared without the comment.
+        sql = 'SELECT a FROM t WHERE b = %s'
+        for i in range(2):
+            self.assertEquals(self.execute(sql + " /*request_id='%d',x='50%%%%'*/" % i, [i]), ['SELECT'])
+            self.assertEquals(self.cursor.executed[0][0], sql + " /*request_id='%d',x='50%%%%'*/" % i)
+        self.assertEquals(self.execute(sql + " /*request_id='2'*/", [2]), ['PREPARE', 'EXECUTE'])
+        self.assertEquals(self.statements.statements.keys(), [sql])
+        self.assertEquals(self.cursor.executed[0][0],
+            'PREPARE %s AS SELECT a FROM t WHERE b = $1' % self.statements.statements[sql])
+
+    def test_typed_placeholders(self):
+        for sql in [
+                'SELECT a FROM t WHERE b = %s AND c LIKE UPPER(%s)',
+                'SELECT a FROM t WHERE b BETWEEN %s AND %s OR c IN (%s, %s)',
+                "SELECT (SELECT x FROM u WHERE y >= %s) AS z, 'SELECT' FROM t WHERE a = %s",
+                'INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)',
+                'UPDATE t SET a = %s, b = (b + %s) WHERE c = ANY(%s)']:
+            self.assertTrue(has_typed_placeholders(sql), sql)
+        for sql in [
+                'SELECT (%s) AS x FROM t WHERE a = %s',
+                'SELECT a FROM t WHERE b IN (SELECT %s FROM u)',
+                'SELECT a FROM t WHERE %s IS NULL']:
+            self.assertFalse(has_typed_placeholders(sql), sql)
+
+    def test_new_connection(self):
+        sql = 'SELECT a FROM t WHERE b = %s'
+        for i in range(3):
+            self.execute(sql, [i])
+        self.statements.bind(object())
+        # The statements of the old connection are forgotten.
+        self.assertEquals(self.execute(sql, [1]), ['SELECT'])
+
+class PostgreSQLPreparedStatements(unittest.TestCase):
+
+    def test_prepared_statements(self):
+        if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] == 'django.db.backends.postgresql_psycopg2':
+            from django.db.backends.postgresql_psycopg2.base import DatabasePreparedStatements
+            old_statements = connection.prepared_statements
+            connection.prepared_statements = DatabasePreparedStatements({'THRESHOLD': 1})
+            try:
+                cursor = connection.cursor()
+                for i in range(3):
+                    cursor.execute('SELECT relname FROM pg_class WHERE relname = %s', ['pg_class'])
+                    self.assertEquals(cursor.fetchone()[0], 'pg_class')
+                self.assertEquals(connection.prepared_statements.stats['executions'], 2)
+                # A parameter whose type would be inferred as text isn't
+                # prepared.
+                for i in range(3):
+                    cursor.execute('SELECT %s', [i])
+                    self.assertEquals(cursor.fetchone()[0], i)
+                self.assertEquals(connection.prepared_statements.stats['executions'], 2)
+                self.assertEquals(connection.prepared_statements.stats['failures'], 0)
+            finally:
+                connection.prepared_statements.deallocate_all(connection.connection.cursor())
+                connection.prepared_statements = old_statements
+
 def connection_created_test(sender, **kwargs):
     print 'connection_created signal'
 
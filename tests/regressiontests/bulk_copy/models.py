@@ -0,0 +1,22 @@
+from django.db import models
+
+class Author(models.Model):
+    name = models.CharField(max_length=50)
+
+    def __unicode__(self):
+        return self.name
+
+class Book(models.Model):
+    title = models.CharField(max_length=100)
+    subtitle = models.CharField(max_length=100, null=True)
+    pages = models.IntegerField()
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+    published = models.DateField()
+    in_print = models.BooleanField()
+    author = models.ForeignKey(Author, null=True)
+
+    class Meta:
+        ordering = ('title',)
+
+    def __unicode__(self):
+        return self.title
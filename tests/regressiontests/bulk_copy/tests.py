@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import datetime
+from decimal import Decimal
+from StringIO import StringIO
+
+from django.db.models import transfer
+from django.test import TestCase
+
+from models import Author, Book
+
+FIELDS = ['title', 'subtitle', 'pages', 'price', 'published', 'in_print', 'author']
+
+class FormatTests(TestCase):
+    def test_csv(self):
+        self.assertEqual(transfer.format_csv_row(
+                [1, None, '', 'a,b', 'say "hi"', True, Decimal('1.50')]),
+            '1,,"","a,b","say ""hi""",t,1.50\n')
+        self.assertEqual(transfer.format_csv_row([u'caf\xe9']), 'caf\xc3\xa9\n')
+
+    def test_parse_csv(self):
+        data = StringIO('1,,"","a,b","two\nlines","say ""hi"""\r\n\n2\n')
+        self.assertEqual(list(transfer.parse_csv_rows(data)),
+            [['1', None, '', 'a,b', 'two\nlines', 'say "hi"'], ['2']])
+        self.assertRaises(ValueError, list, transfer.parse_csv_rows(StringIO('"open\n')))
+
+    def test_text(self):
+        line = transfer.format_text_row([1, None, '', 'a\tb\\c\nd', False])
+        self.assertEqual(line, '1\t\\N\t\ta\\tb\\\\c\\nd\tf\n')
+        self.assertEqual(transfer.parse_text_row(line),
+            ['1', None, '', 'a\tb\\c\nd', 'f'])
+
+    def test_iterator_file(self):
+        f = transfer.IteratorFile(iter(['ab\n', 'cd', 'e\nf']))
+        self.assertEqual(f.read(3), 'ab\n')
+        self.assertEqual(f.readline(), 'cde\n')
+        self.assertEqual(f.read(), 'f')
+        self.assertEqual(f.read(10), '')
+
+class CopyTests(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Ann')
+
+    def rows(self):
+        return [
+            ('Alpha', None, 100, Decimal('9.99'), datetime.date(2010, 1, 2), True, self.author.pk),
+            ('Beta, the sequel', '', 200, Decimal('10.50'), datetime.date(2010, 3, 4), False, None),
+        ]
+
+    def check_books(self):
+        alpha, beta = Book.objects.all()
+        self.assertEqual(alpha.subtitle, None)
+        self.assertEqual(alpha.price, Decimal('9.99'))
+        self.assertEqual(alpha.published, datetime.date(2010, 1, 2))
+        self.assertEqual(alpha.in_print, True)
+        self.assertEqual(alpha.author, self.author)
+        self.assertEqual(beta.title, 'Beta, the sequel')
+        self.assertEqual(beta.subtitle, '')
+        self.assertEqual(beta.in_print, False)
+        self.assertEqual(beta.author, None)
+
+    def test_copy_from_rows(self):
+        rows = (row for row in self.rows())
+        self.assertEqual(Book.objects.copy_from(rows, fields=FIELDS), 2)
+        self.check_books()
+
+    def test_copy_from_instances(self):
+        books = [Book(title='Alpha', pages=1, price=Decimal('9.99'),
+                      published=datetime.date(2010, 1, 2), in_print=True)]
+        self.assertEqual(Book.objects.copy_from(books), 1)
+        self.assertEqual(Book.objects.get().title, 'Alpha')
+
+    def test_wrong_row_length(self):
+        self.assertRaises(ValueError, Book.objects.copy_from, [('Alpha',)], fields=FIELDS)
+        self.assertRaises(ValueError, Book.objects.copy_from, [], format='xml')
+
+    def test_copy_to(self):
+        Book.objects.copy_from(self.rows(), fields=FIELDS)
+        out = StringIO()
+        Book.objects.copy_to(out, fields=FIELDS)
+        self.assertEqual(out.getvalue(),
+            'Alpha,,100,9.99,2010-01-02,t,%d\n'
+            '"Beta, the sequel","",200,10.50,2010-03-04,f,\n' % self.author.pk)
+        out = StringIO()
+        Book.objects.filter(pages__gt=150).copy_to(out, fields=['title', 'subtitle'], format='text')
+        self.assertEqual(out.getvalue(), 'Beta, the sequel\t\n')
+        out = StringIO()
+        Book.objects.none().copy_to(out)
+        self.assertEqual(out.getvalue(), '')
+
+    def test_round_trip(self):
+        Book.objects.copy_from(self.rows(), fields=FIELDS)
+        for format in transfer.FORMATS:
+            out = StringIO()
+            Book.objects.copy_to(out, fields=FIELDS, format=format)
+            Book.objects.all().delete()
+            out.seek(0)
+            self.assertEqual(Book.objects.copy_from(out, fields=FIELDS, format=format), 2)
+            self.check_books()
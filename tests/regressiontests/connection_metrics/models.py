@@ -0,0 +1,10 @@
+from django.db import models
+
+class Item(models.Model):
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ['name']
+
+    def __unicode__(self):
+        return self.name
@@ -0,0 +1,175 @@
+import os
+import shutil
+import tempfile
+
+from django.db import connection, connections, transaction
+from django.db.backends.metrics import ConnectionMetrics, LATENCY_BUCKETS, \
+    format_prometheus, write_prometheus
+from django.db.models.query import bulk_insert_query, bulk_update_query
+from django.test import TestCase, TransactionTestCase
+
+from models import Item
+
+def delta(before, after):
+    """
+    Returns the counters and query counts that changed between two
+    snapshots, with their differences.
+    """
+    result = {}
+    for key in ('queries', 'errors'):
+        for statement_type, count in after[key].items():
+            if count != before[key][statement_type]:
+                result['%s.%s' % (key, statement_type)] = count - before[key][statement_type]
+    for key, value in after.items():
+        if isinstance(value, (int, long)) and value != before[key]:
+            result[key] = value - before[key]
+    return result
+
+def query_delta(before, after):
+    """
+    Like delta(), with only the query counts and the rows fetched; the other
+    counters depend on the test database (a file database is reconnected to
+    after a close(), for instance).
+    """
+    return dict([(key, value) for key, value in delta(before, after).items()
+                 if '.' in key or key == 'rows_fetched'])
+
+class QueryMetricsTests(TestCase):
+    def test_queries(self):
+        before = connection.metrics.snapshot()
+        item = Item.objects.create(name='a')
+        Item.objects.create(name='b')
+        Item.objects.filter(name='a').update(name='c')
+        self.assertEqual(len(list(Item.objects.all())), 2)
+        Item.objects.get(pk=item.pk)
+        Item.objects.filter(name='b').delete()
+        after = connection.metrics.snapshot()
+        self.assertEqual(query_delta(before, after), {
+            'queries.insert': 2,
+            'queries.update': 1,
+            # The delete collects the objects to delete until none is left.
+            'queries.select': 4,
+            'queries.delete': 1,
+            'rows_fetched': 4,
+        })
+        for statement_type in ('select', 'insert', 'update', 'delete'):
+            latency = after['latency'][statement_type]
+            self.assertEqual(latency['buckets'][-1], (None, after['queries'][statement_type]))
+            self.assertEqual([bound for bound, count in latency['buckets']],
+                             list(LATENCY_BUCKETS) + [None])
+            counts = [count for bound, count in latency['buckets']]
+            self.assertEqual(counts, sorted(counts))
+            self.assertTrue(latency['seconds'] >= before['latency'][statement_type]['seconds'])
+
+    def test_batch_statements(self):
+        items = [Item.objects.create(name=name) for name in ('a', 'b')]
+        name = Item._meta.get_field('name')
+        before = connection.metrics.snapshot()
+        bulk_insert_query(Item, [name], [('c',), ('d',)], using='default')
+        bulk_update_query(Item, [name], [(item.pk, (item.name + '2',)) for item in items],
+                          using='default')
+        self.assertEqual(query_delta(before, connection.metrics.snapshot()), {
+            'queries.insert': 1,
+            'queries.update': 1,
+        })
+
+    def test_errors(self):
+        before = connection.metrics.snapshot()
+        sid = transaction.savepoint()
+        try:
+            Item.objects.extra(where=['no_such_column = 1']).count()
+        except Exception:
+            transaction.savepoint_rollback(sid)
+        else:
+            self.fail("The query should have failed.")
+        after = connection.metrics.snapshot()
+        self.assertEqual(after['queries']['select'] - before['queries']['select'], 1)
+        self.assertEqual(after['errors']['select'] - before['errors']['select'], 1)
+
+    def test_connections_opened(self):
+        before = connection.metrics.snapshot()['connections_opened']
+        wrapper = connection.__class__(connection.settings_dict, connection.alias)
+        try:
+            wrapper.cursor()
+            wrapper.cursor()
+        finally:
+            wrapper.close()
+        self.assertEqual(connection.metrics.snapshot()['connections_opened'], before + 1)
+
+    def test_snapshot_per_alias(self):
+        metrics = connections.metrics()
+        self.assertEqual(sorted(metrics.keys()), sorted(connections.databases.keys()))
+        before = connections['other'].metrics.snapshot()
+        Item.objects.using('other').count()
+        self.assertEqual(connections['other'].metrics.snapshot()['queries']['select'],
+                         before['queries']['select'] + 1)
+
+class TransactionMetricsTests(TransactionTestCase):
+    def test_transactions(self):
+        before = connection.metrics.snapshot()
+        transaction.enter_transaction_management()
+        transaction.managed(True)
+        try:
+            Item.objects.create(name='a')
+            transaction.commit()
+            Item.objects.create(name='b')
+            sid = transaction.savepoint()
+            transaction.savepoint_rollback(sid)
+            sid = transaction.savepoint()
+            transaction.savepoint_commit(sid)
+            transaction.rollback()
+        finally:
+            transaction.leave_transaction_management()
+        changes = delta(before, connection.metrics.snapshot())
+        savepoints = int(connection.features.uses_savepoints)
+        self.assertEqual(changes.get('commits'), 1)
+        self.assertEqual(changes.get('rollbacks'), 1)
+        self.assertEqual(changes.get('savepoints', 0), 2 * savepoints)
+        self.assertEqual(changes.get('savepoint_rollbacks', 0), savepoints)
+        self.assertEqual(changes.get('savepoint_commits', 0), savepoints)
+        self.assertEqual(Item.objects.count(), 1)
+
+class PrometheusTests(TestCase):
+    def setUp(self):
+        metrics = ConnectionMetrics('default')
+        metrics.query('select', 0.003)
+        metrics.query('select', 20, failed=True)
+        metrics.count('rows_fetched', 5)
+        metrics.count('commits')
+        self.snapshots = {'default': metrics.snapshot()}
+
+    def test_format(self):
+        output = format_prometheus(self.snapshots)
+        lines = output.splitlines()
+        for line in [
+            '# TYPE django_db_queries_total counter',
+            'django_db_queries_total{database="default",type="select"} 2',
+            'django_db_queries_total{database="default",type="insert"} 0',
+            'django_db_query_errors_total{database="default",type="select"} 1',
+            '# TYPE django_db_query_duration_seconds histogram',
+            'django_db_query_duration_seconds_bucket{database="default",le="0.0025",type="select"} 0',
+            'django_db_query_duration_seconds_bucket{database="default",le="0.005",type="select"} 1',
+            'django_db_query_duration_seconds_bucket{database="default",le="10.0",type="select"} 1',
+            'django_db_query_duration_seconds_bucket{database="default",le="+Inf",type="select"} 2',
+            'django_db_query_duration_seconds_sum{database="default",type="select"} 20.003',
+            'django_db_query_duration_seconds_count{database="default",type="select"} 2',
+            'django_db_rows_fetched_total{database="default"} 5',
+            'django_db_commits_total{database="default"} 1',
+            'django_db_connections_opened_total{database="default"} 0',
+        ]:
+            self.assertTrue(line in lines, line)
+        self.assertTrue(output.endswith('\n'))
+
+    def test_label_escaping(self):
+        output = format_prometheus({'a"b\\c': self.snapshots['default']})
+        self.assertTrue('django_db_commits_total{database="a\\"b\\\\c"} 1' in output.splitlines())
+
+    def test_write(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'django.prom')
+            write_prometheus(path, self.snapshots)
+            self.assertEqual(open(path).read(), format_prometheus(self.snapshots))
+            self.assertEqual(os.listdir(directory), ['django.prom'])
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1 @@
+# Connection pooling is tested with throwaway databases; no models needed.
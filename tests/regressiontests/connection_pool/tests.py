@@ -0,0 +1,154 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from django.conf import settings
+from django.db import connection, DatabaseError
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.wrappers = []
+
+    def tearDown(self):
+        for wrapper in self.wrappers:
+            wrapper.close()
+            if wrapper.pool is not None:
+                wrapper.pool.clear()
+        os.remove(self.db_name)
+
+    def get_wrapper(self, name=None, **pool):
+        settings_dict = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': name or self.db_name,
+            'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+            'OPTIONS': {},
+            'TIME_ZONE': settings.TIME_ZONE,
+            'POOL': pool,
+        }
+        wrapper = DatabaseWrapper(settings_dict, 'pool_%s' % self.id().split('.')[-1])
+        self.wrappers.append(wrapper)
+        return wrapper
+
+    def test_reuse(self):
+        wrapper = self.get_wrapper()
+        wrapper.cursor().execute('CREATE TABLE t (x integer)')
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertEqual(wrapper.connection, None)
+        stats = wrapper.pool.stats()
+        self.assertEqual((stats['size'], stats['idle'], stats['in_use']), (1, 1, 0))
+
+        wrapper.cursor()
+        self.assertTrue(wrapper.connection is raw)
+        stats = wrapper.pool.stats()
+        self.assertEqual((stats['checkouts'], stats['reused'], stats['opened']), (2, 1, 1))
+
+    def test_shared_between_wrappers(self):
+        a = self.get_wrapper()
+        b = self.get_wrapper()
+        self.assertTrue(a.pool is b.pool)
+        a.cursor()
+        raw = a.connection
+        a.close()
+        b.cursor()
+        self.assertTrue(b.connection is raw)
+
+    def test_uncommitted_changes_are_rolled_back(self):
+        wrapper = self.get_wrapper()
+        cursor = wrapper.cursor()
+        cursor.execute('CREATE TABLE t (x integer)')
+        wrapper._commit()
+        wrapper.cursor().execute('INSERT INTO t VALUES (1)')
+        wrapper.close()
+        cursor = wrapper.cursor()
+        cursor.execute('SELECT COUNT(*) FROM t')
+        self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_max_age(self):
+        wrapper = self.get_wrapper(MAX_AGE=0)
+        wrapper.cursor()
+        raw = wrapper.connection
+        wrapper.close()
+        stats = wrapper.pool.stats()
+        self.assertEqual((stats['size'], stats['closed']), (0, 1))
+        wrapper.cursor()
+        self.assertFalse(wrapper.connection is raw)
+
+    def test_health_check(self):
+        wrapper = self.get_wrapper(CHECK_AFTER=0)
+        wrapper.cursor()
+        raw = wrapper.connection
+        wrapper.close()
+        # The connection breaks while it sits in the pool.
+        raw.close()
+        wrapper.cursor().execute('SELECT 1')
+        self.assertFalse(wrapper.connection is raw)
+        stats = wrapper.pool.stats()
+        self.assertEqual((stats['failed_checks'], stats['size']), (1, 1))
+
+    def test_min_size(self):
+        wrapper = self.get_wrapper(MIN_SIZE=2)
+        wrapper.cursor()
+        stats = wrapper.pool.stats()
+        self.assertEqual((stats['size'], stats['idle'], stats['in_use']), (2, 1, 1))
+
+    def test_other_database_not_reused(self):
+        wrapper = self.get_wrapper()
+        wrapper.cursor()
+        raw = wrapper.connection
+        wrapper.close()
+        fd, other_name = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        try:
+            wrapper.settings_dict['NAME'] = other_name
+            wrapper.cursor()
+            self.assertFalse(wrapper.connection is raw)
+            wrapper.close()
+        finally:
+            os.remove(other_name)
+
+    def test_max_size_and_threads(self):
+        wrapper = self.get_wrapper(MAX_SIZE=1, TIMEOUT=0.1)
+        wrapper.cursor()
+        errors = []
+        def use_connection():
+            # The wrapper is thread-local, so this thread needs a connection
+            # of its own, and there's none left.
+            try:
+                wrapper.cursor()
+            except DatabaseError, e:
+                errors.append(e)
+            else:
+                wrapper.close()
+        thread = threading.Thread(target=use_connection)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(wrapper.pool.stats()['timeouts'], 1)
+
+        # Once the connection is checked in, another thread can use it.
+        raw = wrapper.connection
+        wrapper.close()
+        used = []
+        def reuse_connection():
+            wrapper.cursor().execute('SELECT 1')
+            used.append(wrapper.connection)
+            wrapper.close()
+        thread = threading.Thread(target=reuse_connection)
+        thread.start()
+        thread.join()
+        self.assertTrue(used[0] is raw)
+
+    def test_in_memory_database_not_pooled(self):
+        wrapper = self.get_wrapper(name=':memory:')
+        wrapper.cursor()
+        self.assertEqual(wrapper.pool.stats()['size'], 0)
+
+    def test_not_configured(self):
+        self.assertEqual(connection.settings_dict['POOL'], None)
+        self.assertEqual(connection.pool, None)
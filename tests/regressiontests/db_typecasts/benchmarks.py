@@ -0,0 +1,103 @@
+"""
+Microbenchmarks of the typecast functions in django.db.backends.util against
+the implementations they replaced, which are kept here for reference.
+
+Run with the tests directory on the path:
+
+    python -c "from regressiontests.db_typecasts import benchmarks; benchmarks.run()"
+"""
+
+import datetime
+import decimal
+import timeit
+
+from django.conf import settings
+if not settings.configured:
+    settings.configure()
+
+from django.db.backends import util
+
+def legacy_typecast_date(s):
+    return s and datetime.date(*map(int, s.split('-'))) or None
+
+def legacy_typecast_time(s):
+    if not s: return None
+    hour, minutes, seconds = s.split(':')
+    if '.' in seconds:
+        seconds, microseconds = seconds.split('.')
+    else:
+        microseconds = '0'
+    return datetime.time(int(hour), int(minutes), int(seconds), int(float('.'+microseconds) * 1000000))
+
+def legacy_typecast_timestamp(s):
+    if not s: return None
+    if not ' ' in s: return legacy_typecast_date(s)
+    d, t = s.split()
+    if '-' in t:
+        t, tz = t.split('-', 1)
+    elif '+' in t:
+        t, tz = t.split('+', 1)
+    dates = d.split('-')
+    times = t.split(':')
+    seconds = times[2]
+    if '.' in seconds:
+        seconds, microseconds = seconds.split('.')
+    else:
+        microseconds = '0'
+    return datetime.datetime(int(dates[0]), int(dates[1]), int(dates[2]),
+        int(times[0]), int(times[1]), int(seconds), int(float('.'+microseconds) * 1000000))
+
+def legacy_format_number(value, max_digits, decimal_places):
+    context = decimal.getcontext().copy()
+    context.prec = max_digits
+    return u'%s' % str(value.quantize(decimal.Decimal(".1") ** decimal_places, context=context))
+
+def sample_values(count=1000):
+    """
+    Returns lists of typical date, time and timestamp strings, as the
+    database adapters hand them over.
+    """
+    start = datetime.datetime(2010, 1, 1, 8, 0, 0)
+    timestamps = [str(start + datetime.timedelta(minutes=37 * i, microseconds=2351 * i))
+                  for i in range(count)]
+    return {
+        'date': [value[:10] for value in timestamps],
+        'time': [value[11:] for value in timestamps],
+        'time (quarter hours)': ['%02d:%02d:00' % (i // 4 % 24, i % 4 * 15) for i in range(count)],
+        'timestamp': timestamps,
+        'timestamp with time zone': [value + '+02' for value in timestamps],
+    }
+
+BENCHMARKS = (
+    ('typecast_date', 'date', legacy_typecast_date, util.typecast_date),
+    ('typecast_time', 'time', legacy_typecast_time, util.typecast_time),
+    ('typecast_time', 'time (quarter hours)', legacy_typecast_time, util.typecast_time),
+    ('typecast_timestamp', 'timestamp', legacy_typecast_timestamp, util.typecast_timestamp),
+    ('typecast_timestamp', 'timestamp with time zone', legacy_typecast_timestamp, util.typecast_timestamp),
+)
+
+def _time(func, values, repeat):
+    def loop():
+        for value in values:
+            func(value)
+    return min(timeit.Timer(loop).repeat(repeat, 1)) / len(values)
+
+def run(count=10000, repeat=5):
+    """
+    Prints the time per value of the legacy and current functions.
+    """
+    values = sample_values(count)
+    for name, kind, legacy, current in BENCHMARKS:
+        before = _time(legacy, values[kind], repeat)
+        after = _time(current, values[kind], repeat)
+        print '%-20s %-26s %6.2f us -> %6.2f us (%.1fx)' % (
+            name, kind, before * 1e6, after * 1e6, before / after)
+    value = decimal.Decimal('1234.56789')
+    numbers = [value] * count
+    before = _time(lambda v: legacy_format_number(v, 10, 2), numbers, repeat)
+    after = _time(lambda v: util.format_number(v, 10, 2), numbers, repeat)
+    print '%-20s %-26s %6.2f us -> %6.2f us (%.1fx)' % (
+        'format_number', 'decimal', before * 1e6, after * 1e6, before / after)
+
+if __name__ == '__main__':
+    run()
@@ -1,7 +1,7 @@
 # Unit tests for typecast functions in django.db.backends.util
 
 from django.db.backends import util as typecasts
-import datetime, unittest
+import datetime, decimal, unittest
 
 TEST_CASES = {
     'typecast_date': (
@@ -24,6 +24,7 @@ TEST_CASES = {
         ('00:00:12', datetime.time(0, 0, 12)),
         ('00:00:12.5', datetime.time(0, 0, 12, 500000)),
         ('7:22:13.312', datetime.time(7, 22, 13, 312000)),
+        ('07:22:13.000249', datetime.time(7, 22, 13, 249)),
     ),
     'typecast_timestamp': (
         ('', None),
@@ -35,6 +36,13 @@ TEST_CASES = {
         ('2005-08-11 8:50:30.9', datetime.datetime(2005, 8, 11, 8, 50, 30, 900000)),
         ('2005-08-11 8:50:30.312-05', datetime.datetime(2005, 8, 11, 8, 50, 30, 312000)),
         ('2005-08-11 8:50:30.312+02', datetime.datetime(2005, 8, 11, 8, 50, 30, 312000)),
+        ('2005-08-11 08:50:30', datetime.datetime(2005, 8, 11, 8, 50, 30)),
+        ('2005-08-11 08:50:30.000249', datetime.datetime(2005, 8, 11, 8, 50, 30, 249)),
+        ('2005-08-11 08:50:30.1234567', datetime.datetime(2005, 8, 11, 8, 50, 30, 123456)),
+        ('2005-08-11 08:50:30.312-05', datetime.datetime(2005, 8, 11, 8, 50, 30, 312000)),
+        ('2005-08-11 08:50:30.590358+02', datetime.datetime(2005, 8, 11, 8, 50, 30, 590358)),
+        ('2005-08-11 08:50:30-05', datetime.datetime(2005, 8, 11, 8, 50, 30)),
+        ('2005-08-11', datetime.date(2005, 8, 11)),
     ),
     'typecast_boolean': (
         (None, None),
@@ -52,5 +60,23 @@ class DBTypeCasts(unittest.TestCase):
                 got = getattr(typecasts, k)(inpt)
                 assert got == expected, "In %s: %r doesn't match %r. Got %r instead." % (k, inpt, expected, got)
 
+    def test_legacy_equivalence(self):
+        # The functions agree with the ones they replaced, except where
+        # those lost a microsecond to floating point rounding.
+        from regressiontests.db_typecasts import benchmarks
+        for name, kind, legacy, current in benchmarks.BENCHMARKS:
+            for value in benchmarks.sample_values(500)[kind]:
+                old, new = legacy(value), current(value)
+                if old != new:
+                    self.assertEquals(old.replace(microsecond=old.microsecond + 1), new)
+
+    def test_format_number(self):
+        from regressiontests.db_typecasts import benchmarks
+        for value in ('1234.56789', '0.005', '-3', '99.999'):
+            for decimal_places in (0, 2, 3):
+                self.assertEquals(
+                    typecasts.format_number(decimal.Decimal(value), 10, decimal_places),
+                    benchmarks.legacy_format_number(decimal.Decimal(value), 10, decimal_places))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
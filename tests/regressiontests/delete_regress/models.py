@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.db import models, backend, connection, transaction, DEFAULT_DB_ALIAS
 from django.db.models import sql, query
-from django.test import TransactionTestCase
+from django.test import TestCase, TransactionTestCase
 
 class Book(models.Model):
     pagecount = models.IntegerField()
@@ -60,3 +60,58 @@ if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] != 'django.db.backends.sqlite3
             Book.objects.filter(pagecount__lt=250).delete()
             transaction.commit()
             self.assertEquals(1, Book.objects.count())
+
+class BatchFeatures(object):
+    preferred_batch_size = 100
+    max_query_params = None
+
+class BatchConnection(object):
+    features = BatchFeatures()
+
+class DeleteBatchSizeTest(TestCase):
+    def setUp(self):
+        self.old_debug = settings.DEBUG
+        settings.DEBUG = True
+        for i in range(30):
+            Book.objects.create(pagecount=i)
+
+    def tearDown(self):
+        settings.DEBUG = self.old_debug
+
+    def _count_deletes(self, func, *args, **kwargs):
+        connection.queries = []
+        func(*args, **kwargs)
+        return len([q for q in connection.queries
+                    if q['sql'].startswith('DELETE')])
+
+    def test_get_batch_size(self):
+        conn = BatchConnection()
+        self.assertEqual(sql.subqueries.get_batch_size(conn), 100)
+        self.assertEqual(sql.subqueries.get_batch_size(conn, 5000), 5000)
+        conn.features.max_query_params = 999
+        self.assertEqual(sql.subqueries.get_batch_size(conn, 5000), 999)
+        self.assertEqual(sql.subqueries.get_batch_size(conn, 5000, 1), 998)
+        self.assertEqual(sql.subqueries.get_batch_size(conn, 0), 1)
+
+    def test_get_bulk_batch_size(self):
+        conn = BatchConnection()
+        conn.features.max_query_params = None
+        self.assertEqual(sql.subqueries.get_bulk_batch_size(conn, 3), 100)
+        conn.features.max_query_params = 999
+        self.assertEqual(sql.subqueries.get_bulk_batch_size(conn, 3), 100)
+        self.assertEqual(sql.subqueries.get_bulk_batch_size(conn, 20), 49)
+        self.assertEqual(sql.subqueries.get_bulk_batch_size(conn, 0), 100)
+        self.assertEqual(sql.subqueries.get_bulk_batch_size(conn, 2000), 1)
+
+    def test_default_batch_size(self):
+        self.assertEqual(self._count_deletes(Book.objects.all().delete), 1)
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_batch_size_override(self):
+        self.assertEqual(
+            self._count_deletes(Book.objects.filter(pagecount__lt=25).delete, batch_size=10), 3)
+        self.assertEqual(Book.objects.count(), 5)
+        pk_list = list(Book.objects.values_list('pk', flat=True))
+        self.assertEqual(
+            self._count_deletes(sql.DeleteQuery(Book).delete_batch, pk_list, 'default', batch_size=2), 3)
+        self.assertEqual(Book.objects.count(), 0)
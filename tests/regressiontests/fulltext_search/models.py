@@ -0,0 +1,15 @@
+from django.db import models
+
+class Article(models.Model):
+    title = models.CharField(max_length=100)
+    body = models.TextField()
+    summary = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.SearchIndex('title', 'body')]
+
+    def __unicode__(self):
+        return self.title
+
+class Column(Article):
+    columnist = models.CharField(max_length=50)
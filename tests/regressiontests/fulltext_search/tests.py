@@ -0,0 +1,85 @@
+from django.core.exceptions import FieldError
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import SearchIndex
+from django.test import TestCase
+
+from models import Article, Column
+
+def can_search():
+    engine = connection.settings_dict['ENGINE']
+    if engine == 'django.db.backends.sqlite3':
+        return bool(connection.features.fts_module)
+    return engine in ('django.db.backends.postgresql',
+                      'django.db.backends.postgresql_psycopg2')
+
+class SearchIndexTests(TestCase):
+    def test_options(self):
+        self.assertRaises(ValueError, SearchIndex, '-title')
+        self.assertRaises(ValueError, SearchIndex, 'title', unique=True)
+        self.assertRaises(ValueError, SearchIndex, 'title', config="english'; --")
+        self.assertEqual(SearchIndex('title').config, 'english')
+
+    def test_name(self):
+        self.assertEqual(Article._meta.indexes[0].get_name(Article),
+            'fulltext_search_article_title_body_search')
+
+class SearchTests(TestCase):
+    def setUp(self):
+        Article.objects.create(title='Django ORM tips',
+            body='Use select_related to avoid extra queries.')
+        Article.objects.create(title='Gardening',
+            body='Django is also the name of a jazz guitarist. Django Reinhardt.')
+        Article.objects.create(title='Cooking', body='Nothing to see here.')
+
+    def test_lookup(self):
+        if not can_search():
+            return
+        self.assertEqual([a.title for a in Article.objects.filter(title__search='django')],
+            ['Django ORM tips'])
+        self.assertEqual([a.title for a in Article.objects.filter(body__search='Django guitarist')],
+            ['Gardening'])
+        self.assertEqual(Article.objects.filter(body__search='queries extra').count(), 1)
+        self.assertEqual(Article.objects.filter(body__search='"; DROP --').count(), 0)
+        self.assertEqual(Article.objects.exclude(body__search='django').count(), 2)
+
+    def test_kept_in_sync(self):
+        if not can_search():
+            return
+        article = Article.objects.get(title='Cooking')
+        article.body = 'Django, the pasta sauce.'
+        article.save()
+        self.assertEqual(Article.objects.filter(body__search='django').count(), 2)
+        self.assertEqual(Article.objects.filter(body__search='nothing').count(), 0)
+        Article.objects.filter(title='Gardening').delete()
+        self.assertEqual([a.title for a in Article.objects.filter(body__search='django')],
+            ['Cooking'])
+
+    def test_rank(self):
+        if not can_search():
+            return
+        Article.objects.create(title='Jazz', body='Django, Django, Django.')
+        results = Article.objects.search('body', 'django').order_by('-rank')
+        self.assertEqual([a.title for a in results], ['Jazz', 'Gardening'])
+        self.assertTrue(results[0].rank > results[1].rank > 0)
+
+    def test_inherited(self):
+        if not can_search():
+            return
+        Column.objects.create(title='Weekly django', body='...', columnist='Ann')
+        self.assertEqual([c.columnist for c in Column.objects.filter(title__search='django')],
+            ['Ann'])
+        self.assertEqual([c.columnist for c in Column.objects.search('title', 'django')],
+            ['Ann'])
+
+    def test_unindexed(self):
+        if connection.settings_dict['ENGINE'] != 'django.db.backends.sqlite3' or not can_search():
+            return
+        self.assertRaises(FieldError, list, Article.objects.filter(summary__search='django'))
+
+    def test_sql(self):
+        sql = connection.creation.sql_create_model(Article, no_style())[0]
+        sql += connection.creation.sql_indexes_for_model(Article, no_style())
+        name = Article._meta.indexes[0].get_name(Article)
+        if can_search():
+            self.assertTrue([s for s in sql if name in s])
@@ -0,0 +1,139 @@
+import datetime
+import os
+import sys
+import tempfile
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.db.models.sql import workload
+from django.test import TestCase
+
+from models import Author, Book
+
+def accesses(queryset):
+    """
+    Returns the accesses of queryset, as recorded when it runs.
+    """
+    recorder = workload.start_recording()
+    try:
+        list(queryset)
+    finally:
+        workload.stop_recording()
+    result = [access[1:-1] for access in recorder.accesses()]
+    result.sort()
+    return result
+
+class DescribeQueryTests(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name='Ann')
+        Book.objects.create(author=author, title='One', pub_date=datetime.date(2010, 1, 1), rating=3)
+
+    def test_filter_and_order(self):
+        self.assertEqual(accesses(Book.objects.filter(rating=3, pub_date__gte=datetime.date(2009, 1, 1))),
+            [('index_advisor_book', ('rating',), ('pub_date',), (('pub_date', True),))])
+        self.assertEqual(accesses(Book.objects.filter(rating__in=[1, 2]).order_by('title').reverse()),
+            [('index_advisor_book', ('rating',), (), (('title', True),))])
+
+    def test_unindexable(self):
+        # ORed, negated and non-prefix conditions don't count.
+        self.assertEqual(accesses(Author.objects.filter(Q(name='a') | Q(id=2))), [])
+        self.assertEqual(accesses(Author.objects.exclude(name='a')), [])
+        self.assertEqual(accesses(Author.objects.filter(name__contains='a')), [])
+
+    def test_join(self):
+        self.assertEqual(accesses(Author.objects.filter(book__rating=3)),
+            [('index_advisor_book', ('author_id', 'rating'), (), ())])
+
+    def test_updates_are_not_ordered(self):
+        recorder = workload.start_recording()
+        try:
+            Book.objects.filter(rating=3).update(rating=4)
+        finally:
+            workload.stop_recording()
+        self.assertTrue(('default', 'index_advisor_book', ('rating',), (), (), 1)
+                        in recorder.accesses())
+
+    def test_bounded(self):
+        recorder = workload.start_recording(max_accesses=2)
+        try:
+            for rating in range(3):
+                list(Book.objects.filter(rating=rating))
+            list(Book.objects.filter(title='One'))
+            list(Author.objects.filter(name='Ann'))
+        finally:
+            workload.stop_recording()
+        self.assertEqual(len(recorder.counts), 2)
+        self.assertEqual(recorder.counts[('default', 'index_advisor_book', ('rating',), (), (('pub_date', True),))], 3)
+        self.assertEqual(recorder.dropped, 1)
+
+    def test_dump_and_load(self):
+        recorder = workload.start_recording()
+        try:
+            list(Book.objects.filter(rating=3))
+            list(Book.objects.filter(rating=3))
+        finally:
+            workload.stop_recording()
+        output = StringIO()
+        recorder.dump(output)
+        output.seek(0)
+        self.assertEqual(workload.load(output), recorder.accesses())
+        self.assertRaises(ValueError, workload.load, StringIO('{"equal": []}\n'))
+
+class SuggestIndexesTests(TestCase):
+    def test_suggestions(self):
+        accesses = [
+            ('book', ('rating',), ('pub_date',), (), 5),
+            ('book', ('rating',), (), (), 2),
+            ('book', ('author_id',), (), (('pub_date', True),), 10),
+            ('book', ('title',), (), (), 50),
+            ('book', (), (), (('pub_date', True), ('title', False)), 1),
+        ]
+        existing = {'book': [['id'], ['title']]}
+        suggestions = workload.suggest_indexes(accesses, existing)
+        self.assertEqual([(s.columns(), s.hits) for s in suggestions], [
+            (['author_id', 'pub_date'], 10),
+            (['rating', 'pub_date'], 7),
+            (['pub_date', 'title'], 1),
+        ])
+        self.assertEqual(workload.suggest_indexes(accesses, existing, min_hits=8)[0].hits, 10)
+        # Equality columns can come in any order.
+        suggestion = workload.Suggestion('book', ('a', 'b'), (('c', False),), 'range', 1)
+        self.assertTrue(suggestion.covered_by(['b', 'a', 'c', 'd']))
+        self.assertFalse(suggestion.covered_by(['a', 'c', 'b']))
+
+    def test_existing_indexes(self):
+        existing = workload.existing_indexes(connection)
+        self.assertTrue(['author_id'] in existing['index_advisor_book'])
+        self.assertTrue(['title'] in existing['index_advisor_book'])
+        self.assertTrue(['id'] in existing['index_advisor_book'])
+
+class CommandTests(TestCase):
+    def test_command(self):
+        author = Author.objects.create(name='Ann')
+        recorder = workload.start_recording()
+        try:
+            for i in range(3):
+                list(Book.objects.filter(author=author, rating=5))
+            list(Book.objects.filter(title='One').order_by())
+        finally:
+            workload.stop_recording()
+        fd, path = tempfile.mkstemp()
+        old_stdout = sys.stdout
+        try:
+            recorder.dump(os.fdopen(fd, 'w'))
+            sys.stdout = StringIO()
+            call_command('adviseindexes', path)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = old_stdout
+            os.remove(path)
+        qn = connection.ops.quote_name
+        self.assertTrue("-- 3 hits; equal to author_id, rating; ordered by -pub_date "
+                        "(index_advisor.Book: Index('author', 'rating', 'pub_date'))" in output, output)
+        self.assertTrue('CREATE INDEX %s ON %s (%s, %s, %s);' % (
+            qn('index_advisor_book_author_id_rating_pub_date'), qn('index_advisor_book'),
+            qn('author_id'), qn('rating'), qn('pub_date')) in output, output)
+        # The index on title exists.
+        self.assertFalse('title' in output, output)
@@ -0,0 +1,10 @@
+from django.db import models
+
+class Number(models.Model):
+    num = models.IntegerField()
+    label = models.CharField(max_length=20)
+    amount = models.DecimalField(max_digits=8, decimal_places=2)
+    day = models.DateField()
+
+    def __unicode__(self):
+        return self.label
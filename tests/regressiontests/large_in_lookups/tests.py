@@ -0,0 +1,80 @@
+import datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.db.backends import BaseDatabaseOperations
+from django.test import TestCase
+
+from models import Number
+
+# More values than SQLite allows variables in a statement.
+COUNT = 1200
+
+class ChunkedOperations(BaseDatabaseOperations):
+    large_in_list_threshold = 3
+
+    def max_in_list_size(self):
+        return 2
+
+class InLookupSQLTests(TestCase):
+    def test_short_list(self):
+        ops = BaseDatabaseOperations()
+        self.assertEqual(ops.in_lookup_sql('"num"', [1, 2]),
+            ('"num" IN (%s, %s)', [1, 2]))
+
+    def test_chunked(self):
+        ops = ChunkedOperations()
+        self.assertEqual(ops.in_lookup_sql('"num"', [1, 2]),
+            ('"num" IN (%s, %s)', [1, 2]))
+        self.assertEqual(ops.in_lookup_sql('"num"', [1, 2, 3, 4, 5]),
+            ('("num" IN (%s, %s) OR "num" IN (%s, %s) OR "num" IN (%s))', [1, 2, 3, 4, 5]))
+
+class LargeInLookupTests(TestCase):
+    def setUp(self):
+        start = datetime.date(2010, 1, 1)
+        for i in range(COUNT):
+            Number.objects.create(num=i, label='n%d' % i,
+                amount=Decimal(i) / 4, day=start + datetime.timedelta(days=i))
+        self.pks = list(Number.objects.values_list('pk', flat=True))
+
+    def test_integers(self):
+        self.assertEqual(Number.objects.filter(pk__in=self.pks).count(), COUNT)
+        self.assertEqual(Number.objects.filter(num__in=range(0, 2 * COUNT, 2)).count(), COUNT / 2)
+        self.assertEqual(Number.objects.exclude(num__in=range(1, COUNT)).get().num, 0)
+
+    def test_strings(self):
+        labels = ['n%d' % i for i in range(COUNT - 10, COUNT + 1000)]
+        self.assertEqual(Number.objects.filter(label__in=labels).count(), 10)
+
+    def test_decimals_and_dates(self):
+        amounts = [Decimal(i) / 4 for i in range(0, COUNT, 3)]
+        self.assertEqual(Number.objects.filter(amount__in=amounts).count(), COUNT / 3)
+        start = datetime.date(2010, 1, 1)
+        days = [start + datetime.timedelta(days=i) for i in range(0, COUNT, 2)]
+        self.assertEqual(Number.objects.filter(day__in=days).count(), COUNT / 2)
+
+    def test_in_bulk(self):
+        objs = Number.objects.in_bulk(self.pks + [max(self.pks) + 1])
+        self.assertEqual(len(objs), COUNT)
+        self.assertEqual(objs[self.pks[-1]].num, COUNT - 1)
+
+    def test_delete(self):
+        Number.objects.filter(pk__in=self.pks[:COUNT - 5]).delete()
+        self.assertEqual(Number.objects.count(), 5)
+
+    def test_single_parameter(self):
+        query = Number.objects.filter(pk__in=self.pks).query
+        sql, params = query.get_compiler(connection=connection).as_sql()
+        if connection.ops.large_in_lookup_sql('x', self.pks) is not None:
+            self.assertEqual(len(params), 1)
+        else:
+            self.assertEqual(len(params), COUNT)
+        # Dates are passed as strings, along with the type of the column.
+        days = [datetime.date(2010, 1, 1) + datetime.timedelta(days=i) for i in range(COUNT)]
+        query = Number.objects.filter(day__in=days).query
+        sql, params = query.get_compiler(connection=connection).as_sql()
+        day_type = Number._meta.get_field('day').db_type(connection=connection)
+        if connection.ops.large_in_lookup_sql('x', [str(day) for day in days], day_type) is not None:
+            self.assertEqual(len(params), 1)
+        else:
+            self.assertEqual(len(params), COUNT)
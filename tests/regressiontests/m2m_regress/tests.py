@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+from models import SelfRefer, Tag, Entry
+
+
+class M2MBulkWriteTests(TestCase):
+    def setUp(self):
+        self.old_debug = settings.DEBUG
+        settings.DEBUG = True
+        self.tags = [Tag.objects.create(name='t%d' % i) for i in range(20)]
+        self.entry = Entry.objects.create(name='entry')
+
+    def tearDown(self):
+        settings.DEBUG = self.old_debug
+
+    def _count_queries(self, func, *args):
+        connection.queries = []
+        func(*args)
+        return len([q for q in connection.queries
+                    if not q['sql'].startswith('SAVEPOINT')])
+
+    def test_add_is_single_insert(self):
+        num = self._count_queries(self.entry.topics.add, *self.tags)
+        if connection.features.has_bulk_insert:
+            # One SELECT for the existing rows and one multi-row INSERT.
+            self.assertEqual(num, 2)
+        self.assertEqual(
+            sorted(self.entry.topics.values_list('name', flat=True)),
+            sorted([t.name for t in self.tags]))
+
+        # Adding rows that already exist doesn't write anything.
+        self.assertEqual(self._count_queries(self.entry.topics.add, *self.tags[:5]), 1)
+        self.assertEqual(self.entry.topics.count(), 20)
+
+    def test_set(self):
+        self.entry.topics.add(*self.tags[:10])
+        self.entry.topics.set(self.tags[5:15])
+        self.assertEqual(
+            sorted(self.entry.topics.values_list('name', flat=True)),
+            sorted([t.name for t in self.tags[5:15]]))
+
+        # Setting the same values again doesn't write anything.
+        self.assertEqual(self._count_queries(self.entry.topics.set, self.tags[5:15]), 1)
+
+        # Primary keys can be used instead of instances.
+        self.entry.topics.set([t.pk for t in self.tags[:3]])
+        self.assertEqual(
+            sorted(self.entry.topics.values_list('name', flat=True)),
+            ['t0', 't1', 't2'])
+
+        self.entry.topics.set([])
+        self.assertEqual(self.entry.topics.count(), 0)
+
+    def test_set_reverse(self):
+        other = Entry.objects.create(name='other')
+        self.tags[0].entry_set.set([self.entry, other])
+        self.assertEqual(sorted(self.tags[0].entry_set.values_list('name', flat=True)),
+            ['entry', 'other'])
+        self.tags[0].entry_set.set([other])
+        self.assertEqual(list(self.entry.topics.all()), [])
+
+    def test_set_symmetrical(self):
+        a = SelfRefer.objects.create(name='a')
+        b = SelfRefer.objects.create(name='b')
+        c = SelfRefer.objects.create(name='c')
+        a.references.set([b, c])
+        self.assertEqual(list(b.references.all()), [a])
+        a.references.set([c])
+        self.assertEqual(list(b.references.all()), [])
+        self.assertEqual(list(c.references.all()), [a])
+
+    def test_set_signals(self):
+        from django.db.models import signals
+        self.entry.topics.add(*self.tags[:2])
+        sent = []
+        def handler(signal, sender, action, pk_set, **kwargs):
+            sent.append((action, sorted(pk_set)))
+        signals.m2m_changed.connect(handler, sender=Entry.topics.through)
+        try:
+            self.entry.topics.set(self.tags[1:3])
+        finally:
+            signals.m2m_changed.disconnect(handler, sender=Entry.topics.through)
+        self.assertEqual(sent, [
+            ('remove', [self.tags[0].pk]),
+            ('add', [self.tags[2].pk]),
+        ])
@@ -0,0 +1,21 @@
+from django.db import connection, models
+
+class Member(models.Model):
+    first_name = models.CharField(max_length=50)
+    last_name = models.CharField(max_length=50)
+    email = models.CharField(max_length=100)
+    joined = models.DateField()
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index('last_name', 'first_name'),
+            models.Index('-joined', 'last_name'),
+            models.Index('joined', where='%(is_active)s = 1'),
+        ]
+        # Validation rejects unique indexes the database can't create.
+        if connection.features.supports_expression_indexes:
+            indexes.append(models.Index('LOWER(%(email)s)', unique=True, name='member_email_lower'))
+
+    def __unicode__(self):
+        return u'%s %s' % (self.first_name, self.last_name)
@@ -0,0 +1,104 @@
+import datetime
+import warnings
+from StringIO import StringIO
+
+from django.core.management.color import no_style
+from django.core.management.validation import ModelErrorCollection
+from django.db import connection, IntegrityError
+from django.db.models import Index
+from django.test import TestCase, TransactionTestCase
+
+from models import Member
+
+class IndexTests(TestCase):
+    def test_parts(self):
+        index = Index('name', '-LOWER(%(email)s)', where='%(active)s = 1')
+        self.assertEqual(index.parts(),
+            [('name', False, False), ('LOWER(%(email)s)', True, True)])
+        self.assertEqual(index.field_names(), ['name', 'email', 'active'])
+        self.assertTrue(index.has_expressions())
+        self.assertRaises(ValueError, Index)
+        self.assertRaises(TypeError, Index, 'name', unqiue=True)
+
+    def test_names(self):
+        creation = connection.creation
+        indexes = Member._meta.indexes
+        self.assertEqual(creation.index_name(Member, indexes[0]),
+            'model_indexes_member_last_name_first_name')
+        # Indexes on the same columns get different names.
+        self.assertTrue(creation.index_name(Member, indexes[1]).startswith(
+            'model_indexes_member_joined_last_name_'))
+        self.assertNotEqual(creation.index_name(Member, indexes[1]),
+            creation.index_name(Member, Index('joined', 'last_name')))
+        self.assertEqual(creation.index_name(Member, Index('LOWER(%(email)s)', name='member_email_lower')),
+            'member_email_lower')
+
+    def get_sql(self):
+        return connection.creation.sql_indexes_for_model(Member, no_style())
+
+    def test_sql(self):
+        qn = connection.ops.quote_name
+        creation = connection.creation
+        indexes = Member._meta.indexes
+        sql = self.get_sql()
+        self.assertTrue('CREATE INDEX %s ON %s (%s, %s);' % (
+            qn(creation.index_name(Member, indexes[0])), qn('model_indexes_member'),
+            qn('last_name'), qn('first_name')) in sql)
+        self.assertTrue('CREATE INDEX %s ON %s (%s DESC, %s);' % (
+            qn(creation.index_name(Member, indexes[1])), qn('model_indexes_member'),
+            qn('joined'), qn('last_name')) in sql)
+        if connection.features.supports_partial_indexes:
+            self.assertTrue('CREATE INDEX %s ON %s (%s) WHERE %s = 1;' % (
+                qn(creation.index_name(Member, indexes[2])), qn('model_indexes_member'),
+                qn('joined'), qn('is_active')) in sql)
+        if connection.features.supports_expression_indexes:
+            self.assertTrue('CREATE UNIQUE INDEX %s ON %s ((LOWER(%s)));' % (
+                qn('member_email_lower'), qn('model_indexes_member'), qn('email')) in sql)
+
+    def test_unsupported(self):
+        features = connection.features
+        old = features.supports_partial_indexes, features.supports_expression_indexes
+        features.supports_partial_indexes = False
+        features.supports_expression_indexes = False
+        old_filters = warnings.filters[:]
+        try:
+            # Skipped indexes are reported.
+            warnings.simplefilter('error', RuntimeWarning)
+            self.assertRaises(RuntimeWarning, self.get_sql)
+            warnings.simplefilter('ignore', RuntimeWarning)
+            sql = self.get_sql()
+            # Unique ones are rejected by validation instead.
+            errors = ModelErrorCollection(StringIO())
+            validation = connection.validation
+            validation.validate_index(errors, Member._meta, Index('joined', where='%(is_active)s = 1'))
+            validation.validate_index(errors, Member._meta, Index('joined', unique=True, where='%(is_active)s = 1'))
+            validation.validate_index(errors, Member._meta, Index('LOWER(%(email)s)', unique=True))
+            validation.validate_index(errors, Member._meta, Index('email', unique=True))
+        finally:
+            warnings.filters[:] = old_filters
+            features.supports_partial_indexes, features.supports_expression_indexes = old
+        self.assertEqual(len([s for s in sql if 'WHERE' in s or 'LOWER' in s]), 0)
+        self.assertEqual(len(sql), 2)
+        self.assertEqual([message for opts, message in errors.errors], [
+            '"indexes" has a unique partial index on joined, which this database can\'t create.',
+            '"indexes" has a unique expression index on LOWER(%(email)s), which this database can\'t create.',
+        ])
+
+    def test_created(self):
+        if connection.settings_dict['ENGINE'] != 'django.db.backends.sqlite3':
+            return
+        cursor = connection.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s",
+            ['model_indexes_member'])
+        names = [row[0] for row in cursor.fetchall()]
+        for index in Member._meta.indexes:
+            self.assertTrue(connection.creation.index_name(Member, index) in names)
+
+class ExpressionIndexTests(TransactionTestCase):
+    def test_unique_expression(self):
+        if not connection.features.supports_expression_indexes:
+            return
+        Member.objects.create(first_name='Ann', last_name='Lee', email='ann@example.com',
+            joined=datetime.date(2010, 1, 1))
+        self.assertRaises(IntegrityError, Member.objects.create, first_name='Ann',
+            last_name='Lee', email='ANN@example.com', joined=datetime.date(2010, 1, 1))
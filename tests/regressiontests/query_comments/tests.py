@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends import sqlcomments
+from django.db.backends.sqlcomments import SQLComments
+from django.test import TestCase
+
+from models import Entry
+
+def fetch_entries():
+    return list(Entry.objects.filter(headline__startswith='50%'))
+
+class SQLCommentsTests(TestCase):
+    def setUp(self):
+        self.old_debug = settings.DEBUG
+        settings.DEBUG = True
+        self.old_comments = connection.sql_comments
+        connection.sql_comments = SQLComments({})
+        Entry.objects.create(headline='50% off')
+
+    def tearDown(self):
+        settings.DEBUG = self.old_debug
+        connection.sql_comments = self.old_comments
+        sqlcomments.clear_context()
+
+    def last_sql(self):
+        return connection.queries[-1]['sql']
+
+    def test_caller_and_model(self):
+        self.assertEqual(len(fetch_entries()), 1)
+        self.assertTrue(self.last_sql().endswith(
+            "/*caller='regressiontests.query_comments.tests%3Afetch_entries',"
+            "model='query_comments.Entry'*/"), self.last_sql())
+
+    def test_context(self):
+        previous = sqlcomments.set_context(request_id="a'b c", trace_id='1234')
+        self.assertEqual(previous, {})
+        Entry.objects.count()
+        self.assertTrue(self.last_sql().endswith(
+            "model='query_comments.Entry',request_id='a%27b%20c',trace_id='1234'*/"),
+            self.last_sql())
+        sqlcomments.set_context(request_id=None)
+        self.assertEqual(sqlcomments.get_context(), {'trace_id': '1234'})
+        sqlcomments.restore_context(previous)
+        Entry.objects.count()
+        self.assertTrue(self.last_sql().endswith("model='query_comments.Entry'*/"))
+
+    def test_options(self):
+        connection.sql_comments = SQLComments({'CALLER': False, 'CONTEXT': False})
+        sqlcomments.set_context(request_id='42')
+        fetch_entries()
+        self.assertTrue(self.last_sql().endswith(" /*model='query_comments.Entry'*/"))
+        connection.sql_comments = SQLComments({'CALLER': False, 'MODEL': False, 'CONTEXT': False})
+        fetch_entries()
+        self.assertFalse('/*' in self.last_sql())
+
+    def test_writes(self):
+        Entry.objects.filter(headline='50% off').update(headline='sold out')
+        self.assertTrue("model='query_comments.Entry'" in self.last_sql())
+        self.assertEqual(Entry.objects.get().headline, 'sold out')
+
+    def test_command(self):
+        sqlcomments.set_context(request_id='42')
+        connection.queries = []
+        call_command('loaddata', 'query_comments_entries', verbosity=0)
+        self.assertEqual(Entry.objects.count(), 2)
+        self.assertTrue([q for q in connection.queries
+                         if "command='loaddata',model='query_comments.Entry',request_id='42'" in q['sql']])
+        # The command's context ends with it.
+        self.assertEqual(sqlcomments.get_context(), {'request_id': '42'})
+
+    def test_split_comment(self):
+        self.assertEqual(sqlcomments.split_comment("SELECT 1 /*a='b%%2F'*/"),
+                         ('SELECT 1', " /*a='b%%2F'*/"))
+        self.assertEqual(sqlcomments.split_comment('SELECT 1'), ('SELECT 1', ''))
+
+    def test_statement_cache(self):
+        # Comments with changing tags don't fill the statement cache.
+        cache = getattr(connection, 'converted_queries', None)
+        if cache is None:
+            return
+        for i in range(3):
+            sqlcomments.set_context(request_id=str(i))
+            fetch_entries()
+        size = len(cache)
+        for i in range(3, 10):
+            sqlcomments.set_context(request_id='%d%%' % i)
+            self.assertEqual(len(fetch_entries()), 1)
+            self.assertTrue(self.last_sql().endswith("request_id='%d%%25'*/" % i), self.last_sql())
+        self.assertEqual(len(cache), size)
+
+    def test_disabled(self):
+        connection.sql_comments = None
+        fetch_entries()
+        self.assertFalse('/*' in self.last_sql())
@@ -0,0 +1,111 @@
+import threading
+
+from django.db import connection, transaction
+from django.db.models.executor import QueryExecutor, TimeoutError
+from django.test import TransactionTestCase
+
+from models import Item
+
+
+class QueryExecutorTestCase(TransactionTestCase):
+    multi_db = True
+
+    def setUp(self):
+        self.executor = QueryExecutor(max_workers=2, max_in_flight=4)
+        for i in range(25):
+            Item.objects.using('other').create(name='item %02d' % i)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_fetch_and_count(self):
+        items = Item.objects.using('other')
+        future = items.afetch(executor=self.executor)
+        self.assertEquals(len(future.result(5)), 25)
+        self.assertEquals(future.result()[0].name, 'item 00')
+        self.assertEquals(future.exception(), None)
+        self.assertEquals(items.filter(name__lt='item 10').acount(executor=self.executor).result(5), 10)
+        # The QuerySet itself isn't evaluated.
+        self.assertEquals(items._result_cache, None)
+
+    def test_in_memory_database(self):
+        # The test database's name is only known once it has been created.
+        if connection.settings_dict['NAME'] != ':memory:':
+            return
+        Item.objects.create(name='local')
+        # In-memory SQLite databases are queried from the calling thread.
+        future = Item.objects.all().afetch(executor=self.executor)
+        self.assertTrue(future.done())
+        self.assertEquals([item.name for item in future.result()], ['local'])
+        self.assertEquals(self.executor.stats()['workers'], 0)
+
+    def test_save(self):
+        item = Item(name='saved')
+        item.asave(using='other', executor=self.executor).result(5)
+        self.assertTrue(item.pk is not None)
+        self.assertEquals(Item.objects.using('other').get(pk=item.pk).name, 'saved')
+
+    def test_errors(self):
+        future = Item.objects.using('other').extra(where=['no_such_column = 1']).afetch(executor=self.executor)
+        self.assertRaises(Exception, future.result, 5)
+        self.assertTrue(future.exception() is not None)
+
+    def test_chunks(self):
+        iterator = Item.objects.using('other').aiterator(chunk_size=10, executor=self.executor)
+        chunks = [iterator.next_chunk() for i in range(4)]
+        self.assertEquals([len(chunk.result(5)) for chunk in chunks], [10, 10, 5, 0])
+        self.assertEquals(chunks[2].result()[-1].name, 'item 24')
+        iterator.close().result(5)
+        self.assertRaises(ValueError, Item.objects.aiterator, chunk_size=0)
+
+    def test_transactions_ended(self):
+        executor = QueryExecutor(max_workers=1)
+        def leave_open():
+            transaction.enter_transaction_management(using='other')
+            transaction.managed(True, using='other')
+            transaction.set_dirty(using='other')
+        executor.submit(leave_open).result(5)
+        # The next call on the worker isn't run in the transaction the first
+        # one left open.
+        state = executor.submit(lambda: (transaction.is_managed(using='other'),
+                                         transaction.is_dirty(using='other')))
+        self.assertEquals(state.result(5), (False, False))
+        executor.shutdown()
+
+    def test_callbacks(self):
+        results = []
+        event = threading.Event()
+        def callback(future):
+            results.append(future.result())
+            event.set()
+        Item.objects.using('other').acount(executor=self.executor).add_done_callback(callback)
+        event.wait(5)
+        self.assertEquals(results, [25])
+        # A callback added to a finished future is called right away.
+        future = Item.objects.using('other').acount(executor=self.executor)
+        future.result(5)
+        future.add_done_callback(callback)
+        self.assertEquals(results, [25, 25])
+
+    def test_backpressure(self):
+        executor = QueryExecutor(max_workers=1, max_in_flight=2)
+        release = threading.Event()
+        blocked = [executor.submit(release.wait) for i in range(2)]
+        self.assertEquals(executor.stats()['in_flight'], 2)
+        self.assertRaises(TimeoutError, blocked[0].result, 0.01)
+
+        submitted = threading.Event()
+        def submit():
+            executor.submit(lambda: None)
+            submitted.set()
+        thread = threading.Thread(target=submit)
+        thread.start()
+        # The third call waits until one of the first two finishes.
+        submitted.wait(0.1)
+        self.assertFalse(submitted.isSet())
+        release.set()
+        submitted.wait(5)
+        self.assertTrue(submitted.isSet())
+        thread.join()
+        executor.shutdown()
+        self.assertRaises(RuntimeError, executor.submit, lambda: None)
@@ -0,0 +1,92 @@
+import time
+
+from django.db import connection, transaction, DatabaseError, QueryTimeout
+from django.db.backends import BaseDatabaseOperations
+from django.test import TestCase
+
+from models import Item
+
+# A condition that takes several seconds to evaluate.
+SLOW_WHERE = ("(WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL "
+              "SELECT n + 1 FROM counter WHERE n < 100000000) "
+              "SELECT COUNT(*) FROM counter) > 0")
+
+class QueryTimeoutTests(TestCase):
+    def setUp(self):
+        Item.objects.create(name='first')
+        Item.objects.create(name='second')
+
+    def test_clone(self):
+        qs = Item.objects.timeout(2.5)
+        self.assertEqual(qs.query.timeout, 2.5)
+        self.assertEqual(qs.filter(name='first').query.timeout, 2.5)
+        self.assertEqual(Item.objects.all().query.timeout, None)
+
+    def test_fast_queries(self):
+        qs = Item.objects.timeout(10)
+        self.assertEqual([i.name for i in qs.order_by('name')], ['first', 'second'])
+        self.assertEqual(qs.count(), 2)
+        self.assertEqual(qs.filter(name='first').update(name='third'), 1)
+        self.assertEqual(Item.objects.filter(name='third').count(), 1)
+
+    def test_not_a_timeout(self):
+        # Other errors go through unchanged.
+        try:
+            list(Item.objects.timeout(10).extra(where=['no_such_column = 1']))
+        except QueryTimeout:
+            self.fail("Raised QueryTimeout for a query that didn't time out.")
+        except DatabaseError:
+            pass
+
+    def test_unsupported(self):
+        ops = BaseDatabaseOperations()
+        self.assertEqual(ops.start_query_timeout(connection, 'SELECT 1', 5), 'SELECT 1')
+        self.assertFalse(ops.is_query_timeout(DatabaseError('interrupted')))
+
+    if connection.features.supports_query_timeouts:
+        def test_timeout(self):
+            sid = transaction.savepoint()
+            start = time.time()
+            self.assertRaises(QueryTimeout, list,
+                Item.objects.timeout(0.2).extra(where=[SLOW_WHERE]))
+            self.assertTrue(time.time() - start < 5)
+            # QueryTimeout is a DatabaseError, so existing handlers catch it.
+            self.assertTrue(issubclass(QueryTimeout, DatabaseError))
+            # A timeout aborts the transaction on PostgreSQL.
+            transaction.savepoint_rollback(sid)
+            # The limit is lifted once the query has run.
+            self.assertEqual(Item.objects.count(), 2)
+
+        def test_timeout_after_first_row(self):
+            # The first row comes back quickly; the query times out while
+            # the rest are fetched.
+            sid = transaction.savepoint()
+            qs = Item.objects.timeout(0.2).order_by('pk').extra(
+                where=["name = 'first' OR (%s)" % SLOW_WHERE])
+            try:
+                list(qs)
+            except QueryTimeout:
+                pass
+            else:
+                self.fail("The query should have timed out.")
+            transaction.savepoint_rollback(sid)
+
+        def test_count_timeout(self):
+            sid = transaction.savepoint()
+            self.assertRaises(QueryTimeout,
+                Item.objects.timeout(0.2).extra(where=[SLOW_WHERE]).count)
+            transaction.savepoint_rollback(sid)
+
+        def test_default(self):
+            old_timeout = connection.query_timeout
+            connection.query_timeout = 0.2
+            try:
+                sid = transaction.savepoint()
+                self.assertRaises(QueryTimeout, list, Item.objects.extra(where=[SLOW_WHERE]))
+                transaction.savepoint_rollback(sid)
+                # 0 lifts the default.
+                qs = Item.objects.timeout(0).extra(where=['1 = 1'])
+                self.assertEqual(qs.query.timeout, 0)
+                self.assertEqual(len(qs), 2)
+            finally:
+                connection.query_timeout = old_timeout
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db import router
+from django.db.backends.signals import connection_failed
+from django.db.routers import ReplicaRouter
+from django.test import TestCase
+
+from models import Book
+
+
+class TestReplicaRouter(ReplicaRouter):
+    replicas = {'other': 1}
+
+
+class ReplicaRouterTestCase(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        self.old_routers = router.routers
+        self.replica_router = TestReplicaRouter()
+        router.routers = [self.replica_router]
+
+    def tearDown(self):
+        router.routers = self.old_routers
+
+    def test_reads_and_writes(self):
+        self.assertEquals(Book.objects.db, 'other')
+        self.assertEquals(Book.objects.all().db, 'other')
+        self.assertEquals(router.db_for_write(Book), 'default')
+
+    def test_read_your_writes(self):
+        Book.objects.create(title='Dive into Python')
+        # Right after a write, the thread reads from the primary.
+        self.assertEquals(Book.objects.all().db, 'default')
+        self.assertEquals(Book.objects.get().title, 'Dive into Python')
+        self.replica_router.unpin()
+        self.assertEquals(Book.objects.all().db, 'other')
+
+        self.replica_router.pin_seconds = 0
+        router.db_for_write(Book)
+        self.assertEquals(Book.objects.all().db, 'other')
+
+    def test_weights(self):
+        self.replica_router.replicas = {'other': 1, 'default': 0}
+        for i in range(10):
+            self.assertEquals(self.replica_router.choose_replica(
+                    self.replica_router.healthy_replicas()), 'other')
+        self.replica_router.replicas = {'other': 0}
+        self.assertEquals(self.replica_router.healthy_replicas(), [])
+        self.assertEquals(Book.objects.db, 'default')
+
+    def test_unhealthy_replica(self):
+        connection_failed.send(sender=None, alias='other', exception=Exception())
+        self.assertEquals(self.replica_router.healthy_replicas(), [])
+        self.assertEquals(Book.objects.db, 'default')
+
+        # The replica comes back once 'retry_after' has passed.
+        self.replica_router.retry_after = 0
+        self.replica_router.mark_unhealthy('other')
+        self.assertEquals(Book.objects.db, 'other')
+
+    def test_least_outstanding_without_pool(self):
+        self.replica_router.strategy = 'least_outstanding'
+        self.assertEquals(Book.objects.db, 'other')
+
+    def test_replicas_from_settings(self):
+        other = settings.DATABASES['other']
+        other['REPLICA_OF'] = 'default'
+        other['WEIGHT'] = 3
+        try:
+            self.assertEquals(ReplicaRouter().replicas, {'other': 3})
+        finally:
+            del other['REPLICA_OF']
+            del other['WEIGHT']
+
+    def test_relations_and_syncdb(self):
+        a = Book.objects.using('other').create(title='a')
+        b = Book.objects.using('default').create(title='b')
+        self.assertEquals(router.allow_relation(a, b), True)
+        self.assertEquals(router.allow_syncdb('other', Book), False)
+        self.assertEquals(router.allow_syncdb('default', Book), True)
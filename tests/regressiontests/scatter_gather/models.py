@@ -0,0 +1,11 @@
+from django.db import models
+
+class Review(models.Model):
+    title = models.CharField(max_length=100)
+    rating = models.IntegerField()
+
+    class Meta:
+        ordering = ('rating', 'title')
+
+    def __unicode__(self):
+        return self.title
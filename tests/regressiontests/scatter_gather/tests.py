@@ -0,0 +1,77 @@
+from django.db.models import Avg, Count, Max, Min, Sum, StdDev
+from django.test import TransactionTestCase
+
+from models import Review
+
+
+class ScatterTestCase(TransactionTestCase):
+    multi_db = True
+
+    def setUp(self):
+        for title, rating in [('a', 1), ('c', 4), ('e', 6)]:
+            Review.objects.using('default').create(title=title, rating=rating)
+        for title, rating in [('b', 2), ('d', 5), ('f', 6), ('g', 8)]:
+            Review.objects.using('other').create(title=title, rating=rating)
+        self.reviews = Review.objects.scatter(['default', 'other'])
+
+    def test_ordered_merge(self):
+        self.assertEquals([r.title for r in self.reviews],
+            ['a', 'b', 'c', 'd', 'e', 'f', 'g'])
+        self.assertEquals([r._state.db for r in self.reviews][:2],
+            ['default', 'other'])
+        descending = Review.objects.order_by('-rating', 'title').scatter(['default', 'other'])
+        self.assertEquals([r.title for r in descending],
+            ['g', 'e', 'f', 'd', 'c', 'b', 'a'])
+
+    def test_unordered(self):
+        unordered = Review.objects.order_by().scatter(['default', 'other'])
+        self.assertEquals(sorted([r.title for r in unordered]),
+            ['a', 'b', 'c', 'd', 'e', 'f', 'g'])
+
+    def test_slicing(self):
+        self.assertEquals([r.title for r in self.reviews[2:5]], ['c', 'd', 'e'])
+        self.assertEquals([r.title for r in self.reviews[1:][:2]], ['b', 'c'])
+        self.assertEquals([r.title for r in self.reviews[5:]], ['f', 'g'])
+        self.assertEquals(self.reviews[:3].count(), 3)
+        self.assertRaises(TypeError, lambda: self.reviews[-1:])
+        self.assertRaises(TypeError, lambda: self.reviews[0])
+
+    def test_values(self):
+        values = Review.objects.values('title', 'rating').order_by('-rating', 'title')
+        self.assertEquals([v['title'] for v in values.scatter(['default', 'other'])[:3]],
+            ['g', 'e', 'f'])
+        values_list = Review.objects.values_list('rating', flat=True).order_by('rating')
+        self.assertEquals(list(values_list.scatter(['default', 'other'])),
+            [1, 2, 4, 5, 6, 6, 8])
+
+    def test_unmergeable_ordering(self):
+        self.assertRaises(ValueError, list, Review.objects.order_by('?').scatter(['default', 'other']))
+        # The values must include the fields the results are ordered by.
+        self.assertRaises(ValueError, list, Review.objects.values_list('rating').scatter(['default', 'other']))
+
+    def test_count_and_exists(self):
+        self.assertEquals(self.reviews.count(), 7)
+        self.assertEquals(len(self.reviews), 7)
+        self.assertEquals(Review.objects.filter(rating__gt=6).scatter(['default', 'other']).count(), 1)
+        self.assertEquals(Review.objects.filter(rating=8).scatter(['default', 'other']).exists(), True)
+        self.assertEquals(Review.objects.filter(rating=9).scatter(['default', 'other']).exists(), False)
+
+    def test_aggregate(self):
+        self.assertEquals(self.reviews.aggregate(Count('id'), Sum('rating'), Min('rating'), Max('rating')),
+            {'id__count': 7, 'rating__sum': 32, 'rating__min': 1, 'rating__max': 8})
+        # The average is over all the rows, not an average of averages.
+        self.assertAlmostEquals(self.reviews.aggregate(avg=Avg('rating'))['avg'], 32 / 7.0)
+        empty = Review.objects.filter(rating=9).scatter(['default', 'other'])
+        self.assertEquals(empty.aggregate(Avg('rating'), Max('rating')),
+            {'rating__avg': None, 'rating__max': None})
+        Review.objects.using('default').create(title='h', rating=0)
+        Review.objects.using('other').create(title='i', rating=0)
+        zeros = Review.objects.filter(rating=0).scatter(['default', 'other'])
+        self.assertEquals(zeros.aggregate(Avg('rating')), {'rating__avg': 0.0})
+        self.assertRaises(ValueError, self.reviews.aggregate, Count('rating', distinct=True))
+        self.assertRaises(ValueError, self.reviews.aggregate, StdDev('rating'))
+
+    def test_errors_are_raised(self):
+        broken = Review.objects.extra(where=['no_such_column = 1']).scatter(['default', 'other'])
+        self.assertRaises(Exception, broken.count)
+        self.assertRaises(Exception, list, broken)
@@ -0,0 +1,14 @@
+from django.db import models
+
+class Customer(models.Model):
+    name = models.CharField(max_length=100)
+
+    def __unicode__(self):
+        return self.name
+
+class Order(models.Model):
+    customer = models.ForeignKey(Customer)
+    amount = models.IntegerField()
+
+class Note(models.Model):
+    text = models.CharField(max_length=100)
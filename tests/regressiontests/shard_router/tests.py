@@ -0,0 +1,129 @@
+from django.core.management.base import CommandError
+from django.core.management.commands.shards import Command
+from django.db import router
+from django.db.routers import HashRing, ShardRouter, shard_for
+from django.test import TestCase
+
+from models import Customer, Order, Note
+
+
+class TestShardRouter(ShardRouter):
+    shards = ['default', 'other']
+    shard_keys = {
+        'shard_router.customer': 'id',
+        'shard_router.order': 'customer',
+    }
+
+
+class HashRingTestCase(TestCase):
+    def test_distribution(self):
+        ring = HashRing(['a', 'b', 'c'])
+        counts = {}
+        for key in range(3000):
+            node = ring.get_node(key)
+            counts[node] = counts.get(node, 0) + 1
+        for count in counts.values():
+            self.assertTrue(700 < count < 1300, counts)
+        # The same key always maps to the same node, whatever its type.
+        self.assertEquals(ring.get_node(42), ring.get_node(u'42'))
+
+    def test_adding_a_node(self):
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        moved = 0
+        for key in range(4000):
+            if before.get_node(key) != after.get_node(key):
+                # Keys only ever move to the new node.
+                self.assertEquals(after.get_node(key), 'd')
+                moved += 1
+        self.assertTrue(700 < moved < 1300, moved)
+
+    def test_weights(self):
+        ring = HashRing({'a': 1, 'b': 3})
+        count = len([key for key in range(4000) if ring.get_node(key) == 'b'])
+        self.assertTrue(2600 < count < 3400, count)
+
+    def test_empty(self):
+        self.assertRaises(ValueError, HashRing([]).get_node, 1)
+
+
+class ShardRouterTestCase(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        self.old_routers = router.routers
+        self.shard_router = TestShardRouter()
+        router.routers = [self.shard_router]
+
+    def tearDown(self):
+        router.routers = self.old_routers
+
+    def create_customers(self, count):
+        customers = []
+        for i in range(1, count + 1):
+            customer = Customer(id=i, name='customer %d' % i)
+            customer.save()
+            customers.append(customer)
+        return customers
+
+    def test_writes_follow_the_key(self):
+        customers = self.create_customers(20)
+        for customer in customers:
+            self.assertEquals(customer._state.db, shard_for(customer.id))
+            order = Order.objects.create(customer=customer, amount=10)
+            self.assertEquals(order._state.db, customer._state.db)
+        self.assertEquals(
+            Customer.objects.using('default').count() + Customer.objects.using('other').count(), 20)
+        self.assertTrue(Customer.objects.using('default').count())
+        self.assertTrue(Customer.objects.using('other').count())
+
+        customer = customers[0]
+        self.assertEquals(
+            Customer.objects.using(shard_for(customer.id)).get(pk=customer.id).name, customer.name)
+
+    def test_reads_follow_the_instance(self):
+        customer = self.create_customers(1)[0]
+        Order.objects.create(customer=customer, amount=10)
+        self.assertEquals(customer.order_set.all().db, customer._state.db)
+        self.assertEquals(customer.order_set.get().amount, 10)
+        self.assertEquals(router.db_for_read(Customer, shard_key=customer.id), customer._state.db)
+
+    def test_missing_key(self):
+        self.assertRaises(ValueError, Customer.objects.create, name='no id')
+        # Models that aren't sharded are routed as usual.
+        self.assertEquals(Note.objects.create(text='note')._state.db, 'default')
+
+    def test_cross_shard_relations(self):
+        customers = self.create_customers(20)
+        first = customers[0]
+        other = [c for c in customers if c._state.db != first._state.db][0]
+        order = Order.objects.create(customer=first, amount=10)
+        try:
+            order.customer = other
+        except ValueError:
+            pass
+        else:
+            self.fail("A relation across shards was allowed.")
+
+    def test_command(self):
+        self.create_customers(40)
+        misplaced = Customer(id=1000, name='misplaced')
+        misplaced.save(using=[a for a in ('default', 'other') if a != shard_for(1000)][0])
+
+        output = Command().handle('shard_router.Customer')
+        lines = output.split('\n')
+        self.assertEquals(lines[0], 'shard_router.Customer (shard key: id)')
+        self.assertEquals(len([line for line in lines if 'on the wrong shard' in line]), 1)
+
+        output = Command().handle('shard_router.Customer', remove=['other'])
+        moved = Customer.objects.using('other').count()
+        self.assertTrue('Rebalancing onto default would move %d of 41 rows' % moved in output, output)
+        self.assertTrue('other -> default: %d' % moved in output, output)
+
+        output = Command().handle(add=['third'])
+        self.assertTrue('shard_router.Order (shard key: customer)' in output)
+        self.assertTrue('-> third' in output)
+
+        self.assertRaises(CommandError, Command().handle, 'shard_router.Note')
+        self.assertRaises(CommandError, Command().handle, remove=['third'])
+        self.assertRaises(CommandError, Command().handle, remove=['default', 'other'])